@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: how build_champion_database scales with sheet size
+
+Generates synthetic sheets of growing size (synthetic_sheets.py), runs the
+full build offline on each (build_regression.run_offline_build) and reports
+build time, peak memory and every stage's time against the number of
+champions. Each stage gets a scaling exponent from a log-log fit (1 = linear,
+2 = quadratic); stages clearly above linear are listed as super-linear.
+
+Prints text charts; with matplotlib installed it also saves
+bench_build_scaling.png.
+"""
+import math
+import sys
+import tempfile
+
+from build_regression import run_offline_build
+from synthetic_sheets import write_sheets
+
+# Exponent above which a stage is reported as super-linear
+SUPER_LINEAR = 1.3
+# Stages faster than this at the largest size are too small to fit
+MIN_FIT_SECONDS = 0.005
+CHART_WIDTH = 40
+
+
+def scaling_exponent(sizes, times):
+    """Least-squares slope of log(time) against log(size)"""
+    points = [(math.log(size), math.log(seconds)) for size, seconds in zip(sizes, times) if seconds > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+
+
+def text_chart(title, labels, values, unit):
+    """One bar per size, scaled to the largest value"""
+    print(f"\n{title}")
+    largest = max(values) or 1
+    for label, value in zip(labels, values):
+        print(f"  {label:>8} |{'#' * max(1, round(CHART_WIDTH * value / largest)):<{CHART_WIDTH}} {value:.3f} {unit}")
+
+
+def save_plot(sizes, seconds, peaks, stage_times, path="bench_build_scaling.png"):
+    """Build time, peak memory and per-stage times against champions, if matplotlib is installed"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("\n(matplotlib not installed; skipping bench_build_scaling.png)")
+        return
+    figure, (time_axis, memory_axis) = plt.subplots(1, 2, figsize=(12, 5))
+    time_axis.loglog(sizes, seconds, marker="o", linewidth=2, label="whole build")
+    for stage, times in stage_times.items():
+        if max(times) >= MIN_FIT_SECONDS:
+            time_axis.loglog(sizes, times, marker=".", label=stage)
+    time_axis.set_xlabel("champions")
+    time_axis.set_ylabel("seconds")
+    time_axis.legend(fontsize="small")
+    memory_axis.plot(sizes, peaks, marker="o")
+    memory_axis.set_xlabel("champions")
+    memory_axis.set_ylabel("peak MB")
+    figure.tight_layout()
+    figure.savefig(path)
+    print(f"\nSaved {path}")
+
+
+def main(per_class_sizes):
+    sizes, seconds, peaks, stage_times = [], [], [], {}
+    print(f"{'per class':>10}{'champions':>11}{'sheet KB':>10}{'build s':>10}{'peak MB':>10}")
+    for per_class in per_class_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_sheets(tmp, per_class=per_class, classes=7, columns=8, emoji=0.8)
+            sheet_kb = sum(len(open(path, 'rb').read()) for path in paths.values()) / 1024
+            database, report, build_seconds, _ = run_offline_build(tmp)
+            _, _, _, peak = run_offline_build(tmp, trace_memory=True)
+
+        sizes.append(len(database))
+        seconds.append(build_seconds)
+        peaks.append(peak / (1024 * 1024))
+        for stage in report["stages"]:
+            stage_times.setdefault(stage["stage"], []).append(stage["seconds"])
+        print(f"{per_class:>10}{len(database):>11}{sheet_kb:>10.0f}{build_seconds:>10.3f}{peaks[-1]:>10.1f}")
+
+    labels = [str(size) for size in sizes]
+    text_chart("Build time (s) by champions", labels, seconds, "s")
+    text_chart("Peak memory (MB) by champions", labels, peaks, "MB")
+
+    print(f"\n{'stage':<24}" + "".join(f"{label:>10}" for label in labels) + f"{'exponent':>10}")
+    super_linear = []
+    for stage, times in stage_times.items():
+        fitted = max(times) >= MIN_FIT_SECONDS
+        exponent = scaling_exponent(sizes, times) if fitted else None
+        print(f"{stage:<24}" + "".join(f"{value:>10.3f}" for value in times)
+              + (f"{exponent:>10.2f}" if fitted else f"{'-':>10}"))
+        if fitted and exponent > SUPER_LINEAR:
+            super_linear.append((stage, exponent))
+    print(f"{'whole build':<24}" + "".join(f"{value:>10.3f}" for value in seconds)
+          + f"{scaling_exponent(sizes, seconds):>10.2f}")
+    print(f"{'peak MB':<24}" + "".join(f"{value:>10.1f}" for value in peaks)
+          + f"{scaling_exponent(sizes, peaks):>10.2f}")
+
+    if super_linear:
+        print("\nSuper-linear stages: " + ", ".join(f"{stage} (~n^{exponent:.1f})" for stage, exponent in super_linear))
+    else:
+        print("\nNo super-linear stages")
+    save_plot(sizes, seconds, peaks, stage_times)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [25, 50, 100, 200, 400])
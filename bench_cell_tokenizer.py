@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: the old per-site cell parsing vs the shared cell tokenizer
+
+Runs the fixture corpus (tests/fixtures/cells.json) through the old BGs and
+ranking cell parsing from build_database.py and through tokenize_cell, and
+reports cells per second for each. The tokenizer caches its results, so it
+is timed both on a first pass (cache cleared) and on a repeat ingest of the
+same cells, which is what a sheet refresh looks like.
+"""
+import json
+import re
+import sys
+import time
+
+from utils.cell_tokenizer import tokenize_cell
+
+CORPUS_FILE = "tests/fixtures/cells.json"
+
+
+def old_bg_cell(value):
+    """The BG cell parse as it was: split on the first dash, prefix checks for the rating"""
+    parts = value.split('-', 1)
+    if len(parts) < 2:
+        return None
+    name_part = parts[0].strip()
+    rating_part_str = parts[1].strip()
+    if rating_part_str.startswith('1') and len(rating_part_str) > 1 and rating_part_str[1].isdigit():
+        rating_part = 10
+    elif rating_part_str and rating_part_str[0].isdigit():
+        rating_part = int(rating_part_str[0])
+    else:
+        return None
+    emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
+    return name_part, rating_part, emoji_pattern.findall(value)
+
+
+def old_ranking_cell(value):
+    """The ranking cell parse as it was: build the name char by char, then regex the rest"""
+    name_part = ""
+    i = 0
+    while i < len(value):
+        char = value[i]
+        char_code = ord(char)
+        if (65 <= char_code <= 90) or (97 <= char_code <= 122) or (48 <= char_code <= 57) or char in ' -.()':
+            name_part += char
+            i += 1
+        else:
+            break
+    emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
+    return name_part.strip(), emoji_pattern.findall(value[i:].strip())
+
+
+def rate(func, cells, repeat, before_pass=None):
+    elapsed = 0.0
+    for _ in range(repeat):
+        if before_pass:
+            before_pass()
+        started = time.perf_counter()
+        for value in cells:
+            func(value)
+        elapsed += time.perf_counter() - started
+    return len(cells) * repeat / elapsed
+
+
+def main(repeat):
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    bg_cells = [case['cell'] for case in corpus if case['rated']]
+    ranking_cells = [case['cell'] for case in corpus if not case['rated']]
+
+    print(f"{'cells':<10}{'old cells/s':>14}{'first pass':>14}{'speedup':>9}{'repeat pass':>14}{'speedup':>9}")
+    for label, cells, old, new in (
+        ('bg', bg_cells, old_bg_cell, lambda value: tokenize_cell(value, rated=True)),
+        ('ranking', ranking_cells, old_ranking_cell, tokenize_cell),
+    ):
+        old_rate = rate(old, cells, repeat)
+        first_rate = rate(new, cells, repeat, before_pass=tokenize_cell.cache_clear)
+        repeat_rate = rate(new, cells, repeat)
+        print(f"{label:<10}{old_rate:>14,.0f}{first_rate:>14,.0f}{first_rate / old_rate:>8.1f}x"
+              f"{repeat_rate:>14,.0f}{repeat_rate / old_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
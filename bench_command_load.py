@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Load generator: how many commands a second MCOCCommands sustains
+
+Drives the command cog directly with fake contexts (no Discord connection),
+the way discord.py would after parsing a message: the before/after invoke
+hooks, the command callback, and ctx.send for the reply. Each command is
+`!rankup name`, `!rankup a, b[, c]` or `!pick N a, b, ...`, in a configurable
+mix. Names follow a popularity curve (a few champions are asked about far
+more than the rest) and a configurable share of them carry a typo: a letter
+dropped, doubled, swapped or replaced, odd casing, stray spaces.
+
+Closed loop by default (--concurrency clients, each sending its next command
+when the last reply arrives); with --rate, commands arrive at that many a
+second regardless of replies, which shows latency once the bot saturates.
+Reports throughput, latency percentiles per command, event-loop lag, the
+commands shed by admission control and the response cache hit ratio.
+--json prints the same as one JSON object, for tracking runs over time.
+--trace-above traces every command (utils/tracing.py) and writes those
+slower than that many seconds to --trace-file with their spans.
+
+    python bench_command_load.py --commands 2000 --concurrency 32 --typo-rate 0.3
+    python bench_command_load.py --rate 50 --duration 20 --mix rankup=1,compare=1,pick=2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import string
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from cogs.command_handler import MCOCCommands
+from data_manager_json import DataManager
+from utils.offload import LoopLagMonitor
+from utils.tracing import tracer
+from tests.helpers import FakeContext
+
+DEFAULT_MIX = "rankup=5,compare=3,pick=2"
+# How strongly popularity falls off with a champion's rank (Zipf exponent)
+POPULARITY = 1.1
+
+
+def typo(rng: random.Random, name: str) -> str:
+    """name as someone might mistype it"""
+    letters = list(name)
+    edit = rng.choice(("drop", "double", "swap", "replace", "case", "spaces"))
+    if len(letters) < 4 or edit == "case":
+        return name.lower() if rng.random() < 0.5 else name.upper()
+    index = rng.randrange(len(letters) - 1)
+    if edit == "drop":
+        del letters[index]
+    elif edit == "double":
+        letters.insert(index, letters[index])
+    elif edit == "swap":
+        letters[index], letters[index + 1] = letters[index + 1], letters[index]
+    elif edit == "replace":
+        letters[index] = rng.choice(string.ascii_lowercase)
+    else:
+        return f"  {name.lower()} "
+    return "".join(letters)
+
+
+class Workload:
+    """Random commands following the mix, the popularity curve and the typo rate"""
+
+    def __init__(self, names: List[str], mix: Dict[str, float], typo_rate: float, users: int, guilds: int,
+                 seed: int):
+        self.rng = random.Random(seed)
+        self.names = list(names)
+        self.rng.shuffle(self.names)
+        self.weights = [1 / (rank + 1) ** POPULARITY for rank in range(len(self.names))]
+        self.kinds = list(mix)
+        self.kind_weights = [mix[kind] for kind in self.kinds]
+        self.typo_rate = typo_rate
+        self.users = users
+        self.guilds = guilds
+
+    def _names(self, count: int) -> List[str]:
+        picked = set()
+        while len(picked) < min(count, len(self.names)):
+            picked.add(self.rng.choices(self.names, self.weights)[0])
+        return [typo(self.rng, name) if self.rng.random() < self.typo_rate else name for name in picked]
+
+    def next(self) -> Tuple[str, str, int, int]:
+        """(kind, argument text, user id, guild id) of the next command"""
+        kind = self.rng.choices(self.kinds, self.kind_weights)[0]
+        if kind == "rankup":
+            argument = self._names(1)[0]
+        elif kind == "compare":
+            argument = ", ".join(self._names(self.rng.choice((2, 2, 3))))
+        else:
+            argument = f"{self.rng.randint(2, 5)} " + ", ".join(self._names(self.rng.randint(5, 30)))
+        user = self.rng.randrange(self.users)
+        # Users stay in one guild, so a busy guild's bucket fills from many users
+        return kind, argument, user, user % self.guilds
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("rankup", "compare", "pick"):
+            raise argparse.ArgumentTypeError(f"unknown command '{kind}' (use rankup, compare, pick)")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class LoadGenerator:
+    """Sends a workload's commands to the cog and times each one, reply included"""
+
+    def __init__(self, cog: MCOCCommands, workload: Workload):
+        self.cog = cog
+        self.workload = workload
+        self.latencies: Dict[str, List[float]] = {kind: [] for kind in ("rankup", "compare", "pick")}
+        self.errors = 0
+
+    async def invoke(self, kind: str, argument: str, user: int, guild: int):
+        """One command the way discord.py runs it: hooks around the callback"""
+        command = self.cog.pick_battlegrounds_champions if kind == "pick" else self.cog.rankup_recommendations
+        ctx = FakeContext(command, user, guild)
+        started = time.perf_counter()
+        await self.cog.cog_before_invoke(ctx)
+        try:
+            # The cog isn't added to a bot, so its commands aren't bound to it: call the functions
+            if kind == "pick":
+                await command.callback(self.cog, ctx, args=argument)
+            else:
+                await command.callback(self.cog, ctx, champion_name=argument)
+        except Exception as e:
+            ctx.command_failed = True
+            self.errors += 1
+            logging.error(f"!{kind} {argument}: {e}")
+        await self.cog.cog_after_invoke(ctx)
+        self.latencies[kind].append(time.perf_counter() - started)
+
+    async def closed_loop(self, commands: int, concurrency: int):
+        remaining = [commands]
+
+        async def client():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                await self.invoke(*self.workload.next())
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    async def open_loop(self, rate: float, duration: float):
+        """Commands arriving at rate per second (exponential gaps) for duration seconds"""
+        loop = asyncio.get_running_loop()
+        tasks = []
+        deadline = loop.time() + duration
+        arrival = loop.time()
+        while arrival < deadline:
+            arrival += self.workload.rng.expovariate(rate)
+            await asyncio.sleep(max(0.0, arrival - loop.time()))
+            tasks.append(loop.create_task(self.invoke(*self.workload.next())))
+        await asyncio.gather(*tasks)
+
+
+async def run(args) -> Dict:
+    logging.disable(logging.WARNING)
+    tracer.slow_seconds, tracer.path = args.trace_above, args.trace_file
+    data_manager = DataManager()
+    cog = MCOCCommands(None, data_manager)
+    if args.no_limits:
+        admission = cog.command_handler.admission
+        admission.user_rate = admission.user_burst = admission.guild_rate = admission.guild_burst = 1e9
+        admission.max_bulk_queue = 1 << 30
+    names = [champion.name for champion in data_manager.champion_lookup.values()]
+    workload = Workload(names, args.mix, args.typo_rate, args.users, args.guilds, args.seed)
+    generator = LoadGenerator(cog, workload)
+
+    monitor = LoopLagMonitor(interval=0.005, window=1_000_000, warn_above=float('inf'))
+    monitor.start()
+    started = time.perf_counter()
+    if args.rate:
+        await generator.open_loop(args.rate, args.duration)
+    else:
+        await generator.closed_loop(args.commands, args.concurrency)
+    seconds = time.perf_counter() - started
+    monitor.stop()
+
+    every = sorted(latency for latencies in generator.latencies.values() for latency in latencies)
+    report = {
+        "mode": f"open loop at {args.rate}/s" if args.rate else f"closed loop x{args.concurrency}",
+        "commands": len(every),
+        "seconds": seconds,
+        "throughput": len(every) / seconds,
+        "latency": {},
+        "loop_lag": monitor.stats(),
+        "shed": dict(cog.command_handler.admission.shed),
+        "errors": generator.errors,
+        "cache": cog.command_handler.responses.stats(),
+        "slow_traces": tracer.written,
+    }
+    for kind, latencies in [("all", every)] + list(generator.latencies.items()):
+        ordered = sorted(latencies)
+        if ordered:
+            report["latency"][kind] = {"count": len(ordered), "p50": percentile(ordered, 0.5),
+                                       "p90": percentile(ordered, 0.9), "p99": percentile(ordered, 0.99),
+                                       "max": ordered[-1]}
+    return report
+
+
+def print_report(report: Dict):
+    print(f"{report['commands']} commands, {report['mode']}, in {report['seconds']:.2f}s: "
+          f"{report['throughput']:.1f} commands/s\n")
+    print(f"{'command':<10}{'count':>7}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for kind, stats in report["latency"].items():
+        print(f"{kind:<10}{stats['count']:>7}{stats['p50'] * 1000:>9.1f}{stats['p90'] * 1000:>9.1f}"
+              f"{stats['p99'] * 1000:>9.1f}{stats['max'] * 1000:>9.1f}")
+    lag = report["loop_lag"]
+    print(f"\nEvent-loop lag: p50 {lag['p50'] * 1000:.1f}ms, p99 {lag['p99'] * 1000:.1f}ms, "
+          f"max {lag['max'] * 1000:.1f}ms")
+    shed = ", ".join(f"{reason} {count}" for reason, count in sorted(report["shed"].items())) or "none"
+    print(f"Turned away: {sum(report['shed'].values())} ({shed}); errors: {report['errors']}")
+    print(f"Response cache: hit ratio {report['cache']['hit_ratio']:.0%}, "
+          f"{report['cache']['saved_seconds']:.2f}s of work saved")
+    if report["slow_traces"]:
+        print(f"Slow traces written: {report['slow_traces']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive MCOCCommands with synthetic commands, no Discord needed")
+    parser.add_argument("--commands", type=int, default=1000, help="commands to send (closed loop)")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients sending at once (closed loop)")
+    parser.add_argument("--rate", type=float, default=0, help="commands per second instead (open loop)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to send for (open loop)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"relative weights of the commands (default {DEFAULT_MIX})")
+    parser.add_argument("--typo-rate", type=float, default=0.3, help="share of names typed with a mistake")
+    parser.add_argument("--users", type=int, default=500, help="distinct users sending the commands")
+    parser.add_argument("--guilds", type=int, default=20, help="servers the users are spread over")
+    parser.add_argument("--no-limits", action="store_true", help="turn off the per-user/guild rate limits")
+    parser.add_argument("--trace-above", type=float, default=0,
+                        help="write commands slower than this many seconds with their spans (default: no tracing)")
+    parser.add_argument("--trace-file", default="slow_traces.jsonl", help="where --trace-above writes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: event-loop lag under a burst of heavy commands
+
+Fires a mix of !pick (30 misspelled names each), !rankup comparisons and
+single-champion lookups concurrently against the shipped database, the way a
+busy bot receives them, while a LoopLagMonitor samples how late the loop
+wakes up. Runs the mix twice: with the CommandHandler's sync methods called
+inside the coroutines (the old handlers) and with the async variants that run
+in the command pool, then once more with the response cache warm. Lag is
+what a heartbeat or another guild's command would have waited.
+"""
+import asyncio
+import random
+import sys
+import time
+
+from cogs.command_handler import CommandHandler
+from data_manager_json import DataManager
+from utils.offload import LoopLagMonitor
+
+PICK_NAMES = 30
+
+
+def misspell(rng, name):
+    """Drop one letter and swap two neighbours, so every lookup misses and falls back to the fuzzy scan"""
+    letters = list(name.lower())
+    if len(letters) > 4:
+        del letters[rng.randrange(len(letters))]
+        index = rng.randrange(len(letters) - 1)
+        letters[index], letters[index + 1] = letters[index + 1], letters[index]
+    return ''.join(letters)
+
+
+def command_mix(names, commands, seed=1):
+    """(kind, argument) for each command: mostly picks, some comparisons and lookups"""
+    rng = random.Random(seed)
+    mix = []
+    for _ in range(commands):
+        roll = rng.random()
+        if roll < 0.5:
+            mix.append(("pick", ", ".join(misspell(rng, name) for name in rng.sample(names, PICK_NAMES))))
+        elif roll < 0.8:
+            mix.append(("compare", ", ".join(misspell(rng, name) for name in rng.sample(names, 3))))
+        else:
+            mix.append(("lookup", misspell(rng, rng.choice(names))))
+    return mix
+
+
+async def run_inline(handler, kind, argument):
+    await asyncio.sleep(0)
+    if kind == "pick":
+        return handler.pick_champions_for_battlegrounds(5, argument)
+    if kind == "compare":
+        return handler.compare_champions(argument)
+    return handler.get_champion_rankup_info(argument)
+
+
+async def run_offloaded(handler, kind, argument):
+    if kind == "pick":
+        return await handler.pick_champions_for_battlegrounds_async(5, argument)
+    if kind == "compare":
+        return await handler.compare_champions_async(argument)
+    return await handler.get_champion_rankup_info_async(argument)
+
+
+async def burst(handler, mix, run):
+    monitor = LoopLagMonitor(interval=0.005, window=100000, warn_above=float('inf'))
+    monitor.start()
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run(handler, kind, argument) for kind, argument in mix))
+    seconds = time.perf_counter() - started
+    await asyncio.sleep(0.05)
+    monitor.stop()
+    return results, seconds, monitor.stats()
+
+
+def main(commands):
+    manager = DataManager()
+    handler = CommandHandler(manager)
+    # Measure the work, not admission control: let the whole burst into the bulk lane
+    handler.admission.max_bulk_queue = commands
+    names = [champion.name for champion in manager.champion_lookup.values()]
+    mix = command_mix(names, commands)
+    print(f"{commands} commands ({sum(kind == 'pick' for kind, _ in mix)} picks of {PICK_NAMES} misspelled names) "
+          f"against {len(names)} champions\n")
+    print(f"{'handlers':<12}{'total s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+    outputs = {}
+    for label, run in (("inline", run_inline), ("offloaded", run_offloaded), ("cached", run_offloaded)):
+        outputs[label], seconds, lag = asyncio.run(burst(handler, mix, run))
+        print(f"{label:<12}{seconds:>10.3f}{lag['p50'] * 1000:>12.1f}{lag['p99'] * 1000:>12.1f}"
+              f"{lag['max'] * 1000:>12.1f}")
+    stats = handler.responses.stats()
+    print(f"\nResponse cache: {stats['entries']} entries, hit ratio {stats['hit_ratio']:.0%}, "
+          f"{stats['saved_seconds']:.3f}s of work saved")
+    if not outputs["inline"] == outputs["offloaded"] == outputs["cached"]:
+        print("\nOffloaded or cached handlers gave different replies!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 60))
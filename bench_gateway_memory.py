@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory the gateway state takes per gateway mode, by guild count
+
+Builds the bot's discord.py client in each GATEWAY_MODE (utils/gateway.py)
+and replays, without a Discord connection, what the gateway would send a bot
+in that many guilds with those intents: a GUILD_CREATE per guild (channels,
+roles, emojis, the members in voice and their voice states), then each
+guild's traffic. Every mode gets the same commands; what differs is what
+Discord sends along with them:
+
+  full          every message in the guild's channels, typing and reaction
+                events, voice state updates; the commands arrive as messages
+  lean          every message, nothing else; the commands arrive as messages
+  interactions  no guilds and no messages; the commands arrive as interactions
+
+Each run is a fresh forked process. The state it keeps is measured as the
+growth of the process's Rss after a garbage collection, with what
+discord.py has cached (guilds, members, users, messages) and the CPU time it
+spent parsing the events.
+
+    python bench_gateway_memory.py [guild counts...]   (default 100 500 2000)
+
+Linux only (fork and /proc).
+"""
+import asyncio
+import gc
+import logging
+import multiprocessing
+import random
+import sys
+import time
+
+from discord.ext import commands
+
+from utils.gateway import GATEWAY_MODES, gateway_intents, gateway_options
+
+# Per simulated guild
+CHANNELS = 16
+ROLES = 12
+EMOJIS = 15
+MEMBERS = 60        # who talks in it
+IN_VOICE = 3
+MESSAGES = 40       # chatter the bot can read but doesn't answer
+COMMANDS = 4
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+BOT_ID = 1
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class Ids:
+    """Unique snowflakes"""
+
+    def __init__(self):
+        self.next_id = 10 ** 17
+
+    def __call__(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+
+def user(user_id: int) -> dict:
+    return {"id": str(user_id), "username": f"user{user_id % 100000}", "discriminator": "0", "avatar": None,
+            "global_name": None}
+
+
+def member(user_id: int, roles) -> dict:
+    return {"user": user(user_id), "roles": [str(role) for role in roles], "joined_at": TIMESTAMP,
+            "deaf": False, "mute": False, "flags": 0}
+
+
+class GuildSimulator:
+    """Gateway payloads for one simulated guild"""
+
+    def __init__(self, ids: Ids, rng: random.Random):
+        self.rng = rng
+        self.id = ids()
+        self.roles = [self.id] + [ids() for _ in range(ROLES - 1)]
+        self.text = [ids() for _ in range(CHANNELS - 4)]
+        self.voice = [ids() for _ in range(3)]
+        self.category = ids()
+        self.members = [ids() for _ in range(MEMBERS)]
+        self.in_voice = self.members[:IN_VOICE]
+        self.ids = ids
+
+    def channel(self, channel_id: int, kind: int, position: int) -> dict:
+        channel = {"id": str(channel_id), "type": kind, "name": f"channel-{position}", "position": position,
+                   "guild_id": str(self.id), "nsfw": False, "topic": None, "rate_limit_per_user": 0,
+                   "permission_overwrites": [{"id": str(self.roles[1]), "type": 0, "allow": "1024", "deny": "0"}]}
+        if kind != 4:
+            channel["parent_id"] = str(self.category)
+        if kind == 2:
+            channel.update(bitrate=64000, user_limit=0, rtc_region=None)
+        return channel
+
+    def create(self, voice_states: bool) -> dict:
+        """GUILD_CREATE as sent without the members intent: the bot, plus whoever is in voice"""
+        channels = [self.channel(self.category, 4, 0)]
+        channels += [self.channel(channel_id, 0, i) for i, channel_id in enumerate(self.text, 1)]
+        channels += [self.channel(channel_id, 2, i) for i, channel_id in enumerate(self.voice, 1)]
+        roles = [{"id": str(role), "name": f"role-{i}", "permissions": "104324673", "position": i, "color": 0,
+                  "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+                 for i, role in enumerate(self.roles)]
+        emojis = [{"id": str(self.ids()), "name": f"emoji_{i}", "roles": [], "require_colons": True,
+                   "managed": False, "animated": False, "available": True} for i in range(EMOJIS)]
+        data = {"id": str(self.id), "name": f"guild {self.id}", "owner_id": str(self.members[0]),
+                "member_count": MEMBERS * 5, "large": False, "features": [], "roles": roles, "emojis": emojis,
+                "stickers": [], "channels": channels, "threads": [], "presences": [], "unavailable": False,
+                "members": [member(BOT_ID, [])], "voice_states": [], "premium_tier": 0,
+                "verification_level": 1, "default_message_notifications": 1, "explicit_content_filter": 0,
+                "mfa_level": 0, "system_channel_flags": 0, "preferred_locale": "en-US", "nsfw_level": 0}
+        if voice_states:
+            data["members"] += [member(user_id, self.roles[1:2]) for user_id in self.in_voice]
+            data["voice_states"] = [self.voice_state(user_id) for user_id in self.in_voice]
+        return data
+
+    def voice_state(self, user_id: int) -> dict:
+        return {"user_id": str(user_id), "channel_id": str(self.voice[0]), "session_id": "x", "deaf": False,
+                "mute": False, "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False,
+                "request_to_speak_timestamp": None, "guild_id": str(self.id)}
+
+    def message(self, content: str) -> dict:
+        author = self.rng.choice(self.members)
+        return {"id": str(self.ids()), "channel_id": str(self.rng.choice(self.text)), "guild_id": str(self.id),
+                "author": user(author), "member": {k: v for k, v in member(author, self.roles[1:2]).items()
+                                                   if k != "user"},
+                "content": content, "timestamp": TIMESTAMP, "edited_timestamp": None, "tts": False,
+                "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+                "pinned": False, "type": 0, "flags": 0}
+
+    def typing(self, message: dict) -> dict:
+        return {"channel_id": message["channel_id"], "guild_id": str(self.id), "user_id": message["author"]["id"],
+                "timestamp": 1700000000, "member": member(int(message["author"]["id"]), self.roles[1:2])}
+
+    def reaction(self, message: dict) -> dict:
+        reactor = self.rng.choice(self.members)
+        return {"user_id": str(reactor), "channel_id": message["channel_id"], "message_id": message["id"],
+                "guild_id": str(self.id), "emoji": {"id": None, "name": "\N{THUMBS UP SIGN}"}, "burst": False,
+                "member": member(reactor, self.roles[1:2]), "type": 0}
+
+    def interaction(self) -> dict:
+        invoker = self.rng.choice(self.members)
+        return {"id": str(self.ids()), "application_id": str(BOT_ID), "type": 2, "token": "x" * 150, "version": 1,
+                "guild_id": str(self.id), "channel_id": str(self.rng.choice(self.text)),
+                "member": {**member(invoker, self.roles[1:2]), "permissions": "104324673"},
+                "locale": "en-US", "guild_locale": "en-US", "app_permissions": "104324673",
+                "data": {"id": str(BOT_ID + 1), "name": "rankup", "type": 1,
+                         "options": [{"name": "champions", "type": 3, "value": "korg"}]}}
+
+    def traffic(self, intents):
+        """(event, payload) the gateway sends for this guild's chatter and commands"""
+        if intents.guild_messages:
+            for index in range(MESSAGES + COMMANDS):
+                message = self.message("!rankup korg" if index < COMMANDS else "gg, see you in the war")
+                yield "MESSAGE_CREATE", message
+                if intents.guild_typing:
+                    yield "TYPING_START", self.typing(message)
+                if intents.guild_reactions and index % 2:
+                    yield "MESSAGE_REACTION_ADD", self.reaction(message)
+        else:
+            for _ in range(COMMANDS):
+                yield "INTERACTION_CREATE", self.interaction()
+        if intents.voice_states:
+            # Someone new joins voice, someone else leaves
+            joined = self.rng.choice(self.members[IN_VOICE:])
+            yield "VOICE_STATE_UPDATE", {**self.voice_state(joined), "member": member(joined, self.roles[1:2])}
+
+
+async def replay(mode: str, guilds: int) -> dict:
+    intents = gateway_intents(mode)
+    bot = commands.Bot(command_prefix="!", help_command=None, **gateway_options(mode))
+    state = bot._connection
+    # What login does first: bind the client to this loop, so events can be dispatched
+    await bot._async_setup_hook()
+    gc.collect()
+    before = rss_kb()
+    state.parsers["READY"]({"v": 10, "user": {**user(BOT_ID), "bot": True}, "guilds": [], "session_id": "x",
+                            "resume_gateway_url": "wss://localhost", "application": {"id": str(BOT_ID), "flags": 0}})
+    # READY waits for the guilds to stream in before dispatching on_ready; this replay doesn't need it
+    del state._ready_state
+    state._ready_task.cancel()
+
+    ids, rng = Ids(), random.Random(1)
+    simulated = [GuildSimulator(ids, rng) for _ in range(guilds)]
+    events = 0
+    started = time.process_time()
+    if intents.guilds:
+        for guild in simulated:
+            state.parsers["GUILD_CREATE"](guild.create(intents.voice_states))
+            events += 1
+    for guild in simulated:
+        for event, payload in guild.traffic(intents):
+            state.parsers[event](payload)
+            events += 1
+        # Let the listeners dispatched for these events run
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    parse_seconds = time.process_time() - started
+    del simulated, guild, payload
+    gc.collect()
+    members = sum(len(guild.members) for guild in bot.guilds)
+    return {"mode": mode, "guilds": guilds, "kb": rss_kb() - before, "events": events, "seconds": parse_seconds,
+            "cached_guilds": len(bot.guilds), "members": members, "users": len(bot.users),
+            "messages": len(bot.cached_messages)}
+
+
+def measure(mode, guilds, results):
+    logging.disable(logging.CRITICAL)
+    try:
+        results.put(asyncio.run(replay(mode, guilds)))
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def main(guild_counts):
+    context = multiprocessing.get_context("fork")
+    print(f"Per guild: {CHANNELS} channels, {ROLES} roles, {EMOJIS} emojis, {IN_VOICE} in voice, "
+          f"{MESSAGES} chat messages and {COMMANDS} commands\n")
+    print(f"{'mode':<14}{'guilds':>7}{'state MB':>10}{'kB/guild':>10}{'events':>9}{'parse s':>9}"
+          f"{'members':>9}{'users':>8}{'messages':>10}")
+    for guilds in guild_counts:
+        for mode in GATEWAY_MODES:
+            results = context.Queue()
+            process = context.Process(target=measure, args=(mode, guilds, results))
+            process.start()
+            result = results.get()
+            process.join()
+            if "error" in result:
+                print(f"{mode:<14}{guilds:>7}  failed: {result['error']}")
+                continue
+            print(f"{mode:<14}{guilds:>7}{result['kb'] / 1024:>10.1f}{result['kb'] / guilds:>10.1f}"
+                  f"{result['events']:>9}{result['seconds']:>9.2f}{result['members']:>9}{result['users']:>8}"
+                  f"{result['messages']:>10}")
+        print()
+    print("state MB: Rss growth from the client before READY to after the last event and a collection")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main([int(count) for count in sys.argv[1:]] or [100, 500, 2000]))
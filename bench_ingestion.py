@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: whole-sheet CSV parsing vs the streaming ingestion pipeline
+
+Builds large synthetic sheets in the BGs / ranking layouts, parses them both
+ways and reports peak traced memory and wall time. Output of both paths must
+be identical.
+"""
+import csv
+import hashlib
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+from utils.cell_tokenizer import tokenize_cell
+from utils.sheet_layout import sheet_layout
+from utils.sheet_stream import DEFAULT_CHUNK_SIZE, iter_csv_rows
+
+CLASSES = ['Mystic', 'Science', 'Skill', 'Mutant', 'Tech', 'Cosmic']
+SYMBOLS = ['🌟', '🚀', '💎', '🌹', '💾', '🎲', '🔥']
+
+
+def make_bg_sheet(rows: int, seed: int = 1) -> bytes:
+    """BGs layout: class headers in row 0, "Name - 9🔥" cells from row 3"""
+    rng = random.Random(seed)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\r\n')
+    writer.writerow([''] + CLASSES)
+    writer.writerow([''] + ['Dual Threat'] * len(CLASSES))
+    writer.writerow([''] + ['Tier Above All'] * len(CLASSES))
+    for row_idx in range(3, rows):
+        writer.writerow([''] + [
+            f"Champion {row_idx}-{col} - {rng.choice(['10', '9', '7', '5'])}{rng.choice(SYMBOLS)}"
+            if rng.random() < 0.8 else '' for col in range(len(CLASSES))
+        ])
+    return buf.getvalue().encode('utf-8')
+
+
+def make_rank_sheet(rows: int, seed: int = 2) -> bytes:
+    """Ranking layout: class names in column A, tier headers and champions in B onward"""
+    rng = random.Random(seed)
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\r\n')
+    tiers = ['Tier Above All', 'Scorching', 'Super Hot', 'Hot', 'Mild']
+    writer.writerow(['Class'] + tiers)
+    writer.writerow([''] + tiers)
+    per_class = max(1, rows // len(CLASSES))
+    for class_name in CLASSES:
+        writer.writerow([class_name] + tiers)
+        for row_idx in range(per_class):
+            writer.writerow([''] + [
+                f"{class_name} Champion {row_idx}-{col}{rng.choice(SYMBOLS)}"
+                if rng.random() < 0.8 else '' for col in range(len(tiers))
+            ])
+    return buf.getvalue().encode('utf-8')
+
+
+def chunked(data: bytes, size: int = DEFAULT_CHUNK_SIZE):
+    """Hand out the body the way response.iter_content does"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def whole_sheet_rows(data: bytes):
+    """The old approach: decode everything, then materialize every row"""
+    return list(csv.reader(io.StringIO(data.decode('utf-8'))))
+
+
+def parse_bg(rows):
+    """Digest of every BG cell and its tokens; cells are hashed, not kept, so only ingestion is measured"""
+    layout = sheet_layout("vega_battlegrounds")
+    digest = hashlib.sha256()
+    for cell in layout.cells(rows, layout.spec_section_starts):
+        tokens = tokenize_cell(cell.value, rated=True)
+        digest.update(repr((cell.row, cell.col, cell.section, tokens)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def parse_rank(rows):
+    """Digest of every ranking cell, in the column-major order rankings are assigned"""
+    digest = hashlib.sha256()
+    for class_name, cells in sheet_layout("general_rankings").blocks(rows):
+        for cell in cells:
+            digest.update(repr((class_name, cell.row, cell.col, cell.value, cell.tier)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def measure(func, *args):
+    """Run func and return (result, peak bytes, seconds)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main(sizes):
+    print(f"{'sheet':<8}{'rows':>8}{'MB':>8}{'whole peak':>14}{'stream peak':>14}{'whole s':>10}{'stream s':>10}")
+    for rows in sizes:
+        for label, data, parse in (('bg', make_bg_sheet(rows), parse_bg), ('ranking', make_rank_sheet(rows), parse_rank)):
+            whole, whole_peak, whole_time = measure(lambda: parse(whole_sheet_rows(data)))
+            streamed, stream_peak, stream_time = measure(lambda: parse(iter_csv_rows(chunked(data))))
+            if whole != streamed:
+                raise SystemExit(f"Output mismatch for {label} sheet with {rows} rows")
+            print(f"{label:<8}{rows:>8}{len(data) / 1e6:>8.1f}"
+                  f"{whole_peak / 1e6:>12.1f}MB{stream_peak / 1e6:>12.1f}MB"
+                  f"{whole_time:>10.2f}{stream_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
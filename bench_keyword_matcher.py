@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nested substring loops vs the compiled Aho-Corasick keyword matcher
+
+Runs the three keyword filters (ranking-sheet header cells, non-champion names
+and champion list exclusions) over large synthetic inputs, first with the real
+keyword lists and then with the lists padded out to a few hundred keywords.
+Both approaches must classify every string the same way.
+"""
+import random
+import string
+import sys
+import time
+
+from utils.keyword_matcher import KeywordMatcher, load_pattern_lists
+
+
+def naive_is_header(cell, keywords):
+    """The original header check: exact match or a keyword with at most 3 extra characters"""
+    cell_stripped = cell.lower().strip()
+    for skip_text in keywords:
+        if skip_text == cell_stripped:
+            return True
+        elif len(cell_stripped) <= len(skip_text) + 3 and skip_text in cell_stripped:
+            if abs(len(cell_stripped) - len(skip_text)) <= 3:
+                return True
+    return False
+
+
+def matcher_is_header(cell, matcher):
+    cell_stripped = cell.lower().strip()
+    longest_keyword = matcher.longest_match(cell_stripped)
+    return bool(longest_keyword) and longest_keyword >= len(cell_stripped) - 3
+
+
+def naive_contains(text, keywords):
+    for keyword in keywords:
+        if keyword in text:
+            return True
+    return False
+
+
+def random_words(rng, count, min_len=4, max_len=10):
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_len, max_len)))
+            for _ in range(count)]
+
+
+def make_inputs(rng, keywords, count, length):
+    """Strings of roughly `length` characters; about one in ten contains a keyword"""
+    inputs = []
+    for _ in range(count):
+        text = ' '.join(random_words(rng, max(1, length // 7)))[:length]
+        if rng.random() < 0.1:
+            text = rng.choice(keywords) if rng.random() < 0.5 else text + ' ' + rng.choice(keywords)
+        inputs.append(text)
+    return inputs
+
+
+def timed(func, inputs):
+    started = time.perf_counter()
+    results = [func(text) for text in inputs]
+    return results, time.perf_counter() - started
+
+
+def main(count, length, padded_size):
+    rng = random.Random(7)
+    patterns = load_pattern_lists()
+    sites = [
+        ('header cells', patterns['header_keywords'], True),
+        ('non-champion names', patterns['non_champion_keywords'], False),
+        ('champion list exclusions', patterns['champion_list_exclusions'], False),
+    ]
+
+    print(f"{count} strings of ~{length} chars")
+    print(f"{'site':<28}{'keywords':>9}{'naive s':>10}{'matcher s':>11}{'speedup':>9}")
+    for label, keywords, is_header in sites:
+        for keyword_list in (keywords, keywords + random_words(rng, padded_size - len(keywords))):
+            inputs = make_inputs(rng, keyword_list, count, length)
+            matcher = KeywordMatcher(keyword_list)
+            if is_header:
+                naive, naive_time = timed(lambda text: naive_is_header(text, keyword_list), inputs)
+                fast, fast_time = timed(lambda text: matcher_is_header(text, matcher), inputs)
+            else:
+                naive, naive_time = timed(lambda text: naive_contains(text, keyword_list), inputs)
+                fast, fast_time = timed(matcher.contains_any, inputs)
+            if naive != fast:
+                raise SystemExit(f"Classification mismatch for {label}")
+            print(f"{label:<28}{len(keyword_list):>9}{naive_time:>10.3f}{fast_time:>11.3f}"
+                  f"{naive_time / fast_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [100000, 40, 500][len(args):]))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query API throughput and latency, no Discord involved
+
+Starts the JSON query API (utils/query_api.py) on the shipped database in a
+forked server process and drives it from this one over loopback with
+concurrent clients. The queries are a mix of /champion, /compare, /pick and
+/top with misspelled names, the way the bot's commands arrive:
+
+  keep-alive          each client reuses one connection, a pool of repeating
+                      queries (the response cache answers most of them)
+  connection/request  the same, with a new connection per query
+  batched POST        the same queries, BATCH per POST /batch body
+  keep-alive, unique  every query distinct, so every one is computed
+
+Reports queries per second and p50/p99 latency per HTTP request.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import sys
+import time
+from urllib.parse import quote
+
+from bench_command_loop import misspell
+from cogs.command_handler import CommandHandler
+from data_manager_json import DataManager
+from utils.admission import AdmissionController
+from utils.query_api import QueryServer
+
+CLIENTS = 16
+DISTINCT = 300
+BATCH = 20
+CLASSES = ["Mystic", "Cosmic", "Science", "Mutant", "Tech", "Skill"]
+
+
+def query_mix(names, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            queries.append(f"/champion?name={quote(misspell(rng, rng.choice(names)))}")
+        elif roll < 0.7:
+            picked = ",".join(quote(misspell(rng, name)) for name in rng.sample(names, 3))
+            queries.append(f"/compare?names={picked}")
+        elif roll < 0.9:
+            picked = ",".join(quote(misspell(rng, name)) for name in rng.sample(names, 10))
+            queries.append(f"/pick?n=3&names={picked}")
+        else:
+            queries.append(f"/top?class={rng.choice(CLASSES)}&limit=10")
+    return queries
+
+
+def serve(conn):
+    """The server process: the query API on a free port, sent back through conn"""
+    async def run():
+        handler = CommandHandler(DataManager())
+        # Measure the serving, not admission control
+        handler.admission.max_bulk_queue = 1 << 30
+        server = QueryServer(0, handler, admission=AdmissionController(user_rate=1e9, user_burst=1e9))
+        await server.start()
+        conn.send(server.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+async def request(reader, writer, method, target, body=b"", close=False):
+    connection = "Connection: close\r\n" if close else ""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"{connection}\r\n".encode("latin-1") + body)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length"))
+    payload = await reader.readexactly(length)
+    if not head.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(f"{target}: {head.splitlines()[0]}")
+    return payload
+
+
+async def drive(port, jobs, run_job):
+    """Run jobs over CLIENTS concurrent clients; (seconds, sorted per-job latencies)"""
+    queue = list(reversed(jobs))
+    latencies = []
+
+    async def client():
+        connection = None
+        while queue:
+            job = queue.pop()
+            started = time.perf_counter()
+            connection = await run_job(port, job, connection)
+            latencies.append(time.perf_counter() - started)
+        if connection:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CLIENTS)))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+async def keep_alive(port, target, connection):
+    if connection is None:
+        connection = await asyncio.open_connection("127.0.0.1", port)
+    await request(*connection, "GET", target)
+    return connection
+
+
+async def per_request(port, target, connection):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await request(reader, writer, "GET", target, close=True)
+    writer.close()
+    return None
+
+
+async def batched(port, targets, connection):
+    if connection is None:
+        connection = await asyncio.open_connection("127.0.0.1", port)
+    await request(*connection, "POST", "/batch", json.dumps(targets).encode())
+    return connection
+
+
+def main(queries):
+    logging.disable(logging.WARNING)
+    names = [champion.name for champion in DataManager().champion_lookup.values()]
+    pool = query_mix(names, DISTINCT, seed=1)
+    repeating = [pool[index % DISTINCT] for index in range(queries)]
+    unique = query_mix(names, queries, seed=2)
+
+    ours, theirs = multiprocessing.Pipe()
+    server = multiprocessing.get_context("fork").Process(target=serve, args=(theirs,), daemon=True)
+    server.start()
+    port = ours.recv()
+    print(f"{queries} queries per run over {CLIENTS} clients, {len(names)} champions\n")
+    print(f"{'run':<22}{'queries/s':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    try:
+        # Warm the response cache with the repeating pool, as a running bot's would be
+        asyncio.run(drive(port, pool, keep_alive))
+        runs = (("keep-alive", repeating, keep_alive, 1),
+                ("connection/request", repeating, per_request, 1),
+                (f"batched POST x{BATCH}", [repeating[start:start + BATCH] for start in range(0, queries, BATCH)],
+                 batched, BATCH),
+                ("keep-alive, unique", unique, keep_alive, 1))
+        for label, jobs, run_job, per_job in runs:
+            seconds, latencies = asyncio.run(drive(port, jobs, run_job))
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            print(f"{label:<22}{len(jobs) * per_job / seconds:>11.0f}{p50:>9.1f}{p99:>9.1f}")
+    finally:
+        server.terminate()
+    print("\nLatency is per HTTP request (a whole batch for batched POST)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bot startup and first-query latency with and without the search index sidecar
+
+Loads the database with data_manager_json.DataManager, once with the sidecar
+build_database.py writes next to it and once without (the index is then built
+in memory). Runs on the shipped database and on larger synthetic ones. Both
+runs must give the same answers.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from data_manager_json import DataManager
+from utils.search_index import build_search_index, sidecar_path, write_search_index
+
+SYLLABLES = ['ka', 'ro', 'mi', 'zen', 'tor', 'vex', 'la', 'qui', 'dra', 'sho', 'ny', 'gar']
+TIERS = ['Above All', 'Scorching', 'Super Hot', 'Hot', 'Mild', 'Information']
+
+
+def make_database(count: int, seed: int = 3) -> dict:
+    """A database shaped like champions_database.json with made-up champions"""
+    rng = random.Random(seed)
+    database = {}
+    while len(database) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title()
+                 for _ in range(rng.randint(1, 3))]
+        name = ' '.join(words)
+        tier = rng.choice(TIERS)
+        rank = rng.randint(1, 60)
+        rating = rng.choice([None, 5, 7, 9, 10])
+        sources = {"rankings": {"class": "Tech", "tier": tier, "rank": rank}}
+        if rating is not None:
+            sources["battlegrounds"] = {"class": "Tech", "rating": rating, "type": "Attacker"}
+        database[name.lower()] = {
+            "name": name, "class": "Tech", "rank": rank, "tier": tier, "ranking_display": f"Tech #{rank}",
+            "battlegrounds_rating": rating, "battlegrounds_type": "Attacker" if rating else None,
+            "other_symbols": [], "source": "combined", "sources": sources,
+        }
+    return database
+
+
+def measure(db_path: str, queries):
+    """(startup seconds, first query seconds, answers, whether the sidecar was used)"""
+    started = time.perf_counter()
+    manager = DataManager(db_file=db_path)
+    startup = time.perf_counter() - started
+
+    started = time.perf_counter()
+    manager.get_champion_by_name(queries[0])
+    manager.get_top_champions_by_tier('blended', 10)
+    first_query = time.perf_counter() - started
+
+    answers = [[champion.name for champion in manager.get_champion_by_name(query)] for query in queries]
+    answers.append([champion.name for champion in manager.get_top_champions_by_tier('blended', 50)])
+    return startup, first_query, answers, manager.sidecar_used
+
+
+def main(sizes):
+    logging.disable(logging.WARNING)
+    rng = random.Random(9)
+    print(f"{'database':<12}{'champions':>10}{'sidecar KB':>12}{'startup s':>11}{'w/o s':>9}"
+          f"{'1st query s':>13}{'w/o s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        databases = [('shipped', 'champions_database.json')]
+        for size in sizes:
+            path = os.path.join(tmp, f"synthetic_{size}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(make_database(size), f, indent=2, ensure_ascii=False)
+            databases.append(('synthetic', path))
+
+        for label, db_path in databases:
+            with open(db_path, 'rb') as f:
+                raw = f.read()
+            champions = json.loads(raw)
+            names = [champion['name'] for champion in champions.values()]
+            queries = [rng.choice(names)[1:] for _ in range(5)] + [rng.choice(names).split()[-1] for _ in range(5)]
+
+            # Sidecar next to a copy of the database so the shipped one isn't touched
+            copy_path = os.path.join(tmp, f"{label}_{len(champions)}.json")
+            with open(copy_path, 'wb') as f:
+                f.write(raw)
+            write_search_index(build_search_index(champions, hashlib.sha256(raw).hexdigest()), sidecar_path(copy_path))
+            with_startup, with_query, with_answers, used = measure(copy_path, queries)
+            os.remove(sidecar_path(copy_path))
+            without_startup, without_query, without_answers, _ = measure(copy_path, queries)
+
+            if not used:
+                raise SystemExit(f"Sidecar was not used for {label} database")
+            if with_answers != without_answers:
+                raise SystemExit(f"Answers differ with and without the sidecar for {label} database")
+            sidecar_kb = len(json.dumps(build_search_index(champions, ''))) / 1024
+            print(f"{label:<12}{len(champions):>10}{sidecar_kb:>12.0f}{with_startup:>11.3f}{without_startup:>9.3f}"
+                  f"{with_query:>13.3f}{without_query:>9.3f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [2000, 10000])
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory per shard process, private catalogs vs. one shared catalog
+
+Starts N worker processes the way shard_launcher.py does and has each look up
+every champion (plus a garbage collection, as a running bot does), then reads
+/proc/<pid>/smaps_rollup of the launcher and every worker while all are alive:
+Pss (the process's fair share of every page it maps) and Private_Dirty (pages
+nobody else shares). Three layouts:
+
+  load per process   every worker loads champions_database.json itself
+                     (what N copies of bot_main.py would do)
+  fork after load    the launcher loads it once and forks the workers
+  + gc.freeze        the same, with the catalog frozen out of the collector
+                     first, as shard_launcher.py does
+
+Linux only (fork and /proc).
+"""
+import gc
+import logging
+import multiprocessing
+import os
+import sys
+
+from data_manager_json import DataManager
+
+FIELDS = ("Rss", "Pss", "Private_Dirty")
+
+
+def memory_kb(pid):
+    """{field: kB} from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def work(data_manager):
+    """What serving commands does to the catalog: read every champion, then collect"""
+    for champion in list(data_manager.champion_lookup.values()):
+        data_manager.get_champion_by_name(champion.name)
+        data_manager.get_champion_by_name(champion.name[:-1].lower())
+    gc.collect()
+
+
+def worker(data_manager, ready, measured):
+    if data_manager is None:
+        data_manager = DataManager()
+    work(data_manager)
+    ready.put(os.getpid())
+    measured.wait()
+
+
+def run(layout, workers):
+    context = multiprocessing.get_context("fork")
+    data_manager = None
+    if layout != "load per process":
+        data_manager = DataManager()
+        gc.collect()
+        if layout == "+ gc.freeze":
+            gc.freeze()
+    ready, measured = context.Queue(), context.Event()
+    processes = [context.Process(target=worker, args=(data_manager, ready, measured)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    pids = [ready.get() for _ in processes]
+    launcher = memory_kb(os.getpid())
+    shards = [memory_kb(pid) for pid in pids]
+    measured.set()
+    for process in processes:
+        process.join()
+    if layout == "+ gc.freeze":
+        gc.unfreeze()
+    del data_manager
+    gc.collect()
+    return launcher, shards
+
+
+def main(workers):
+    logging.disable(logging.WARNING)
+    print(f"{workers} shard processes, {len(DataManager().champion_lookup)} champions\n")
+    print(f"{'layout':<20}{'Pss/shard MB':>14}{'dirty/shard MB':>16}{'Rss/shard MB':>14}{'total Pss MB':>14}")
+    for layout in ("load per process", "fork after load", "+ gc.freeze"):
+        launcher, shards = run(layout, workers)
+        pss = sum(shard["Pss"] for shard in shards) / workers / 1024
+        dirty = sum(shard["Private_Dirty"] for shard in shards) / workers / 1024
+        rss = sum(shard["Rss"] for shard in shards) / workers / 1024
+        total = (launcher["Pss"] + sum(shard["Pss"] for shard in shards)) / 1024
+        print(f"{layout:<20}{pss:>14.1f}{dirty:>16.1f}{rss:>14.1f}{total:>14.1f}")
+    print("\ntotal Pss includes the launcher process")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4))
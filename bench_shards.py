@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full vs. partial loads of the champion database
+
+Writes the per-class shards build_database.py --shards produces, then compares
+loading the whole pretty-printed champions_database.json with loading every
+shard, one class's shard, and a single champion read by its byte offset.
+Reports wall time and peak Python memory (tracemalloc) of each load, on the
+shipped database and on larger synthetic ones made by repeating it.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils.shards import ShardedDatabase, write_shards
+
+REPEATS = 5
+
+
+def scaled_database(champions_data: dict, factor: int) -> dict:
+    """The database repeated factor times under new names, classes kept"""
+    scaled = {}
+    for copy in range(factor):
+        for name_key, champion in champions_data.items():
+            suffix = f" {copy}" if copy else ""
+            scaled[name_key + suffix] = {**champion, "name": champion["name"] + suffix}
+    return scaled
+
+
+def measure(load):
+    """(best seconds over REPEATS runs, peak MB of one run)"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        load()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def full_load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(factors):
+    with open('champions_database.json', 'r', encoding='utf-8') as f:
+        shipped = json.load(f)
+
+    print(f"{'champions':>10}  {'load':<22}{'seconds':>10}{'peak MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in factors:
+            champions_data = scaled_database(shipped, factor)
+            db_path = os.path.join(tmp, f"db_{factor}.json")
+            with open(db_path, 'w', encoding='utf-8') as f:
+                json.dump(champions_data, f, indent=2, ensure_ascii=False)
+            directory = os.path.join(tmp, f"db_{factor}.shards")
+            write_shards(champions_data, None, directory)
+
+            sharded = ShardedDatabase(directory)
+            if sharded.champions() != champions_data:
+                raise SystemExit("Shards don't add up to the full database")
+            one_class = sharded.classes[0]
+            some_champion = next(iter(sharded.shards[one_class]))
+            lazy = ShardedDatabase(directory, classes=())
+
+            loads = [
+                ("full database", lambda: full_load(db_path)),
+                ("all shards", lambda: ShardedDatabase(directory).champions()),
+                (f"one class ({one_class})", lambda: ShardedDatabase(directory, [one_class]).champions()),
+                ("one champion", lambda: lazy.champion(some_champion)),
+            ]
+            for label, load in loads:
+                seconds, peak = measure(load)
+                print(f"{len(champions_data):>10}  {label:<22}{seconds:>10.4f}{peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 50])
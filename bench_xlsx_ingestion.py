@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming CSV exports vs streaming the XLSX workbook export
+
+Writes large synthetic BGs / ranking sheets to disk both as a CSV export (one
+file per tab) and as a workbook with the sheet plus extra tabs (one file for
+all of them), then parses the sheet tab both ways and reports peak traced
+memory and wall time. Output of both paths must be identical.
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+
+import openpyxl
+
+from bench_ingestion import make_bg_sheet, make_rank_sheet, measure, parse_bg, parse_rank
+from utils.sheet_stream import iter_csv_rows, iter_file_chunks, iter_xlsx_rows
+
+# Tabs besides the sheet being parsed; the CSV path would need one more download for each
+EXTRA_TABS = ["Notes", "Changelog"]
+
+
+def write_workbook(path, rows):
+    """Save rows as the first tab of a workbook, the way the spreadsheet export lays it out"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Sheet1"
+    for row in rows:
+        worksheet.append([value if value else None for value in row])
+    for title in EXTRA_TABS:
+        workbook.create_sheet(title).append([f"{title} tab"])
+    workbook.save(path)
+
+
+def main(sizes):
+    print(f"{'sheet':<8}{'rows':>8}{'csv MB':>8}{'xlsx MB':>9}{'csv peak':>12}{'xlsx peak':>12}"
+          f"{'csv s':>8}{'xlsx s':>8}{'downloads for all tabs':>24}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            for label, data, parse in (('bg', make_bg_sheet(rows), parse_bg), ('ranking', make_rank_sheet(rows), parse_rank)):
+                csv_path = os.path.join(directory, f"{label}.csv")
+                xlsx_path = os.path.join(directory, f"{label}.xlsx")
+                with open(csv_path, 'wb') as f:
+                    f.write(data)
+                write_workbook(xlsx_path, csv.reader(io.StringIO(data.decode('utf-8'))))
+
+                from_csv, csv_peak, csv_time = measure(lambda: parse(iter_csv_rows(iter_file_chunks(csv_path))))
+                from_xlsx, xlsx_peak, xlsx_time = measure(lambda: parse(iter_xlsx_rows(xlsx_path)))
+                if from_csv != from_xlsx:
+                    raise SystemExit(f"Output mismatch for {label} sheet with {rows} rows")
+                print(f"{label:<8}{rows:>8}{os.path.getsize(csv_path) / 1e6:>8.1f}{os.path.getsize(xlsx_path) / 1e6:>9.1f}"
+                      f"{csv_peak / 1e6:>10.1f}MB{xlsx_peak / 1e6:>10.1f}MB"
+                      f"{csv_time:>8.2f}{xlsx_time:>8.2f}{f'csv {1 + len(EXTRA_TABS)}, xlsx 1':>24}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -1,9 +1,20 @@
+import asyncio
 import os
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+from data_manager import DataManager as LiveSheetDataManager
 from data_manager_json import DataManager
 from cogs.command_handler import MCOCCommands
+from cogs.refresh import RefreshCog
+from config import AUTO_REFRESH_INTERVAL_HOURS
+from utils.gateway import FULL, gateway_options, reads_messages
+from utils.metrics import MetricsServer, watch_data_manager
+from utils.offload import BULK, LoopLagMonitor, run_blocking
+from utils.query_api import QueryServer
+from utils.refresh import RefreshScheduler
+from utils.startup import StartupTimer
+from utils.tracing import SLOW_TRACE_FILE, SLOW_TRACE_SECONDS, tracer
 import logging
 
 # Setup logging
@@ -15,62 +26,200 @@ load_dotenv()
 # Bot configuration
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 PREFIX = '!'
+# LIVE_SHEETS=1 answers from the Google Sheets directly (refreshed in the background) instead of the JSON database
+LIVE_SHEETS = os.getenv('LIVE_SHEETS') == '1'
+# REFRESH_REBUILD=1 rebuilds champions_database.json from the sheets on each refresh instead of just reloading it
+REFRESH_REBUILD = os.getenv('REFRESH_REBUILD') == '1'
+# PORT serves /healthz, /readyz and /metrics (unset or 0: no endpoint)
+METRICS_PORT = int(os.getenv('PORT') or 0)
+# QUERY_API_PORT serves the champion lookups as JSON (utils/query_api.py) on QUERY_API_HOST (unset or 0: off)
+QUERY_API_PORT = int(os.getenv('QUERY_API_PORT') or 0)
+QUERY_API_HOST = os.getenv('QUERY_API_HOST') or '127.0.0.1'
+# GATEWAY_MODE: full (default intents, discord.py's caches), lean (messages only, no member or message
+# cache) or interactions (slash commands only, no gateway events); see utils/gateway.py
+GATEWAY_MODE = os.getenv('GATEWAY_MODE') or FULL
+# SYNC_COMMANDS=1 registers the slash commands with Discord at startup (always done in interactions mode)
+SYNC_COMMANDS = os.getenv('SYNC_COMMANDS') == '1'
+# Commands slower than SLOW_TRACE_SECONDS are written with their spans to SLOW_TRACE_FILE (0: no tracing)
+tracer.slow_seconds = float(os.getenv('SLOW_TRACE_SECONDS') or SLOW_TRACE_SECONDS)
+tracer.path = os.getenv('SLOW_TRACE_FILE') or SLOW_TRACE_FILE
+# Longest a command received during startup waits for the data before it is dropped
+STARTUP_WAIT_SECONDS = 60
 
-# Initialize bot
-intents = discord.Intents.default()
-intents.message_content = True  # Required to read message content
 
-bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+def load_data_manager():
+    """The data manager the bot answers from, with its data loaded (the JSON database unless LIVE_SHEETS
+    is set). Blocks on the file or the sheets, so run it off the event loop."""
+    if LIVE_SHEETS:
+        # Commands answer from the first snapshot; after it, stale data is refreshed in the background
+        data_manager = LiveSheetDataManager(live=True)
+        data_manager.fetch_champions_from_spreadsheets()
+        return data_manager
+    return DataManager()
 
-# Initialize data manager
-data_manager = DataManager()
 
-@bot.event
-async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
-    print(f'Bot is in {len(bot.guilds)} guilds')
-    print(f'Bot is watching over {len(bot.users)} users')
-    
-    # Load champion data when bot starts
-    try:
-        print("Loading champion data from Google Sheets...")
-        data_manager.fetch_champions_from_spreadsheets()
-        print(f"Loaded data for {sum(len(v) for v in data_manager.champions_data.values())} champions")
-    except Exception as e:
-        print(f"Error loading champion data: {e}")
-        logging.error(f"Error loading champion data: {e}")
-
-    # Add command cog
-    await bot.add_cog(MCOCCommands(bot, data_manager))
-
-@bot.command(name='help')
-async def help_command(ctx):
-    """Display available commands"""
-    help_text = """
+def warm_up(data_manager):
+    """Send a lookup down each search path and build the top lists, so the first commands don't pay for it"""
+    for champions in data_manager.champions_data.values():
+        for champion in champions[:1]:
+            data_manager.get_champion_by_name(champion.name)
+            data_manager.get_champion_by_name(champion.name[::-1])
+    for source in ('vega', 'illuminati'):
+        data_manager.get_top_champions_by_tier(source)
+
+
+def create_bot(data_manager=None, refresher=None, shard_ids=None, shard_count=None, metrics_port=METRICS_PORT,
+               query_port=QUERY_API_PORT, gateway_mode=GATEWAY_MODE):
+    """A bot answering from data_manager.
+
+    Without a data_manager, setup_hook loads one (load_data_manager()) while
+    discord.py connects to the gateway; shard_launcher.py passes the catalog
+    its workers inherit. refresher is what !refresh and the scheduled
+    refreshes go through (anything with start/stop/refresh, by default a
+    RefreshScheduler on data_manager). With shard_count the bot is an
+    AutoShardedBot running shard_ids out of shard_count. With query_port the
+    bot also answers lookups as JSON on that port once it is warm.
+    gateway_mode picks the intents and caches (utils/gateway.py).
+    """
+    startup = StartupTimer()
+    # Initialize bot
+    options = gateway_options(gateway_mode)
+    # The slash commands are registered once, by the process running shard 0
+    sync_commands = (SYNC_COMMANDS or not reads_messages(gateway_mode)) and (not shard_ids or 0 in shard_ids)
+
+    if shard_count:
+        bot = commands.AutoShardedBot(command_prefix=PREFIX, help_command=None, shard_ids=shard_ids,
+                                      shard_count=shard_count, **options)
+    else:
+        bot = commands.Bot(command_prefix=PREFIX, help_command=None, **options)
+
+    # How late the event loop wakes up; shown by !ping
+    loop_monitor = LoopLagMonitor()
+    # Ready once connected to Discord with the data loaded and warm
+    metrics_server = MetricsServer(metrics_port, ready=lambda: bot.is_ready() and startup.ready.is_set())
+    startup_task = None
+    # Phase timings and the ready event, for anything that wants to know how startup went
+    bot.startup = startup
+
+    async def start_up():
+        """Load and warm the data, then register the cogs; runs once, alongside the gateway login"""
+        nonlocal data_manager, refresher
+        loop = asyncio.get_running_loop()
+        try:
+            if data_manager is None:
+                with startup.phase("load_data"):
+                    data_manager = await loop.run_in_executor(None, load_data_manager)
+            with startup.phase("warm"):
+                # Also starts both command pools' threads
+                await asyncio.gather(run_blocking(warm_up, data_manager), run_blocking(int, lane=BULK))
+            watch_data_manager(data_manager)
+            if refresher is None:
+                refresher = RefreshScheduler(data_manager, AUTO_REFRESH_INTERVAL_HOURS * 3600,
+                                             rebuild=REFRESH_REBUILD)
+            with startup.phase("register_cogs"):
+                commands_cog = MCOCCommands(bot, data_manager)
+                await bot.add_cog(commands_cog)
+                # Scheduled refreshes and the admin-only !refresh command
+                await bot.add_cog(RefreshCog(bot, refresher))
+            if sync_commands:
+                with startup.phase("sync_commands"):
+                    try:
+                        synced = await bot.tree.sync()
+                        logging.info(f"Registered {len(synced)} slash commands")
+                    except discord.HTTPException as e:
+                        # The commands registered last time still work
+                        logging.warning(f"Could not register the slash commands: {e}")
+            if query_port:
+                # Same handler as the commands, so both share its response cache
+                await QueryServer(query_port, commands_cog.command_handler, host=QUERY_API_HOST).start()
+        except Exception as e:
+            logging.exception(f"Startup failed: {e}")
+            await bot.close()
+            return
+        if data_manager.data_version() is None:
+            logging.warning("No champion data loaded; commands will find no champions until a refresh succeeds")
+        startup.mark_ready()
+
+    async def setup_hook():
+        nonlocal startup_task
+        # Up before the gateway connects, so the port check passes while the bot connects
+        if metrics_port:
+            await metrics_server.start()
+        startup.begin("gateway")
+        # Not awaited: the gateway connects while the data loads
+        startup_task = asyncio.get_running_loop().create_task(start_up())
+
+    bot.setup_hook = setup_hook
+
+    @bot.event
+    async def on_ready():
+        # Fires again after every reconnect; everything set up once lives in setup_hook
+        startup.end("gateway")
+        print(f'{bot.user} has connected to Discord!')
+        if bot.intents.guilds:
+            print(f'Bot is in {len(bot.guilds)} guilds')
+        if gateway_mode == FULL:
+            # Only the users discord.py happens to have cached; lean modes don't keep them
+            print(f'Bot is watching over {len(bot.users)} users')
+        loop_monitor.start()
+
+    @bot.event
+    async def on_message(message):
+        # Commands that arrive while the data loads are answered once it is warm
+        if not startup.ready.is_set() and message.content.startswith(PREFIX):
+            if not await startup.wait_ready(STARTUP_WAIT_SECONDS):
+                return
+        await bot.process_commands(message)
+
+    async def interaction_check(interaction: discord.Interaction) -> bool:
+        # Slash commands that arrive while the data loads are answered once it is warm; acknowledged
+        # first, since Discord drops interactions that aren't within three seconds
+        if startup.ready.is_set():
+            return True
+        await interaction.response.defer()
+        if await startup.wait_ready(STARTUP_WAIT_SECONDS):
+            return True
+        await interaction.followup.send("The bot is still starting up; try again in a minute.")
+        return False
+
+    # Runs before the tree looks the command up, so it also covers commands whose cog isn't registered yet
+    bot.tree.interaction_check = interaction_check
+
+    @bot.command(name='help')
+    async def help_command(ctx):
+        """Display available commands"""
+        help_text = """
 **MCOC Champions Bot Commands:**
 `!rankup` - Get general suggestions for champions to rank up
 `!rankup <name>` - Get specific rank-up advice for a champion
-    """
-    await ctx.send(help_text)
+`!refresh` - Reload champion data now (administrators only)
+        """
+        await ctx.send(help_text)
 
-@bot.command(name='commands')
-async def commands_list(ctx):
-    """Display available commands"""
-    help_text = """
+    @bot.command(name='commands')
+    async def commands_list(ctx):
+        """Display available commands"""
+        help_text = """
 **MCOC Champions Bot Commands:**
 `!rankup` - Get general suggestions for champions to rank up
 `!rankup <name>` - Get specific rank-up advice for a champion
-    """
-    await ctx.send(help_text)
+`!refresh` - Reload champion data now (administrators only)
+        """
+        await ctx.send(help_text)
+
+    @bot.command(name='ping')
+    async def ping(ctx):
+        """Test command to check if bot is responsive"""
+        lag = loop_monitor.stats()
+        await ctx.send(f'Pong! {round(bot.latency * 1000)}ms '
+                       f'(loop lag p99 {lag["p99"] * 1000:.0f}ms, max {lag["max"] * 1000:.0f}ms)')
+
+    return bot
 
-@bot.command(name='ping')
-async def ping(ctx):
-    """Test command to check if bot is responsive"""
-    await ctx.send(f'Pong! {round(bot.latency * 1000)}ms')
 
 if __name__ == "__main__":
     if not TOKEN:
         print("Error: DISCORD_BOT_TOKEN not found in environment variables")
         exit(1)
-    
-    bot.run(TOKEN)
\ No newline at end of file
+
+    create_bot().run(TOKEN)
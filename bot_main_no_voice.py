@@ -1,8 +1,14 @@
 import os
 import logging
 from dotenv import load_dotenv
+from data_manager import DataManager as LiveSheetDataManager
 from data_manager_json import DataManager
 from cogs.command_handler import MCOCCommands
+from cogs.refresh import RefreshCog
+from config import AUTO_REFRESH_INTERVAL_HOURS
+from utils.metrics import MetricsServer, watch_data_manager
+from utils.offload import LoopLagMonitor
+from utils.refresh import RefreshScheduler
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +19,12 @@ load_dotenv()
 # Bot configuration
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 PREFIX = '!'
+# LIVE_SHEETS=1 answers from the Google Sheets directly (refreshed in the background) instead of the JSON database
+LIVE_SHEETS = os.getenv('LIVE_SHEETS') == '1'
+# REFRESH_REBUILD=1 rebuilds champions_database.json from the sheets on each refresh instead of just reloading it
+REFRESH_REBUILD = os.getenv('REFRESH_REBUILD') == '1'
+# PORT serves /healthz, /readyz and /metrics (unset or 0: no endpoint)
+METRICS_PORT = int(os.getenv('PORT') or 0)
 
 # Import only the core Discord components we need to avoid audioop issue
 try:
@@ -30,25 +42,46 @@ intents.message_content = True  # Required to read message content
 bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
 
 # Initialize data manager
-data_manager = DataManager()
+data_manager = LiveSheetDataManager(live=True) if LIVE_SHEETS else DataManager()
+# How late the event loop wakes up; shown by !ping
+loop_monitor = LoopLagMonitor()
+refresh_scheduler = RefreshScheduler(data_manager, AUTO_REFRESH_INTERVAL_HOURS * 3600, rebuild=REFRESH_REBUILD)
+watch_data_manager(data_manager)
+# Ready once connected to Discord with data loaded
+metrics_server = MetricsServer(METRICS_PORT, ready=lambda: bot.is_ready() and data_manager.data_version() is not None)
+
+async def setup_hook():
+    # Up before the gateway connects, so the port check passes while the bot connects
+    if METRICS_PORT:
+        await metrics_server.start()
+
+    # Runs once per process; on_ready fires again after every reconnect and add_cog would refuse a second copy
+    if LIVE_SHEETS:
+        # Never block the event loop on the sheets; commands answer as soon as the first fetch lands
+        print("Fetching champion data from Google Sheets in the background...")
+        data_manager.start_live()
+    else:
+        try:
+            print("Loading champion data...")
+            data_manager.fetch_champions_from_spreadsheets()
+            print(f"Loaded data for {sum(len(v) for v in data_manager.champions_data.values())} champions")
+        except Exception as e:
+            print(f"Error loading champion data: {e}")
+            logging.error(f"Error loading champion data: {e}")
+
+    # Add command cog
+    await bot.add_cog(MCOCCommands(bot, data_manager))
+    # Scheduled refreshes and the admin-only !refresh command
+    await bot.add_cog(RefreshCog(bot, refresh_scheduler))
+
+bot.setup_hook = setup_hook
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     print(f'Bot is in {len(bot.guilds)} guilds')
     print(f'Bot is watching over {len(bot.users)} users')
-    
-    # Load champion data when bot starts
-    try:
-        print("Loading champion data...")
-        data_manager.fetch_champions_from_spreadsheets()
-        print(f"Loaded data for {sum(len(v) for v in data_manager.champions_data.values())} champions")
-    except Exception as e:
-        print(f"Error loading champion data: {e}")
-        logging.error(f"Error loading champion data: {e}")
-
-    # Add command cog
-    await bot.add_cog(MCOCCommands(bot, data_manager))
+    loop_monitor.start()
 
 @bot.command(name='help')
 async def help_command(ctx):
@@ -68,7 +101,9 @@ async def help_command(ctx):
 @bot.command(name='ping')
 async def ping(ctx):
     """Test command to check if bot is responsive"""
-    await ctx.send(f'Pong! {round(bot.latency * 1000)}ms')
+    lag = loop_monitor.stats()
+    await ctx.send(f'Pong! {round(bot.latency * 1000)}ms '
+                   f'(loop lag p99 {lag["p99"] * 1000:.0f}ms, max {lag["max"] * 1000:.0f}ms)')
 
 if __name__ == "__main__":
     if not TOKEN:
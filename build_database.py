@@ -1,438 +1,358 @@
-import requests
-import csv
-import io
+import copy
 import json
-import re
+import sys
 from difflib import SequenceMatcher
 
-def build_champion_database():
-    """Build a comprehensive JSON database by combining data from both sheets"""
-    
-    # URLs for the spreadsheets - updated to new general class rankings
-    vega_bgs_url = "https://docs.google.com/spreadsheets/d/1KzfdzI_HxK7zk_eTwmdwI5G84k9HSIYPzAMSPgGYjUE/export?format=csv&gid=0"
-    # New general class rankings sheet
-    general_rankings_url = "https://docs.google.com/spreadsheets/d/1cUr2KoqGtZhx6zIAQw-LkUR9xFwS2xR6HNVKed3qSvQ/export?format=csv&gid=0"
-    
-    # Fetch and parse both sheets
-    print("Fetching Battlegrounds sheet...")
-    bg_response = requests.get(vega_bgs_url)
-    bg_response.raise_for_status()
-    bg_csv = list(csv.reader(io.StringIO(bg_response.text)))
-    
-    print("Fetching Ranking sheet (old sheet)...")  # Keep for reference, but will use new sheet below
-    # rank_response = requests.get(illuminati_ranking_url)
-    # rank_response.raise_for_status()
-    # rank_csv = list(csv.reader(io.StringIO(rank_response.text)))
-    
-    # Instead of using the old ranking sheet, we'll use the new general rankings sheet
-    print("Fetching New General Rankings sheet...")
-    rank_response = requests.get(general_rankings_url)
-    rank_response.raise_for_status()
-    rank_csv = list(csv.reader(io.StringIO(rank_response.text)))
-    
-    # Parse Battlegrounds data - create a lookup table
-    battlegrounds_data = {}  # {champion_name: {rating: float, type: str, symbols: list}}
-    
-    # Process each column (Mystic, Science, etc.) in the BGs sheet
-    for col_idx in range(1, len(bg_csv[0])):  # Skip column 0
-        if col_idx >= len(bg_csv[0]):
-            continue
-            
-        category = bg_csv[0][col_idx].strip() if col_idx < len(bg_csv[0]) else ""
-        if not category:
-            continue
-            
-        # Process rows starting from row 3 where champions start
-        for row_idx in range(3, len(bg_csv)):
-            if col_idx >= len(bg_csv[row_idx]):
-                continue
-                
-            cell_value = bg_csv[row_idx][col_idx].strip()
-            if not cell_value:
-                continue
-            
-            # Extract champion name and rating from format like "Nico Minoru - 10"
-            # Find the part after the dash
-            parts = cell_value.split('-', 1)
-            if len(parts) >= 2:
-                name_part = parts[0].strip()
-                rating_part_str = parts[1].strip()
-                
-                # Extract rating: if starts with '1' followed by digit, it's 10, otherwise first digit
-                if rating_part_str.startswith('1') and len(rating_part_str) > 1 and rating_part_str[1].isdigit():
-                    rating_part = 10
-                elif rating_part_str and rating_part_str[0].isdigit():
-                    rating_part = int(rating_part_str[0])
-                else:
-                    continue  # Skip if no valid rating found
-                
-
-                
-                # Extract symbols from the original cell value
-                emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                symbols = emoji_pattern.findall(cell_value)
-                
-                # Determine battleground type based purely on row position
-                # The Battlegrounds type is determined by the row position:
-                # - Rows 3-30: Dual Threat section (Nico Minoru, Tigra, etc.)
-                # - Rows 31-90: Attackers section (Spider-Man at Row 78, etc.)
-                # - Rows 91+: Defenders section (Enchantress, Doctor Doom, etc.)
-                bg_type = "Dual Threat"  # Default for early rows
-                
-                # Determine the battlegrounds type based on row position ONLY
-                if 31 <= row_idx <= 90:
-                    # This is in the Attackers section
-                    bg_type = "Attacker"
-                elif 91 <= row_idx:
-                    # This is in the Defenders section
-                    bg_type = "Defender"
-                # Rows 3-30 default to Dual Threat
-                
-
-                
-                battlegrounds_data[name_part.lower()] = {
-                    "rating": rating_part,
-                    "type": bg_type,
-                    "symbols": symbols
-                }
-    
-    # Parse Ranking sheet to get class rankings and tiers
+import utils.cell_tokenizer
+import utils.keyword_matcher
+import utils.search_index
+import utils.sheet_layout
+import utils.sheet_stream
+import utils.sources
+from utils.build_pipeline import Stage, StagedBuild, content_hash
+from utils.keyword_matcher import compile_keywords, load_pattern_lists
+from utils.search_index import build_search_index, sidecar_path, write_search_index
+from utils.sheet_layout import load_layout_specs
+from utils.shards import shards_dir, write_shards
+from utils.sheet_stream import (is_file_url, iter_csv_rows, iter_file_chunks, iter_source_chunks, iter_xlsx_rows,
+                                save_chunks, xlsx_export_url, xlsx_sheet_names)
+from utils.sources import load_source_specs, make_source, source_summary
+
+# URLs for the spreadsheets - updated to new general class rankings
+VEGA_BGS_URL = "https://docs.google.com/spreadsheets/d/1KzfdzI_HxK7zk_eTwmdwI5G84k9HSIYPzAMSPgGYjUE/export?format=csv&gid=0"
+# New general class rankings sheet
+GENERAL_RANKINGS_URL = "https://docs.google.com/spreadsheets/d/1cUr2KoqGtZhx6zIAQw-LkUR9xFwS2xR6HNVKed3qSvQ/export?format=csv&gid=0"
+
+# "csv" downloads the first tab of each spreadsheet; "xlsx" downloads the whole workbook once, reads the
+# tab each layout names in data/sheet_layouts.json (the first by default) and keeps the emoji symbols
+# intact (no need for KNOWN_CHAMPION_SYMBOLS)
+SHEET_FORMAT = "csv"
+
+# Where stage artifacts and the per-stage timing/size report are written
+BUILD_CACHE_DIR = ".build_cache"
+BUILD_REPORT_FILE = "build_report.json"
+# Stages that don't depend on each other (fetching and parsing each source) run on this many threads
+BUILD_WORKERS = 4
+DATABASE_FILE = "champions_database.json"
+# Also write compact per-class shards and a manifest next to the database (--shards), for tools that only
+# need a few classes
+SHARD_OUTPUT = False
+
+# Confirmed BG -> ranking name pairings carried between builds, and the report of pairings awaiting review
+NAME_MAP_FILE = "data/name_map.json"
+NAME_REVIEW_FILE = "name_review.json"
+
+# Header rows, class names, tier headers and BG sections of each sheet (see data/sheet_layouts.json)
+BATTLEGROUNDS_LAYOUT = load_layout_specs()["vega_battlegrounds"]
+RANKINGS_LAYOUT = load_layout_specs()["general_rankings"]
+
+# Extra community tier lists (war defense, content-specific lists, ...) merged into each champion's "sources"
+EXTRA_SOURCES = load_source_specs()
+
+# Cells in the ranking sheet that are headers or metadata rather than champions
+HEADER_KEYWORDS = load_pattern_lists()["header_keywords"]
+
+# Dictionary of known champions and their special properties
+# This compensates for emoji symbols that may be lost in CSV export
+KNOWN_CHAMPION_SYMBOLS = {
+    "mr. negative": {
+        "ranking_depends_on_awakening": True,  # 🌟 Awakening needed for this ranking
+        "difficult_as_7star": True,  # 🌹 Not available as a 7 star (or very rare)
+        "early_prediction": False,  # Not marked with 🎲
+        "specific_relic_needed": False,  # Not marked with 💾
+        "ranking_depends_on_signature": False,  # Not marked with 🚀
+        "top_candidate_for_ascension": False  # Not marked with 💎
+    },
+    "mister negative": {
+        "ranking_depends_on_awakening": True,  # 🌟 Awakening needed for this ranking
+        "difficult_as_7star": True,  # 🌹 Not available as a 7 star (or very rare)
+        "early_prediction": False,
+        "specific_relic_needed": False,
+        "ranking_depends_on_signature": False,
+        "top_candidate_for_ascension": False
+    },
+    "spider-man (supreme)": {
+        "ranking_depends_on_awakening": False,
+        "difficult_as_7star": False,
+        "early_prediction": False,
+        "specific_relic_needed": True,  # 💾 Correct relic is important
+        "ranking_depends_on_signature": True,  # 🚀 High or Max Sig needed for this ranking
+        "top_candidate_for_ascension": False
+    }
+    # Add more champions as needed
+}
+
+# Known BG -> ranking sheet name variations that fuzzy matching gets wrong
+KNOWN_NAME_VARIATIONS = {
+    'mr. negative': 'mister negative',
+    'mr negative': 'mister negative',
+    'mister negative': 'mr. negative',
+    'spidey supreme': 'spider-man (supreme)',
+    'spider-man (supreme)': 'spidey supreme',
+    'sigil witch': 'scarlet witch (sigil)',
+    'scarlet witch (sigil)': 'sigil witch'
+}
+
+# Common special terms found in champion names; sharing one boosts a fuzzy match
+SHARED_NAME_TERMS = ['sigil', 'supreme', 'future', 'movie', 'deathless', 'stark']
+
+# New fuzzy pairings scoring below this go to the review report instead of being applied
+NAME_MATCH_THRESHOLD = 0.75
+
+# Names containing these are contributor names, social media links, etc. from the Information column
+NON_CHAMPION_KEYWORDS = load_pattern_lists()["non_champion_keywords"]
+
+
+def fetch_sheet(url, raw_dir, sheet_format="csv"):
+    """Stage: stream a sheet export (or a file:// recording of one) to a content-addressed file under raw_dir"""
+    if sheet_format == "xlsx" and not is_file_url(url):
+        url = xlsx_export_url(url)
+    path, sha, size = save_chunks(iter_source_chunks(url), raw_dir, suffix=f".{sheet_format}")
+    sheet = {"url": url, "format": sheet_format, "path": path, "sha256": sha, "bytes": size}
+    if sheet_format == "xlsx":
+        sheet["tabs"] = xlsx_sheet_names(path)
+    return sheet
+
+
+def iter_sheet_rows(sheet, tab=None):
+    """Rows of a fetched sheet; for workbooks `tab` picks the tab (the first by default)"""
+    if sheet.get("format") == "xlsx":
+        if tab is not None and tab not in sheet["tabs"]:
+            raise ValueError(f"{sheet['url']} has no tab {tab!r} (tabs: {', '.join(sheet['tabs'])})")
+        return iter_xlsx_rows(sheet["path"], tab)
+    return iter_csv_rows(iter_file_chunks(sheet["path"]))
+
+
+def parse_battlegrounds(sheet, layout):
+    """Stage: build the BG lookup table {champion_name: {rating, type, symbols, provenance}}"""
+    # Vega's BG sheet lists "Name - rating" cells down the class columns (see ColumnSource)
+    source = make_source("battlegrounds", "vega_battlegrounds", layout)
+    parsed = source.parse(lambda: iter_sheet_rows(sheet, layout.get("tab")))
+    return {"battlegrounds": parsed["entries"], "sections": parsed.get("sections", {})}
+
+
+def parse_rankings(sheet, header_keywords, known_champion_symbols, layout):
+    """Stage: parse the ranking sheet into class rankings, tiers and symbol flags"""
+    # Class names sit in column A; each block runs until the next class name.
+    # Within a block rankings are assigned column by column, row by row (see ClassBlockSource)
+    source = make_source("rankings", "general_rankings", layout, header_keywords)
     champions_data = {}
-    # Dictionary of known champions and their special properties
-    # This compensates for emoji symbols that may be lost in CSV export
-    known_champion_symbols = {
-        "mr. negative": {
-            "ranking_depends_on_awakening": True,  # 🌟 Awakening needed for this ranking
-            "difficult_as_7star": True,  # 🌹 Not available as a 7 star (or very rare)
-            "early_prediction": False,  # Not marked with 🎲
-            "specific_relic_needed": False,  # Not marked with 💾
-            "ranking_depends_on_signature": False,  # Not marked with 🚀
-            "top_candidate_for_ascension": False  # Not marked with 💎
-        },
-        "mister negative": {
-            "ranking_depends_on_awakening": True,  # 🌟 Awakening needed for this ranking
-            "difficult_as_7star": True,  # 🌹 Not available as a 7 star (or very rare)
-            "early_prediction": False,
-            "specific_relic_needed": False,
-            "ranking_depends_on_signature": False,
-            "top_candidate_for_ascension": False
-        },
-        "spider-man (supreme)": {
-            "ranking_depends_on_awakening": False,
-            "difficult_as_7star": False,
-            "early_prediction": False,
-            "specific_relic_needed": True,  # 💾 Correct relic is important
-            "ranking_depends_on_signature": True,  # 🚀 High or Max Sig needed for this ranking
-            "top_candidate_for_ascension": False
+    for name_key, entry in source.parse(lambda: iter_sheet_rows(sheet, layout.get("tab")))["entries"].items():
+        class_name, rank, symbols = entry["class"], entry["rank"], entry["symbols"]
+
+        # Override with known symbols if available
+        symbol_overrides = known_champion_symbols.get(name_key, {})
+
+        champions_data[name_key] = {
+            "name": entry["name"],
+            "class": class_name,
+            "rank": rank,
+            "tier": entry["tier"],
+            "ranking_display": f"{class_name} #{rank}",
+            "ranking_depends_on_awakening": symbol_overrides.get('ranking_depends_on_awakening', '🌟' in symbols),
+            "ranking_depends_on_signature": symbol_overrides.get('ranking_depends_on_signature', '🚀' in symbols),
+            "top_candidate_for_ascension": symbol_overrides.get('top_candidate_for_ascension', '💎' in symbols),
+            "difficult_as_7star": symbol_overrides.get('difficult_as_7star', '🌹' in symbols),
+            "specific_relic_needed": symbol_overrides.get('specific_relic_needed', '💾' in symbols),
+            "early_prediction": symbol_overrides.get('early_prediction', '🎲' in symbols),
+            "other_symbols": [s for s in symbols if s not in ['🌟', '🚀', '💎', '🌹', '💾', '🎲']],
+            "battlegrounds_rating": None,
+            "battlegrounds_type": None,
+            "source": "combined",
+            "provenance": [entry["provenance"]]
         }
-        # Add more champions as needed
-    }
-    
-    # Find all class names in column A of ranking sheet
-    class_starts = []
-    for row_idx in range(len(rank_csv)):
-        if row_idx < len(rank_csv) and len(rank_csv[row_idx]) > 0:
-            cell_a = rank_csv[row_idx][0] if len(rank_csv[row_idx]) > 0 else ""
-            class_name = cell_a.strip().title() if cell_a.strip() else ""
-            
-            if class_name.lower() in ['mystic', 'science', 'skill', 'mutant', 'tech', 'cosmic', 'guardian']:
-                class_starts.append((row_idx, class_name))
-    
-
-    
-    # Process each class and its champion range
-    for i, (start_row, class_name) in enumerate(class_starts):
-        # Determine the end of this class range
-        if i + 1 < len(class_starts):
-            end_row = class_starts[i + 1][0]  # Start of next class
-        else:
-            end_row = len(rank_csv)  # End of all data
-        
-
-        
-        # For this class, assign rankings by going column by column, row by row in the class range
-        rank_counter = 1  # Start ranking at 1 for each class
-        
-        # Process each column from B onward
-        for col_idx in range(1, len(rank_csv[0]) if len(rank_csv) > 0 else 0):
-            # Process each row in the class range for this column
-            for row_idx in range(start_row, end_row):
-
-                
-                try:
-                    if col_idx >= len(rank_csv[row_idx]):  # Column doesn't exist for this row
-                        continue
-                    
-                    cell_value = rank_csv[row_idx][col_idx].strip()
-                    
-                    # Skip empty cells
-                    if not cell_value:
-                        continue
-                    
-                    # Skip rows that appear to be headers or metadata
-                    cell_lower = cell_value.lower()
-                    filtered_out = False
-                    header_keywords = [
-                        'champion', 'champions', 'name', 'tier', 'rating', 'category',
-                        'above all', 'scorching', 'super hot', 'hot', 'mild', 'information',
-                        'the truly o.p.', 'tier above all', 'omega days', 'glorious guardians',
-                        'exclusive', 'go to file', 'to use tier list', 'filtering'
-                    ]
-                    
-                    # Only filter if the cell is exactly or very close to a header keyword
-                    # We don't want to filter champion names that happen to contain parts of these words
-                    cell_stripped = cell_lower.strip()
-                    for skip_text in header_keywords:
-                        # Filter if it's an exact match or very close (allowing for small differences)
-                        if skip_text == cell_stripped:
-                            filtered_out = True
-                            break
-                        # Or if it's a very short string that matches closely
-                        elif len(cell_stripped) <= len(skip_text) + 3 and skip_text in cell_stripped:
-                            # But only if the lengths are close (to avoid filtering champion names like "photon")
-                            if abs(len(cell_stripped) - len(skip_text)) <= 3:
-                                filtered_out = True
-                                break
-                    
-
-                    
-                    if filtered_out:
-                        continue
-                    
-                    # Extract emoji symbols from the name using pure Python
-                    # Find the first non a-z, A-Z, 0-9, hyphen, space, parentheses character  
-                    name_part = ""
-                    i = 0
-                    while i < len(cell_value):
-                        char = cell_value[i]
-                        # Check if character is a-z, A-Z, 0-9, hyphen, space, or parentheses
-                        char_code = ord(char)
-                        if (65 <= char_code <= 90) or (97 <= char_code <= 122) or (48 <= char_code <= 57) or char in ' -.()':
-                            name_part += char
-                            i += 1
-                        else:
-                            # Found first non-allowed character (likely emoji start)
-                            break
-                    
-                    # The rest is emojis and symbols
-                    emoji_part = cell_value[i:].strip()
-                    
-                    # Clean the name part
-                    clean_name = name_part.strip()
-                    
-                    # Extract symbols from the emoji part
-                    emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                    symbols = emoji_pattern.findall(emoji_part)
-                    
-                    if clean_name and len(clean_name) > 1:  # Valid champion name
-
-                        
-                        # Find the tier by looking up in row context
-                        tier = "Information"  # Default
-                        # We can determine tier based on the position of the champion in the class
-                        # Higher positions (earlier rows, earlier columns) are higher tiers
-                        
-                        # Look upward from this row to find the tier classification
-                        for check_row in range(row_idx, -1, -1):
-                            if check_row < len(rank_csv) and len(rank_csv[check_row]) > col_idx:
-                                row_header = rank_csv[check_row][col_idx].strip() if len(rank_csv[check_row]) > col_idx else ""
-                                if "Above All" in row_header:
-                                    tier = "Above All"
-                                    break
-                                elif "Scorching" in row_header:
-                                    tier = "Scorching"
-                                    break
-                                elif "Super Hot" in row_header:
-                                    tier = "Super Hot"
-                                    break
-                                elif "Hot" in row_header:
-                                    tier = "Hot"
-                                    break
-                                elif "Mild" in row_header:
-                                    tier = "Mild"
-                                    break
-                                elif "Information" in row_header:
-                                    tier = "Information"
-                                    break
-                        
-                        # Also check row 1 and 2 for tier info
-                        if tier == "Information" and row_idx >= 1:
-                            row1_header = rank_csv[1][col_idx].strip() if len(rank_csv[1]) > col_idx else ""
-                            if "Above All" in row1_header:
-                                tier = "Above All"
-                            elif "Scorching" in row1_header:
-                                tier = "Scorching"
-                            elif "Super Hot" in row1_header:
-                                tier = "Super Hot"
-                            elif "Hot" in row1_header:
-                                tier = "Hot"
-                            elif "Mild" in row1_header:
-                                tier = "Mild"
-                            elif "Information" in row1_header:
-                                tier = "Information"
-                        
-                        # Get battlegrounds data - try both clean name and original name with emojis
-                        bg_data = battlegrounds_data.get(clean_name.lower(), {})
-                        if not bg_data:  # If no data found for clean name, try original with emojis
-                            bg_data = battlegrounds_data.get(cell_value.lower(), {})
-                        
-
-                        
-                        # Override with known symbols if available
-                        name_key = clean_name.lower()
-                        symbol_overrides = known_champion_symbols.get(name_key, {})
-                        
-                        champions_data[clean_name.lower()] = {
-                            "name": clean_name,
-                            "class": class_name,
-                            "rank": rank_counter,
-                            "tier": tier,
-                            "ranking_display": f"{class_name} #{rank_counter}",
-                            "ranking_depends_on_awakening": symbol_overrides.get('ranking_depends_on_awakening', '🌟' in symbols),
-                            "ranking_depends_on_signature": symbol_overrides.get('ranking_depends_on_signature', '🚀' in symbols),
-                            "top_candidate_for_ascension": symbol_overrides.get('top_candidate_for_ascension', '💎' in symbols),
-                            "difficult_as_7star": symbol_overrides.get('difficult_as_7star', '🌹' in symbols),
-                            "specific_relic_needed": symbol_overrides.get('specific_relic_needed', '💾' in symbols),
-                            "early_prediction": symbol_overrides.get('early_prediction', '🎲' in symbols),
-                            "other_symbols": [s for s in symbols if s not in ['🌟', '🚀', '💎', '🌹', '💾', '🎲']],
-                            "battlegrounds_rating": bg_data.get("rating"),
-                            "battlegrounds_type": bg_data.get("type"),
-                            "source": "combined"
-                        }
-                        
-                        # Increment rank for next champion in this tier/class
-                        rank_counter += 1
-                        
-                except (IndexError, TypeError):
-                    continue  # Skip if cell doesn't exist
-    
+
+    return {"champions": champions_data}
+
+
+def parse_source(sheet, name, layout_name, layout, header_keywords):
+    """Stage: parse one of the extra tier lists in data/sources.json into per-champion entries"""
+    return make_source(name, layout_name, layout, header_keywords).parse(
+        lambda: iter_sheet_rows(sheet, layout.get("tab")))
+
+
+def attach_battlegrounds(champion, bg_data):
+    """Copy a BG record's rating and type onto a champion and record where they came from"""
+    champion["battlegrounds_rating"] = bg_data.get("rating")
+    champion["battlegrounds_type"] = bg_data.get("type")
+    champion["provenance"] = [entry for entry in champion["provenance"] if entry["sheet"] != "battlegrounds"]
+    if bg_data:
+        champion["provenance"].append(bg_data["provenance"])
+
+
+def name_similarity(bg_name, existing_name, known_variations, shared_terms):
+    """Fuzzy score between a BG name and a ranking sheet name (higher is closer)"""
+    # Calculate similarity between battlegrounds name and existing champion name
+    ratio = SequenceMatcher(None, bg_name.lower(), existing_name.lower()).ratio()
+
+    # Also check if one name contains the other (for cases like "Werewolf" vs "Werewolf by Night")
+    if bg_name.lower() in existing_name.lower() or existing_name.lower() in bg_name.lower():
+        # Boost similarity if one name contains the other
+        ratio = max(ratio, 0.85)
+
+    # Special handling for known champion name variations to improve matching accuracy
+    bg_normalized = bg_name.lower().strip()
+    existing_normalized = existing_name.lower().strip()
+
+    # Check for exact known variations
+    if bg_normalized in known_variations and known_variations[bg_normalized] == existing_normalized:
+        # Very high match for known variations
+        ratio = 0.95
+    elif existing_normalized in known_variations and known_variations[existing_normalized] == bg_normalized:
+        # Very high match for known variations (reverse)
+        ratio = 0.95
+
+    # Special handling for names with common prefixes like "Mr." vs "Dr." that might interfere
+    # Process the names to remove common prefixes for additional similarity checking
+    bg_no_prefix = bg_name.lower().replace('mr.', '').replace('dr.', '').replace('captain ', '').strip()
+    existing_no_prefix = existing_name.lower().replace('mr.', '').replace('dr.', '').replace('captain ', '').strip()
+
+    # Calculate ratio without prefixes to avoid prefix-based mismatches
+    prefix_removed_ratio = SequenceMatcher(None, bg_no_prefix, existing_no_prefix).ratio()
+
+    # Use the higher of the two ratios
+    ratio = max(ratio, prefix_removed_ratio)
+
+    # Look for shared special terms that would indicate a strong match
+    bg_lower = bg_name.lower()
+    existing_lower = existing_name.lower()
+
+    matched_terms = [term for term in shared_terms if term in bg_lower and term in existing_lower]
+    if matched_terms:
+        # Boost similarity for names sharing special terms
+        ratio += 0.1  # Small boost for each shared term pattern
+
+    return ratio
+
+
+def name_hash(name):
+    """Short hash of a name string, stored with each pairing to detect stale or hand-edited entries"""
+    return content_hash(name.encode('utf-8'))[:16]
+
+
+def load_name_map(path):
+    """Stage: read the confirmed BG -> ranking name pairings from earlier builds"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"pairings": {}}
+
+
+def known_pairing(name_map, bg_name):
+    """The ranking name a BG name was confirmed to pair with, if the stored entry is still valid"""
+    entry = name_map.get("pairings", {}).get(bg_name)
+    if not entry or entry.get("bg_hash") != name_hash(bg_name):
+        return None
+    ranking_name = entry.get("ranking_name")
+    if ranking_name is None or entry.get("ranking_hash") != name_hash(ranking_name):
+        return None
+    return ranking_name
+
+
+def merge_battlegrounds(battlegrounds, rankings, name_map, known_variations, shared_terms, match_threshold):
+    """Stage: attach BG ratings to ranked champions by exact name, confirmed pairing, then fuzzy matching.
+
+    Pairings confirmed by earlier builds (name_map) are resolved with a dict
+    lookup; only BG names without one are fuzzy matched. New fuzzy pairings
+    scoring at least match_threshold are applied and added to the returned
+    pairings; weaker ones are left unmatched and listed under "review", with
+    the threshold they missed under "threshold".
+    """
+    battlegrounds_data = dict(battlegrounds["battlegrounds"])
+    champions_data = copy.deepcopy(rankings["champions"])
+    pairings = dict(name_map.get("pairings", {}))
+    review = []
+
+    # Get battlegrounds data - try both clean name and original name with emojis
+    for name_key, champion in champions_data.items():
+        bg_data = battlegrounds_data.get(name_key, {})
+        if not bg_data:  # If no data found for clean name, try original with emojis
+            bg_data = battlegrounds_data.get(champion["provenance"][0]["value"].lower(), {})
+        attach_battlegrounds(champion, bg_data)
+
     # Now match battlegrounds data to champions in the main sheet
     # Track which main sheet champions have already been matched to prevent double-matching
     matched_main_champions = set()
-    
+
+    def apply_match(bg_name, main_name):
+        attach_battlegrounds(champions_data[main_name], battlegrounds_data[bg_name])
+        champions_data[main_name]["source"] = "combined"
+        # Record that this main sheet entry has been matched to prevent double matching
+        matched_main_champions.add(main_name)
+        # Remove from battlegrounds_data since it's been matched
+        del battlegrounds_data[bg_name]
+
     # First, match exact names
-    for bg_name, bg_data in list(battlegrounds_data.items()):
+    for bg_name in list(battlegrounds_data):
         if bg_name in champions_data:
-            # Exact match found, update with battlegrounds data
-            champions_data[bg_name]["battlegrounds_rating"] = bg_data["rating"]
-            champions_data[bg_name]["battlegrounds_type"] = bg_data["type"]
-            champions_data[bg_name]["source"] = "combined"
-            # Record that this main sheet entry has been matched
-            matched_main_champions.add(bg_name)
-            # Remove from battlegrounds_data since it's been matched
-            del battlegrounds_data[bg_name]
-    
-    # Then, for remaining battlegrounds data, use fuzzy matching to find closest names
-    remaining_bg_data = dict(battlegrounds_data)  # Copy remaining items
-    for bg_name, bg_data in remaining_bg_data.items():
+            apply_match(bg_name, bg_name)
+
+    # Next, pairings confirmed by earlier builds
+    for bg_name in list(battlegrounds_data):
+        main_name = known_pairing(name_map, bg_name)
+        if main_name in champions_data and main_name not in matched_main_champions:
+            apply_match(bg_name, main_name)
+
+    # Then, for genuinely new battlegrounds names, use fuzzy matching to find closest names
+    for bg_name in list(battlegrounds_data):
         best_match = None
         best_ratio = 0
-        
+
         # Look for the best match among the remaining champions (excluding those already matched)
         for existing_name in champions_data.keys():
             # Skip if this main sheet champion has already been matched
             if existing_name in matched_main_champions:
                 continue
-                
-            # Calculate similarity between battlegrounds name and existing champion name
-            ratio = SequenceMatcher(None, bg_name.lower(), existing_name.lower()).ratio()
-            
-            # Also check if one name contains the other (for cases like "Werewolf" vs "Werewolf by Night")
-            if bg_name.lower() in existing_name.lower() or existing_name.lower() in bg_name.lower():
-                # Boost similarity if one name contains the other
-                ratio = max(ratio, 0.85)
-            
-            # Special handling for known champion name variations to improve matching accuracy
-            # Handle specific cases where we know the correct mappings
-            known_variations = {
-                'mr. negative': 'mister negative',
-                'mr negative': 'mister negative',
-                'mister negative': 'mr. negative',
-                'spidey supreme': 'spider-man (supreme)',
-                'spider-man (supreme)': 'spidey supreme',
-                'sigil witch': 'scarlet witch (sigil)',
-                'scarlet witch (sigil)': 'sigil witch'
-            }
-            
-            bg_normalized = bg_name.lower().strip()
-            existing_normalized = existing_name.lower().strip()
-            
-            # Check for exact known variations
-            if bg_normalized in known_variations and known_variations[bg_normalized] == existing_normalized:
-                # Very high match for known variations
-                ratio = 0.95
-            elif existing_normalized in known_variations and known_variations[existing_normalized] == bg_normalized:
-                # Very high match for known variations (reverse)
-                ratio = 0.95
-            
-            # Special handling for names with common prefixes like "Mr." vs "Dr." that might interfere
-            # Process the names to remove common prefixes for additional similarity checking
-            bg_no_prefix = bg_name.lower().replace('mr.', '').replace('dr.', '').replace('captain ', '').strip()
-            existing_no_prefix = existing_name.lower().replace('mr.', '').replace('dr.', '').replace('captain ', '').strip()
-            
-            # Calculate ratio without prefixes to avoid prefix-based mismatches
-            prefix_removed_ratio = SequenceMatcher(None, bg_no_prefix, existing_no_prefix).ratio()
-            
-            # Use the higher of the two ratios
-            ratio = max(ratio, prefix_removed_ratio)
-            
-            # Look for shared special terms that would indicate a strong match
-            bg_lower = bg_name.lower()
-            existing_lower = existing_name.lower()
-            
-            # Common special terms found in champion names
-            terms = ['sigil', 'supreme', 'future', 'movie', 'deathless', 'stark']
-            shared_terms = [term for term in terms if term in bg_lower and term in existing_lower]
-            if shared_terms:
-                # Boost similarity for names sharing special terms
-                ratio += 0.1  # Small boost for each shared term pattern
-            
+
+            ratio = name_similarity(bg_name, existing_name, known_variations, shared_terms)
             if ratio > best_ratio:  # Take the closest match
                 best_ratio = ratio
                 best_match = existing_name
-        
-        # If we found a good match, update that champion with battlegrounds data
-        if best_match:
-            champions_data[best_match]["battlegrounds_rating"] = bg_data["rating"]
-            champions_data[best_match]["battlegrounds_type"] = bg_data["type"]
-            champions_data[best_match]["source"] = "combined"
-            # Record that this main sheet entry has been matched to prevent double matching
-            matched_main_champions.add(best_match)
-            # Remove from battlegrounds_data since it's been matched
-            del battlegrounds_data[bg_name]
-
-    # Include champions that are only in battlegrounds sheet but not in ranking sheet
-    # Need to map the column position to the class for proper categorization
-    # First get class names from column headers in the battlegrounds sheet
-    bg_class_mapping = {}
-    for col_idx, header in enumerate(bg_csv[0]):  # Row 0 contains headers
-        if col_idx > 0:  # Skip the first column
-            class_name = header.strip()
-            if class_name.lower() in ['mystic', 'science', 'skill', 'mutant', 'tech', 'cosmic', 'guardian']:
-                bg_class_mapping[col_idx] = class_name
-    
-    # For any remaining battlegrounds-only champions, add them to the database
-    for bg_name, bg_data in battlegrounds_data.items():
-        # Try to find the class for this champion by looking through the sheet data
-        found_class = None
-        
-        for col_idx, header in enumerate(bg_csv[0]):  # Check each column
-            if col_idx in bg_class_mapping:  # Only check valid class columns
-                class_name = bg_class_mapping[col_idx]
-                # Look through the rows in this column to find our champion
-                for row_idx in range(3, len(bg_csv)):  # Start from row 3 where champions start
-                    if col_idx < len(bg_csv[row_idx]):
-                        cell_value = bg_csv[row_idx][col_idx].strip()
-                        # Extract name from format like "Korg - 7"
-                        parts = cell_value.split('-', 1)
-                        if len(parts) >= 2:
-                            name_part = parts[0].strip().lower()
-                            if name_part == bg_name:
-                                found_class = class_name
-                                break
-                if found_class:
-                    break
-        
+
+        if not best_match:
+            continue
+        if best_ratio < match_threshold:
+            # Too uncertain to apply silently; leave it BG-only until someone confirms it
+            review.append({
+                "bg_name": bg_name,
+                "bg_cell": battlegrounds_data[bg_name]["provenance"]["cell"],
+                "candidate": best_match,
+                "score": round(best_ratio, 4),
+            })
+            continue
+
+        # Good match: update that champion with battlegrounds data and remember the pairing
+        pairings[bg_name] = {
+            "ranking_name": best_match,
+            "score": round(best_ratio, 4),
+            "bg_hash": name_hash(bg_name),
+            "ranking_hash": name_hash(best_match),
+        }
+        apply_match(bg_name, best_match)
+
+    return {"champions": champions_data, "unmatched": battlegrounds_data, "pairings": pairings, "review": review,
+            "threshold": match_threshold}
+
+
+def save_name_map(merged, path, review_path):
+    """Stage: persist confirmed pairings and write the low-confidence ones to a review report"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"pairings": merged["pairings"]}, f, indent=2, ensure_ascii=False, sort_keys=True)
+    with open(review_path, 'w', encoding='utf-8') as f:
+        json.dump({"threshold": merged["threshold"], "pending": merged["review"]}, f, indent=2, ensure_ascii=False)
+    return {"pairings": len(merged["pairings"]), "pending_review": len(merged["review"])}
+
+
+def add_battlegrounds_only(merged, classes):
+    """Stage: include champions that are only in the BGs sheet but not in the ranking sheet"""
+    champions_data = copy.deepcopy(merged["champions"])
+
+    for bg_name, bg_data in merged["unmatched"].items():
+        # The class is the header of the column the BG cell was read from
+        column_class = bg_data["provenance"]["class"]
+        found_class = column_class if column_class.lower() in classes else None
+
         # If we couldn't determine the class, default to 'Unknown'
         if not found_class:
             found_class = 'Unknown'
@@ -443,7 +363,7 @@ def build_champion_database():
             # But since they're battlegrounds-only, we'll default to Information tier
             rank = 999
             tier = 'Information'
-        
+
         champions_data[bg_name] = {
             "name": bg_name.title(),
             "class": found_class,
@@ -459,51 +379,171 @@ def build_champion_database():
             "other_symbols": [],
             "battlegrounds_rating": bg_data["rating"],
             "battlegrounds_type": bg_data["type"],
-            "source": "vega"  # From battlegrounds sheet
+            "source": "vega",  # From battlegrounds sheet
+            "provenance": [bg_data["provenance"]]
         }
 
-    # Filter out non-champion entries that were accidentally included 
-    # (like contributor names, social media links, etc. from the Information column)
-    non_champion_keywords = [
-        'mcoce', 'illuminati', 'vega', 'cantona', 'grass', 'encyclopedia', 'encyclopdia', 
-        'nagase', 'tjarvis', 'william', 'creator codes', 'socials', 'youtube', 'twitter', 
-        'bluesky', 'instagram', 'discord', 'more helpful videos', 'how to fight', 'series',
-        'guide', 'video', 'channel', 'page', 'link', 'url', 'website', 'stream', 'twitch'
-    ]
-    
-    # Create a new dictionary with only legitimate champions
+    return champions_data
+
+
+def filter_non_champions(champions_data, non_champion_keywords):
+    """Stage: drop entries that were accidentally included (contributor names, links, etc.)"""
+    non_champion_matcher = compile_keywords(tuple(non_champion_keywords))
     filtered_champions_data = {}
     for name_key, champion_data in champions_data.items():
-        name_lower = champion_data['name'].lower()
-        
         # Check if the name contains any non-champion keywords
-        is_non_champion = False
-        for keyword in non_champion_keywords:
-            if keyword in name_lower:
-                is_non_champion = True
-                break
-        
-        # Also check if the tier is 'Information' but the name suggests it's not a real champion
-        if not is_non_champion and champion_data['tier'] == 'Information':
-            # If it's from the information tier but doesn't have obvious non-champion keywords,
-            # we might still want to check if it's a real champion based on other factors
-            # For now, we'll keep it unless we're sure it's a non-champion
-            pass
-        
-        if not is_non_champion:
+        if not non_champion_matcher.contains_any(champion_data['name'].lower()):
             filtered_champions_data[name_key] = champion_data
 
-    # Save to JSON file
-    with open('champions_database.json', 'w', encoding='utf-8') as f:
-        json.dump(filtered_champions_data, f, indent=2, ensure_ascii=False)
-    
+    return filtered_champions_data
+
+
+def attach_sources(champions_data, merged, *parsed_sources, source_names):
+    """Stage: give every champion a per-source record {source: {class, tier, rank, rating, type}}.
+
+    The ranking and BG sheets are read off the merged champion itself. Extra
+    sources are matched by name, then through the confirmed BG -> ranking
+    pairings, then by name with punctuation and spaces removed.
+    """
+    # BG names that were paired with each ranking name
+    paired_names = {}
+    for bg_name, pairing in merged["pairings"].items():
+        paired_names.setdefault(pairing["ranking_name"], []).append(bg_name)
+
+    extra_sources = []
+    for name, parsed in zip(source_names, parsed_sources):
+        entries = parsed["entries"]
+        compact = {compact_name(name_key): entry for name_key, entry in entries.items()}
+        extra_sources.append((name, entries, compact))
+
+    champions_data = copy.deepcopy(champions_data)
+    for name_key, champion in champions_data.items():
+        sources = {}
+        for entry in champion["provenance"]:
+            if entry["sheet"] == "rankings":
+                sources["rankings"] = {"class": champion["class"], "tier": champion["tier"], "rank": champion["rank"]}
+            elif entry["sheet"] == "battlegrounds":
+                sources["battlegrounds"] = {"class": entry["class"], "rating": champion["battlegrounds_rating"],
+                                            "type": champion["battlegrounds_type"]}
+
+        for name, entries, compact in extra_sources:
+            entry = entries.get(name_key)
+            for bg_name in paired_names.get(name_key, ()):
+                entry = entry or entries.get(bg_name)
+            entry = entry or compact.get(compact_name(name_key))
+            if entry:
+                sources[name] = source_summary(entry)
+
+        champion["sources"] = sources
+
+    return champions_data
+
+
+def compact_name(name):
+    """A champion name with only its letters and digits, for matching names written differently"""
+    return "".join(char for char in name.lower() if char.isalnum())
+
+
+def write_database(champions_data, path):
+    """Stage: save the database JSON file"""
+    data = json.dumps(champions_data, indent=2, ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+    # The search index sidecar is tied to exactly these bytes
+    return {"path": path, "champions": len(champions_data), "sha256": content_hash(data)}
+
+
+def build_search_artifacts(champions_data, database):
+    """Stage: precompute the bot's search structures (see utils/search_index.py) for the written database"""
+    return build_search_index(champions_data, database["sha256"])
+
+
+# What the cacheable stages call besides their own function; the source of each is part of the stage's
+# cache key (Stage.helpers), so a change to the cell tokenizer or the name matching reruns the stages using it
+PARSE_HELPERS = (iter_sheet_rows, utils.sources, utils.sheet_layout, utils.sheet_stream, utils.cell_tokenizer,
+                 utils.keyword_matcher)
+MERGE_HELPERS = (attach_battlegrounds, name_similarity, known_pairing, name_hash)
+
+
+def build_stages(cache_dir=BUILD_CACHE_DIR, database_file=DATABASE_FILE, name_map_file=NAME_MAP_FILE,
+                 name_review_file=NAME_REVIEW_FILE, sheet_format=SHEET_FORMAT, extra_sources=None,
+                 shards=SHARD_OUTPUT, sheet_urls=None):
+    """The build as a DAG of stages; each stage's config is part of its cache key.
+
+    Every source is fetched and parsed by its own pair of stages, so they run in
+    parallel and an unchanged source is served from the cache. sheet_urls maps
+    source names ("battlegrounds", "rankings", extra sources) to URLs that
+    replace the live ones, e.g. file:// URLs of recorded sheets.
+    """
+    sheet_urls = sheet_urls or {}
+    raw_dir = f"{cache_dir}/raw"
+    fetch_config = {"raw_dir": raw_dir, "sheet_format": sheet_format}
+    extra_sources = EXTRA_SOURCES if extra_sources is None else extra_sources
+    layout_specs = load_layout_specs()
+
+    source_stages = []
+    seen_names = {"battlegrounds", "rankings"}
+    for spec in extra_sources:
+        name = spec["name"]
+        if name in seen_names:
+            raise ValueError(f"Duplicate tier-list source name '{name}'")
+        seen_names.add(name)
+        source_stages += [
+            Stage(f"fetch_source_{name}", fetch_sheet, config={"url": sheet_urls.get(name, spec["url"]), **fetch_config},
+                  cacheable=False),
+            Stage(f"parse_source_{name}", parse_source, inputs=(f"fetch_source_{name}",),
+                  config={"name": name, "layout_name": spec["layout"], "layout": layout_specs[spec["layout"]],
+                          "header_keywords": HEADER_KEYWORDS}, helpers=PARSE_HELPERS),
+        ]
+    # Symbol overrides only patch up the CSV export; the XLSX export keeps the symbols
+    symbol_overrides = KNOWN_CHAMPION_SYMBOLS if sheet_format == "csv" else {}
+    shard_stages = [
+        Stage("write_shards", write_shards, inputs=("attach_sources", "write"),
+              config={"directory": shards_dir(database_file)}, cacheable=False),
+    ] if shards else []
+    return [
+        Stage("fetch_battlegrounds", fetch_sheet,
+              config={"url": sheet_urls.get("battlegrounds", VEGA_BGS_URL), **fetch_config}, cacheable=False),
+        Stage("fetch_rankings", fetch_sheet,
+              config={"url": sheet_urls.get("rankings", GENERAL_RANKINGS_URL), **fetch_config}, cacheable=False),
+        Stage("parse_battlegrounds", parse_battlegrounds, inputs=("fetch_battlegrounds",),
+              config={"layout": BATTLEGROUNDS_LAYOUT}, helpers=PARSE_HELPERS, version=4),
+        Stage("parse_rankings", parse_rankings, inputs=("fetch_rankings",),
+              config={"header_keywords": HEADER_KEYWORDS, "known_champion_symbols": symbol_overrides,
+                      "layout": RANKINGS_LAYOUT}, helpers=PARSE_HELPERS, version=4),
+        *source_stages,
+        Stage("load_name_map", load_name_map, config={"path": name_map_file}, cacheable=False),
+        Stage("merge", merge_battlegrounds, inputs=("parse_battlegrounds", "parse_rankings", "load_name_map"),
+              config={"known_variations": KNOWN_NAME_VARIATIONS, "shared_terms": SHARED_NAME_TERMS,
+                      "match_threshold": NAME_MATCH_THRESHOLD}, helpers=MERGE_HELPERS, version=2),
+        Stage("save_name_map", save_name_map, inputs=("merge",),
+              config={"path": name_map_file, "review_path": name_review_file}, cacheable=False),
+        Stage("add_battlegrounds_only", add_battlegrounds_only, inputs=("merge",),
+              config={"classes": RANKINGS_LAYOUT["classes"]}),
+        Stage("filter", filter_non_champions, inputs=("add_battlegrounds_only",),
+              config={"non_champion_keywords": NON_CHAMPION_KEYWORDS}, helpers=(utils.keyword_matcher,)),
+        Stage("attach_sources", attach_sources,
+              inputs=("filter", "merge", *(f"parse_source_{spec['name']}" for spec in extra_sources)),
+              config={"source_names": [spec["name"] for spec in extra_sources]},
+              helpers=(compact_name, utils.sources)),
+        Stage("write", write_database, inputs=("attach_sources",), config={"path": database_file}, cacheable=False),
+        Stage("search_index", build_search_artifacts, inputs=("attach_sources", "write"),
+              helpers=(utils.search_index,)),
+        Stage("write_search_index", write_search_index, inputs=("search_index",),
+              config={"path": sidecar_path(database_file)}, cacheable=False),
+        *shard_stages,
+    ]
+
+
+def print_build_summary(champions_data, unmatched_bg_data):
+    """Print a few sample entries so a build can be eyeballed"""
     print(f"Database built successfully! Contains {len(champions_data)} champions.")
-    
+
     # Check if there are any champions with battlegrounds data
     print(f"\nSample entries from the database:")
     bg_count = 0
     no_bg_count = 0
-    
+
     for champ_name, champ_data in champions_data.items():
         if bg_count < 3 and champ_data['battlegrounds_rating'] is not None:  # Print first 3 with BG data
             print(f"\n{champ_name.title()}:")
@@ -532,18 +572,56 @@ def build_champion_database():
             continue
         elif bg_count >= 3 and no_bg_count >= 2:
             break
-    
+
     # Check if any champions have battlegrounds data
     champs_with_bg = [name for name, data in champions_data.items() if data['battlegrounds_rating'] is not None]
     print(f"\nTotal champions with battlegrounds data: {len(champs_with_bg)}")
-    
+
     if champs_with_bg:
         print("Some champions with BG data:", champs_with_bg[:5])  # First 5
     else:
         print("No champions found with battlegrounds data. Checking battlegrounds lookup table...")
-        print("First few entries in battlegrounds lookup:", list(battlegrounds_data.items())[:5])
-    
+        print("First few entries in battlegrounds lookup:", list(unmatched_bg_data.items())[:5])
+
+
+def build_champion_database(cache_dir=BUILD_CACHE_DIR, report_path=BUILD_REPORT_FILE, use_cache=True,
+                            sheet_format=SHEET_FORMAT, max_workers=BUILD_WORKERS, shards=SHARD_OUTPUT):
+    """Build a comprehensive JSON database by combining data from both sheets.
+
+    Each stage's output is cached under cache_dir keyed by its config and the
+    content of its inputs, so unchanged sheets and settings skip straight to
+    the cached result. A per-stage timing/size report is written to report_path.
+    """
+    build = StagedBuild(cache_dir=cache_dir, use_cache=use_cache, max_workers=max_workers)
+    outputs = build.run(build_stages(cache_dir, sheet_format=sheet_format, shards=shards), report_path=report_path)
+
+    champions_data = outputs["add_battlegrounds_only"]
+    print_build_summary(champions_data, outputs["merge"]["unmatched"])
+
+    sections = outputs["parse_battlegrounds"]["sections"]
+    print("\nBG sections start at rows: " + ", ".join(f"{name} {row}" for name, row in sections.items()))
+
+    for spec in EXTRA_SOURCES:
+        name = spec["name"]
+        entries = outputs[f"parse_source_{name}"]["entries"]
+        matched = sum(1 for champion in outputs["attach_sources"].values() if name in champion["sources"])
+        print(f"{spec.get('label', name)}: {matched} of {len(entries)} entries matched to champions")
+
+    if shards:
+        manifest = outputs["write_shards"]
+        print(f"Wrote {len(manifest['shards'])} class shards to {shards_dir(DATABASE_FILE)}/")
+
+    review = outputs["merge"]["review"]
+    if review:
+        print(f"\n{len(review)} low-confidence name pairings were not applied; see {NAME_REVIEW_FILE}")
+
+    print(f"\nStage timings (full report in {report_path}):")
+    for stage in build.report["stages"]:
+        status = "cached" if stage["cached"] else "ran"
+        print(f"  {stage['stage']:<24} {status:<7} {stage['seconds']:>8.3f}s {stage['bytes']:>10} bytes")
+
     return champions_data
 
 if __name__ == "__main__":
-    build_champion_database()
\ No newline at end of file
+    build_champion_database(sheet_format="xlsx" if "--xlsx" in sys.argv[1:] else SHEET_FORMAT,
+                            shards="--shards" in sys.argv[1:] or SHARD_OUTPUT)
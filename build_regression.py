@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Golden-fixture regression and timing harness for build_database.py
+
+Runs the full staged build offline against sheets recorded under
+tests/fixtures/sheets/, diffs the database it produces against
+tests/fixtures/golden_database.json field by field, and appends the wall time,
+peak memory and per-stage timings to build_history.json. Stages run one at a
+time and every timing is the best of a few builds, so numbers are comparable
+between runs. A run whose wall time, peak memory or any stage is above the
+median of the previous runs by more than the threshold is flagged as a
+regression.
+
+    python build_regression.py                  # check output and timings
+    python build_regression.py --threshold 0.5  # allow 50% before flagging
+    python build_regression.py --update-golden  # accept the current output
+    python build_regression.py --record         # re-record the fixtures from the live sheets
+
+Exits with status 1 when the output differs from the golden file or a
+regression is flagged.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import build_database
+from utils.build_pipeline import StagedBuild, content_hash
+from utils.sheet_stream import iter_url_chunks
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures", "sheets")
+GOLDEN_FILE = os.path.join(os.path.dirname(FIXTURES_DIR), "golden_database.json")
+HISTORY_FILE = "build_history.json"
+
+# Slowdown (as a fraction of the baseline) that counts as a regression
+DEFAULT_THRESHOLD = 0.25
+# Baseline is the median of this many previous runs
+BASELINE_RUNS = 5
+# Builds per run; each timing is the fastest of them
+REPEATS = 3
+# Timing differences smaller than this are noise, whatever the percentage
+MIN_DELTA_SECONDS = 0.005
+
+
+def fixture_urls(fixtures_dir=FIXTURES_DIR):
+    """file:// URL of the recorded sheet for every source that has one (<source name>.csv)"""
+    names = ["battlegrounds", "rankings"] + [spec["name"] for spec in build_database.EXTRA_SOURCES]
+    urls = {}
+    for name in names:
+        path = Path(fixtures_dir, f"{name}.csv").resolve()
+        if path.exists():
+            urls[name] = path.as_uri()
+    return urls
+
+
+def record_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Download the live sheets into fixtures_dir"""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    live = {"battlegrounds": build_database.VEGA_BGS_URL, "rankings": build_database.GENERAL_RANKINGS_URL}
+    live.update({spec["name"]: spec["url"] for spec in build_database.EXTRA_SOURCES})
+    for name, url in live.items():
+        path = os.path.join(fixtures_dir, f"{name}.csv")
+        with open(path, 'wb') as f:
+            for chunk in iter_url_chunks(url):
+                f.write(chunk)
+        print(f"Recorded {name} -> {path}")
+
+
+def run_offline_build(fixtures_dir=FIXTURES_DIR, trace_memory=False):
+    """Build from the recorded sheets in a scratch directory; returns (database, report, seconds, peak bytes)"""
+    urls = fixture_urls(fixtures_dir)
+    missing = {"battlegrounds", "rankings"} - set(urls)
+    if missing:
+        raise FileNotFoundError(f"No recorded sheet for {', '.join(sorted(missing))} in {fixtures_dir}")
+    # Extra sources without a recording are left out rather than fetched live
+    extra_sources = [spec for spec in build_database.EXTRA_SOURCES if spec["name"] in urls]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_file = os.path.join(tmp, "champions_database.json")
+        stages = build_database.build_stages(
+            cache_dir=os.path.join(tmp, "cache"), database_file=database_file,
+            name_map_file=os.path.join(tmp, "name_map.json"), name_review_file=os.path.join(tmp, "name_review.json"),
+            sheet_format="csv", extra_sources=extra_sources, shards=False, sheet_urls=urls)
+        # One stage at a time, so a stage's time isn't inflated by the ones running next to it
+        build = StagedBuild(cache_dir=os.path.join(tmp, "cache"), use_cache=False, max_workers=1)
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        build.run(stages)
+        seconds = time.perf_counter() - started
+        peak = 0
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        with open(database_file, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+    return database, build.report, seconds, peak
+
+
+def diff_databases(golden, produced):
+    """Field-by-field differences between two databases, as readable lines"""
+    differences = []
+    for name_key in golden:
+        if name_key not in produced:
+            differences.append(f"- {name_key}: missing")
+    for name_key in produced:
+        if name_key not in golden:
+            differences.append(f"+ {name_key}: new champion")
+    for name_key, expected in golden.items():
+        actual = produced.get(name_key)
+        if actual is None:
+            continue
+        for field in list(expected) + [field for field in actual if field not in expected]:
+            if expected.get(field) != actual.get(field):
+                differences.append(f"~ {name_key}.{field}: {expected.get(field)!r} -> {actual.get(field)!r}")
+    if not differences and list(golden) != list(produced):
+        differences.append("~ champion order changed")
+    return differences
+
+
+def find_regressions(run, history, threshold=DEFAULT_THRESHOLD):
+    """Measurements of run that are more than threshold above the median of the last BASELINE_RUNS runs"""
+    previous = history[-BASELINE_RUNS:]
+    if not previous:
+        return []
+    measures = {"wall seconds": lambda entry: entry["seconds"], "peak MB": lambda entry: entry["peak_mb"]}
+    for stage in run["stages"]:
+        measures[f"stage {stage}"] = lambda entry, stage=stage: entry["stages"].get(stage)
+    timings = {label for label in measures if label != "peak MB"}
+
+    regressions = []
+    for label, value_of in measures.items():
+        baseline_values = [value_of(entry) for entry in previous if value_of(entry) is not None]
+        if not baseline_values:
+            continue
+        baseline = statistics.median(baseline_values)
+        value = value_of(run)
+        if label in timings and value - baseline < MIN_DELTA_SECONDS:
+            continue
+        if baseline and value > baseline * (1 + threshold):
+            regressions.append(f"{label}: {value:.4f} vs baseline {baseline:.4f} (+{value / baseline - 1:.0%})")
+    return regressions
+
+
+def load_history(path=HISTORY_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["runs"]
+    except FileNotFoundError:
+        return []
+
+
+def save_history(runs, path=HISTORY_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"runs": runs}, f, indent=2)
+
+
+def current_commit():
+    """Short hash of the checked-out commit, if this is a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline build against recorded sheets, diffed against a golden file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown over the baseline that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--update-golden", action="store_true", help="save the produced database as the golden file")
+    parser.add_argument("--record", action="store_true", help="re-record the fixtures from the live sheets first")
+    parser.add_argument("--history", default=HISTORY_FILE, help="where run measurements are kept")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures()
+
+    # Timings from untraced builds (tracemalloc slows allocation-heavy code down), memory from a traced one
+    builds = [run_offline_build() for _ in range(REPEATS)]
+    traced_database, _, _, peak = run_offline_build(trace_memory=True)
+    database = builds[0][0]
+    if any(other[0] != database for other in builds[1:]) or traced_database != database:
+        print("Offline builds from the same fixtures produced different databases")
+        return 1
+    seconds = min(seconds for _, _, seconds, _ in builds)
+    stage_seconds = {}
+    for _, report, _, _ in builds:
+        for stage in report["stages"]:
+            stage_seconds[stage["stage"]] = min(stage_seconds.get(stage["stage"], stage["seconds"]), stage["seconds"])
+
+    if args.update_golden:
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(database, f, indent=2, ensure_ascii=False)
+        print(f"Saved {len(database)} champions to {os.path.relpath(GOLDEN_FILE)}")
+
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    differences = diff_databases(golden, database)
+    golden_name = os.path.relpath(GOLDEN_FILE)
+
+    run = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": current_commit(),
+        "seconds": round(seconds, 4),
+        "peak_mb": round(peak / (1024 * 1024), 3),
+        "stages": stage_seconds,
+        "database_sha256": content_hash(json.dumps(database, ensure_ascii=False).encode('utf-8')),
+        "differences": len(differences),
+    }
+    history = load_history(args.history)
+    regressions = find_regressions(run, history, args.threshold)
+    save_history(history + [run], args.history)
+
+    print(f"Offline build: {len(database)} champions in {seconds:.3f}s, peak {run['peak_mb']:.2f} MB")
+    for stage, stage_time in stage_seconds.items():
+        print(f"  {stage:<24} {stage_time:>8.4f}s")
+    if differences:
+        print(f"\n{len(differences)} differences from {golden_name}:")
+        for line in differences[:50]:
+            print(f"  {line}")
+    else:
+        print(f"\nOutput matches {golden_name}")
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%} of the last {min(len(history), BASELINE_RUNS)} runs:")
+        for line in regressions:
+            print(f"  {line}")
+    return 1 if differences or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class Champion:
@@ -12,10 +12,13 @@ class Champion:
     special_notes: str = ""
     source: str = ""
     battlegrounds_type: Optional[str] = None  # Added battlegrounds type (e.g., Attacker, Defender, Dual Threat)
+    sources: Dict[str, dict] = None  # What each tier list says: {"rankings": {"tier": ..., "rank": ...}, ...}
     
     def __post_init__(self):
         if self.symbols is None:
             self.symbols = []
+        if self.sources is None:
+            self.sources = {}
 
 @dataclass
 class ChampionRecommendation:
@@ -1,9 +1,19 @@
 import discord
+from discord import app_commands
 from discord.ext import commands
 from data_manager_json import DataManager
 from champion_model import Champion
+import asyncio
+import json
 import logging
 import re
+import time
+from typing import List, Optional, Tuple
+from utils.admission import AdmissionController, Overloaded
+from utils.metrics import metrics
+from utils.offload import map_chunked, run_blocking
+from utils.response_cache import ResponseCache
+from utils.tracing import annotate, span, traced, tracer
 from difflib import get_close_matches, SequenceMatcher
 
 class CommandHandler:
@@ -11,6 +21,13 @@ class CommandHandler:
     
     def __init__(self, data_manager: DataManager):
         self.data_manager = data_manager
+        # Finished replies of the async variants, emptied whenever the data version changes
+        self.responses = ResponseCache()
+        # Per-user and per-guild rate limits and the bulk queue, for replies that have to be computed
+        self.admission = AdmissionController()
+        metrics.gauge("mcoc_bulk_queue_depth", lambda: self.admission.bulk_queued)
+        # (data version, request key) -> task computing that reply, for identical requests to share
+        self._in_flight = {}
     
 
     
@@ -72,8 +89,10 @@ class CommandHandler:
 
     def get_champion_rankup_info(self, name: str) -> str:
         """Get specific rankup information for a champion"""
-        champions = self.data_manager.get_champion_by_name(name)
-        
+        return self.rankup_info_for(name, self.data_manager.get_champion_by_name(name))
+
+    def rankup_info_for(self, name: str, champions: List[Champion]) -> str:
+        """The rank-up info reply for the champions a name matched"""
         if not champions:
             return f"Sorry, I couldn't find information about '{name}'. Please check the spelling and try again."
         
@@ -141,77 +160,368 @@ class CommandHandler:
         
         return response
 
+    def split_names(self, champion_names: str) -> List[str]:
+        """Split a comma-separated list of champion names"""
+        return [name.strip() for name in champion_names.split(',')]
+
+    def resolve_champion(self, name: str) -> Optional[Champion]:
+        """The closest match for a name, or None (a full fuzzy scan when the name is misspelled)"""
+        found_champs = self.data_manager.get_champion_by_name(name)
+        metrics.inc("mcoc_champion_resolutions_total", {"result": "found" if found_champs else "not_found"})
+        # If multiple matches are found, use the first one
+        return found_champs[0] if found_champs else None
+
+    @staticmethod
+    def request_key(command: str, *args) -> tuple:
+        """A request as typed, with case and spacing normalized"""
+        return (command,) + tuple(" ".join(str(arg).lower().split()) for arg in args)
+
+    @staticmethod
+    def champion_id(champion: Champion) -> tuple:
+        return (champion.source, champion.name)
+
+    @staticmethod
+    def canonical_ids(ids: List[tuple], scores: List) -> tuple:
+        """ids sorted when the reply can't depend on their order (every score differs, so ranking
+        them leaves no ties for the input order to break), otherwise in the order given"""
+        return tuple(sorted(ids)) if len(set(scores)) == len(scores) else tuple(ids)
+
+    async def _cached_reply(self, request_key: tuple, names: int, requester: tuple, resolve, canonical_key,
+                            render) -> str:
+        """A reply from the response cache, from an identical request already running, or computed.
+
+        Cache hits and requests that join a running twin are free; anything
+        that has to be computed is admitted first (per-user and per-guild
+        token buckets, and a bounded queue for bulk requests), which raises
+        Overloaded when it can't be. requester is (user id, guild id).
+        """
+        version = self.data_manager.data_version()
+        entry = self.responses.lookup(request_key, version)
+        if entry is not None:
+            self.responses.record(True, entry[1])
+            annotate(cache="hit")
+            return entry[0]
+        flight_key = (version, request_key)
+        running = self._in_flight.get(flight_key)
+        if running is not None:
+            metrics.inc("mcoc_coalesced_total")
+            annotate(cache="coalesced")
+            return await asyncio.shield(running)
+
+        annotate(cache="miss")
+        lane = self.admission.admit(*requester, names)
+        annotate(lane=lane)
+        task = asyncio.ensure_future(self._compute_reply(version, request_key, lane, resolve, canonical_key, render))
+        self._in_flight[flight_key] = task
+
+        def finished(_):
+            self._in_flight.pop(flight_key, None)
+            self.admission.release(lane)
+
+        task.add_done_callback(finished)
+        # The computation carries on for the requests that joined it if this one is cancelled
+        return await asyncio.shield(task)
+
+    async def _compute_reply(self, version, request_key: tuple, lane: str, resolve, canonical_key, render) -> str:
+        """Resolve and render a reply in the lane's command pool and cache it.
+
+        The reply is cached under the request as typed and under its
+        canonical form (resolved champions), so "!pick 2 krog, tigra" and
+        "!pick 2 Tigra, Korg" share one rendered reply. Both keys are tied to
+        the data version. The CPU time the pool threads spend on a reply is
+        what a later hit saves.
+        """
+        cpu_seconds = [0.0, 0.0]  # resolving, rendering
+
+        def timed(func, slot):
+            def run(*args):
+                started = time.thread_time()
+                try:
+                    return func(*args)
+                finally:
+                    cpu_seconds[slot] += time.thread_time() - started
+            return run
+
+        # Spans here go to the trace of the request that started the computation
+        with span("resolve"):
+            resolved = await resolve(lambda func: timed(func, 0), lane)
+        with span("canonical_key"):
+            key = canonical_key(resolved)
+        entry = self.responses.lookup(key, version)
+        if entry is not None:
+            reply, cpu_seconds[1] = entry
+            self.responses.record(True, cpu_seconds[1])
+            annotate(render="cached")
+        else:
+            with span("render"):
+                reply = await run_blocking(timed(render, 1), resolved, lane=lane)
+            self.responses.record(False)
+        # A refresh landed while this was computed: the reply may mix both versions, so don't keep it
+        if self.data_manager.data_version() == version:
+            self.responses.put(key, version, reply, cpu_seconds[1])
+            self.responses.put(request_key, version, reply, sum(cpu_seconds))
+        return reply
+
+    async def get_champion_rankup_info_async(self, name: str, user_id=None, guild_id=None) -> str:
+        """get_champion_rankup_info in the command pool, off the event loop"""
+        async def resolve(timed, lane):
+            return await run_blocking(timed(self.data_manager.get_champion_by_name), name, lane=lane)
+
+        # Keyed as typed rather than with request_key: a miss quotes the name, so "TORCH" can't reuse the reply
+        # to "torch". Other spellings of a champion that is found still share its reply through rankup_key.
+        return await self._cached_reply(("rankup", name), 1, (user_id, guild_id), resolve,
+                                        lambda champions: self.rankup_key(name, champions),
+                                        lambda champions: self.rankup_info_for(name, champions))
+
+    async def compare_champions_async(self, champion_names: str, user_id=None, guild_id=None) -> str:
+        """compare_champions with the lookups and scoring in the command pool, off the event loop"""
+        with span("parse"):
+            names = self.split_names(champion_names)
+
+        async def resolve(timed, lane):
+            return await map_chunked(timed(self.resolve_champion), names, lane=lane)
+
+        return await self._cached_reply(self.request_key("compare", *names), len(names), (user_id, guild_id),
+                                        resolve, lambda found: self.compare_key(names, found),
+                                        lambda found: self.compare_resolved_champions(names, found))
+
+    async def pick_champions_for_battlegrounds_async(self, count: int, champion_names: str, user_id=None,
+                                                     guild_id=None) -> str:
+        """pick_champions_for_battlegrounds with the lookups and scoring in the command pool, off the event loop"""
+        with span("parse"):
+            names = self.split_names(champion_names)
+
+        async def resolve(timed, lane):
+            # Names that aren't found are left out of the picks
+            found = await map_chunked(timed(self.resolve_champion), names, lane=lane)
+            return [champion for champion in found if champion]
+
+        return await self._cached_reply(self.request_key("pick", count, *names), len(names), (user_id, guild_id),
+                                        resolve, lambda champions: self.pick_key(count, champions),
+                                        lambda champions: self.pick_resolved_champions(count, champions))
+
+    def rankup_key(self, name: str, champions: List[Champion]) -> tuple:
+        """The canonical form of a lookup: the champions it matched"""
+        if not champions:
+            # Case kept: the reply quotes the name as typed
+            return ("rankup-missing", name)
+        return ("rankup", tuple(self.champion_id(champion) for champion in champions))
+
+    def compare_key(self, names: List[str], found: List[Optional[Champion]]) -> tuple:
+        """The canonical form of a comparison: the champions compared"""
+        # Names that aren't found are compared as written (title case)
+        champions = [champion or self.default_champion(name) for name, champion in zip(names, found)]
+        return ("compare",) + self.canonical_ids([self.champion_id(champion) for champion in champions],
+                                                 [self.comparison_score(champion) for champion in champions])
+
+    def pick_key(self, count: int, champions: List[Champion]) -> tuple:
+        """The canonical form of a pick: how many, out of which champions"""
+        ids = [self.champion_id(champion) for champion in champions]
+        scores = [self.battlegrounds_score(champion) for champion in champions]
+        return ("pick", count) + self.canonical_ids(ids, scores)
+
+    @staticmethod
+    def champion_class(champion: Champion) -> Optional[str]:
+        """The class in a champion's class ranking ("Mystic #1" -> "Mystic"), None when unranked"""
+        if champion.category and '#' in champion.category:
+            return champion.category.split('#')[0].strip()
+        return None
+
+    def champion_json(self, champion: Champion) -> dict:
+        """A champion as the query API returns it"""
+        return {
+            "name": champion.name,
+            "class": self.champion_class(champion),
+            "category": champion.category,
+            "tier": champion.tier,
+            "rating": champion.rating,
+            "battlegrounds_type": champion.battlegrounds_type,
+            "symbols": champion.symbols,
+            "source": champion.source,
+            "sources": champion.sources,
+        }
+
+    async def champion_json_async(self, name: str, user_id=None, guild_id=None) -> str:
+        """The champions a name matches, as the query API's JSON body.
+
+        Like the other *_json_async methods this shares the bot's response
+        cache, in-flight requests and admission control. Bodies are cached
+        under the canonical key too, so they never echo the request as typed.
+        """
+        async def resolve(timed, lane):
+            return await run_blocking(timed(self.data_manager.get_champion_by_name), name, lane=lane)
+
+        return await self._cached_reply(
+            self.request_key("json-champion", name), 1, (user_id, guild_id), resolve,
+            lambda champions: ("json",) + self.rankup_key(name, champions),
+            lambda champions: json.dumps({"champions": [self.champion_json(champion) for champion in champions]}))
+
+    async def compare_json_async(self, names: List[str], user_id=None, guild_id=None) -> str:
+        """!rankup's comparison of names as the query API's JSON body: the ranking and the advice"""
+        async def resolve(timed, lane):
+            return await map_chunked(timed(self.resolve_champion), names, lane=lane)
+
+        def render(found):
+            ranking = self.ranked_comparison(names, found)
+            return json.dumps({
+                "ranking": [{"champion": self.champion_json(champion), "found": champion.source != "default",
+                             "score": score} for champion, score in ranking],
+                "recommendation": self.comparison_recommendation(ranking).replace("**", ""),
+            })
+
+        return await self._cached_reply(self.request_key("json-compare", *names), len(names), (user_id, guild_id),
+                                        resolve, lambda found: ("json",) + self.compare_key(names, found), render)
+
+    async def pick_json_async(self, count: int, names: List[str], user_id=None, guild_id=None) -> str:
+        """!pick's picks as the query API's JSON body; names that aren't found are left out"""
+        async def resolve(timed, lane):
+            found = await map_chunked(timed(self.resolve_champion), names, lane=lane)
+            return [champion for champion in found if champion]
+
+        def render(champions):
+            return json.dumps({"picks": [{"champion": self.champion_json(champion), "score": score,
+                                          "has_bg_rating": has_bg_rating}
+                                         for champion, score, has_bg_rating in self.ranked_picks(count, champions)]})
+
+        return await self._cached_reply(self.request_key("json-pick", count, *names), len(names),
+                                        (user_id, guild_id), resolve,
+                                        lambda champions: ("json",) + self.pick_key(count, champions), render)
+
+    def top_json(self, class_name: Optional[str], source: str, limit: int) -> str:
+        """The best champions of a view (optionally of one class) as the query API's JSON body; cached,
+        and cheap enough to compute on the event loop"""
+        key = self.request_key("json-top", class_name or "", source, limit)
+        version = self.data_manager.data_version()
+        body = self.responses.get(key, version)
+        if body is None:
+            started = time.thread_time()
+            # The whole view (sorted when the data is loaded), then this class's best
+            champions = self.data_manager.get_top_champions_by_tier(source, limit=None)
+            if class_name:
+                champions = [champion for champion in champions
+                             if (self.champion_class(champion) or "").lower() == class_name.lower()]
+            body = json.dumps({"champions": [self.champion_json(champion) for champion in champions[:limit]]})
+            self.responses.put(key, version, body, time.thread_time() - started)
+        return body
+
+    def comparison_score(self, champion: Champion) -> float:
+        """How a champion ranks in a !rankup comparison (higher is better)"""
+        # If this is a default champion (not found in database), give minimum score
+        if champion.source == "default":
+            rating_score = 5  # Default minimum
+            type_bonus = 0    # No type bonus for unknown champions
+            ranking_score = 5 # Default minimum ranking score (50 - high number = min 5)
+
+            total_score = rating_score + type_bonus + ranking_score
+            return total_score
+        else:
+            # Base score from battlegrounds rating (or 5 if no rating)
+            rating_score = champion.rating if champion.rating is not None else 5
+
+            # Add bonus based on battlegrounds type
+            type_bonus = 0
+            if champion.battlegrounds_type == "Attacker":
+                type_bonus = 1
+            elif champion.battlegrounds_type == "Dual Threat":
+                type_bonus = 2
+            # Defender gets no bonus
+
+            # Calculate class ranking score (50 - ranking number, with minimum of 5)
+            ranking_score = 5  # Default minimum for champions without ranking
+            if champion.category and '#' in champion.category:
+                try:
+                    # Extract the ranking number after the '#'
+                    ranking_part = champion.category.split('#')[1]
+                    # Only take the first part if there are additional words after the number
+                    ranking_num_str = ranking_part.split()[0] 
+                    ranking_num = int(ranking_num_str)
+                    ranking_score = max(5, 50 - ranking_num)
+                except (IndexError, ValueError):
+                    # If we can't parse the ranking, keep the default score of 5
+                    ranking_score = 5
+
+            # Total score is the sum of all components
+            total_score = rating_score + type_bonus + ranking_score
+
+            return total_score
+
+    def battlegrounds_score(self, champion: Champion) -> Tuple[float, bool]:
+        """(score, has a BG rating) for ranking a champion in !pick"""
+        # Focus on battlegrounds rating as the primary factor
+        if champion.rating is not None:
+            # Champions with battlegrounds ratings get priority
+            bg_score = champion.rating
+
+            # Boost Dual Threat champions by 1 point as requested
+            if champion.battlegrounds_type == "Dual Threat":
+                bg_score += 1
+
+            # Add a small bonus based on ranking for tie-breaking
+            ranking_bonus = 0
+            if champion.category and '#' in champion.category:
+                try:
+                    # Extract the ranking number after the '#'
+                    ranking_part = champion.category.split('#')[1]
+                    # Only take the first part if there are additional words after the number
+                    ranking_num_str = ranking_part.split()[0] 
+                    ranking_num = int(ranking_num_str)
+                    # Higher ranked champions get a small bonus (1st gets more than 10th, etc.)
+                    ranking_bonus = max(0, (50 - ranking_num) / 10)  # Scale down the bonus
+                except (IndexError, ValueError):
+                    # If we can't parse the ranking, no bonus
+                    ranking_bonus = 0
+
+            # Total score prioritizes battlegrounds rating first, then ranking
+            total_score = bg_score + ranking_bonus
+            return total_score, True  # True = has BG rating
+        else:
+            # Champions without battlegrounds ratings get a very low base score
+            # These are placeholder champions or champions not good enough for battlegrounds
+            total_score = 0.1  # Very low score so they appear at the bottom
+            return total_score, False  # False = no BG rating
+
     def compare_champions(self, champion_names: str) -> str:
         """Compare champions and provide analysis based on their ratings"""
         # Split the champion names by commas
-        names = [name.strip() for name in champion_names.split(',')]
-        
+        names = self.split_names(champion_names)
+        return self.compare_resolved_champions(names, [self.resolve_champion(name) for name in names])
+
+    def default_champion(self, name: str) -> Champion:
+        """Stand-in for a compared name that isn't in the tier list"""
+        # Create a default champion for champions not found in tier list
+        # These get the minimum possible score: rating=5, type bonus=0, ranking score=5 = total 10
+        return Champion(
+            name=name.title(),
+            tier="Information",
+            category="Not Ranked",
+            rating=None,
+            battlegrounds_type=None,
+            source="default"
+        )
+
+    @traced("score")
+    def ranked_comparison(self, names: List[str], found: List[Optional[Champion]]) -> List[Tuple[Champion, float]]:
+        """(champion, score) for compared names whose champions have been looked up (None where not
+        found), best first"""
         champions = []
         
         # Find each champion
-        for name in names:
-            found_champs = self.data_manager.get_champion_by_name(name)
-            if found_champs:
-                # If multiple matches are found, use the first one
-                champions.append(found_champs[0])
+        for name, found_champ in zip(names, found):
+            if found_champ is not None:
+                champions.append(found_champ)
             else:
-                # Create a default champion for champions not found in tier list
-                # These get the minimum possible score: rating=5, type bonus=0, ranking score=5 = total 10
-                from champion_model import Champion
-                default_champ = Champion(
-                    name=name.title(),
-                    tier="Information",
-                    category="Not Ranked",
-                    rating=None,
-                    battlegrounds_type=None,
-                    source="default"
-                )
-                champions.append(default_champ)
+                champions.append(self.default_champion(name))
         
         # Calculate scores for each champion for internal sorting
-        champion_scores = []
-        for champion in champions:
-            # If this is a default champion (not found in database), give minimum score
-            if champion.source == "default":
-                rating_score = 5  # Default minimum
-                type_bonus = 0    # No type bonus for unknown champions
-                ranking_score = 5 # Default minimum ranking score (50 - high number = min 5)
-                
-                total_score = rating_score + type_bonus + ranking_score
-                champion_scores.append((champion, total_score))
-            else:
-                # Base score from battlegrounds rating (or 5 if no rating)
-                rating_score = champion.rating if champion.rating is not None else 5
-                
-                # Add bonus based on battlegrounds type
-                type_bonus = 0
-                if champion.battlegrounds_type == "Attacker":
-                    type_bonus = 1
-                elif champion.battlegrounds_type == "Dual Threat":
-                    type_bonus = 2
-                # Defender gets no bonus
-                
-                # Calculate class ranking score (50 - ranking number, with minimum of 5)
-                ranking_score = 5  # Default minimum for champions without ranking
-                if champion.category and '#' in champion.category:
-                    try:
-                        # Extract the ranking number after the '#'
-                        ranking_part = champion.category.split('#')[1]
-                        # Only take the first part if there are additional words after the number
-                        ranking_num_str = ranking_part.split()[0] 
-                        ranking_num = int(ranking_num_str)
-                        ranking_score = max(5, 50 - ranking_num)
-                    except (IndexError, ValueError):
-                        # If we can't parse the ranking, keep the default score of 5
-                        ranking_score = 5
-                
-                # Total score is the sum of all components
-                total_score = rating_score + type_bonus + ranking_score
-                
-                champion_scores.append((champion, total_score))
+        champion_scores = [(champion, self.comparison_score(champion)) for champion in champions]
         
         # Sort by total score descending
         champion_scores.sort(key=lambda x: x[1], reverse=True)
+        return champion_scores
+
+    def compare_resolved_champions(self, names: List[str], found: List[Optional[Champion]]) -> str:
+        """The comparison for names whose champions have been looked up (None where not found)"""
+        champion_scores = self.ranked_comparison(names, found)
         
         # Format the comparison results without showing internal calculations
         response = "**Champion Comparison Analysis:**\n\n"
@@ -231,6 +541,13 @@ class CommandHandler:
                 response += f"   - Class Ranking: {champion.category}\n"
                 response += f"   - Tier: {champion.tier}\n\n"
         
+        response += self.comparison_recommendation(champion_scores)
+        
+        return response
+
+    def comparison_recommendation(self, champion_scores: List[Tuple[Champion, float]]) -> str:
+        """The closing advice of a comparison, from its (champion, score) ranking"""
+        response = ""
         # Determine recommendation based on score differences
         if len(champion_scores) == 1:
             # Only one champion - no comparison needed
@@ -273,53 +590,22 @@ class CommandHandler:
     def pick_champions_for_battlegrounds(self, count: int, champion_names: str) -> str:
         """Pick the best N champions for battlegrounds - streamlined for quick decisions"""
         # Split the champion names by commas
-        names = [name.strip() for name in champion_names.split(',')]
-        
-        champions = []
-        
+        names = self.split_names(champion_names)
         # Find each champion using the same fuzzy matching as the real implementation
-        for name in names:
-            found_champs = self.data_manager.get_champion_by_name(name)
-            if found_champs:
-                # If multiple matches are found, use the first one
-                champions.append(found_champs[0])
-            # Note: We intentionally skip champions not found rather than creating defaults
+        return self.pick_resolved_champions(count, [self.resolve_champion(name) for name in names])
+
+    @traced("score")
+    def ranked_picks(self, count: int, found: List[Optional[Champion]]) -> List[Tuple[Champion, float, bool]]:
+        """(champion, score, has a BG rating) for the best count champions among those looked up
+        (None where not found), best first"""
+        # Note: We intentionally skip champions not found rather than creating defaults
+        champions = [champion for champion in found if champion is not None]
         
         # Calculate battlegrounds-focused scores for each champion
         champion_scores = []
         for champion in champions:
-            # Focus on battlegrounds rating as the primary factor
-            if champion.rating is not None:
-                # Champions with battlegrounds ratings get priority
-                bg_score = champion.rating
-                
-                # Boost Dual Threat champions by 1 point as requested
-                if champion.battlegrounds_type == "Dual Threat":
-                    bg_score += 1
-                
-                # Add a small bonus based on ranking for tie-breaking
-                ranking_bonus = 0
-                if champion.category and '#' in champion.category:
-                    try:
-                        # Extract the ranking number after the '#'
-                        ranking_part = champion.category.split('#')[1]
-                        # Only take the first part if there are additional words after the number
-                        ranking_num_str = ranking_part.split()[0] 
-                        ranking_num = int(ranking_num_str)
-                        # Higher ranked champions get a small bonus (1st gets more than 10th, etc.)
-                        ranking_bonus = max(0, (50 - ranking_num) / 10)  # Scale down the bonus
-                    except (IndexError, ValueError):
-                        # If we can't parse the ranking, no bonus
-                        ranking_bonus = 0
-                
-                # Total score prioritizes battlegrounds rating first, then ranking
-                total_score = bg_score + ranking_bonus
-                champion_scores.append((champion, total_score, True))  # True = has BG rating
-            else:
-                # Champions without battlegrounds ratings get a very low base score
-                # These are placeholder champions or champions not good enough for battlegrounds
-                total_score = 0.1  # Very low score so they appear at the bottom
-                champion_scores.append((champion, total_score, False))  # False = no BG rating
+            total_score, has_bg_rating = self.battlegrounds_score(champion)
+            champion_scores.append((champion, total_score, has_bg_rating))
         
         # Sort by total score descending, but prioritize champions with battlegrounds ratings
         # Primary sort: has battlegrounds rating (True > False)
@@ -327,7 +613,11 @@ class CommandHandler:
         champion_scores.sort(key=lambda x: (x[2], x[1]), reverse=True)
         
         # Select the top N champions
-        selected_champions = champion_scores[:count] if count > 0 else champion_scores
+        return champion_scores[:count] if count > 0 else champion_scores
+
+    def pick_resolved_champions(self, count: int, found: List[Optional[Champion]]) -> str:
+        """The picks among champions that have been looked up (None where not found)"""
+        selected_champions = self.ranked_picks(count, found)
         
         # Format the results - streamlined for battlegrounds context
         if not selected_champions:
@@ -350,45 +640,128 @@ class MCOCCommands(commands.Cog):
         self.bot = bot
         self.command_handler = CommandHandler(data_manager)
         self.data_manager = data_manager
+        # Context -> perf_counter() when the command was invoked
+        self._invoked_at = {}
+        # Context -> the command's root span (utils/tracing.py), None when tracing is off
+        self._traces = {}
+
+    async def cog_before_invoke(self, ctx):
+        self._invoked_at[ctx] = time.perf_counter()
+        # The hooks and the command run in one task, so the trace is current for the whole command
+        self._traces[ctx] = tracer.start(f"!{ctx.command.name}", **self.requester(ctx))
+
+    async def cog_after_invoke(self, ctx):
+        started = self._invoked_at.pop(ctx, None)
+        if started is not None:
+            metrics.observe("mcoc_command_seconds", time.perf_counter() - started, {"command": ctx.command.name})
+        if ctx.command_failed:
+            metrics.inc("mcoc_command_errors_total", {"command": ctx.command.name})
+        tracer.finish(self._traces.pop(ctx, None), failed=ctx.command_failed)
     
+    @staticmethod
+    def requester(ctx) -> dict:
+        """Who a command is rate limited as"""
+        return {"user_id": ctx.author.id, "guild_id": ctx.guild.id if ctx.guild else None}
+
+    @staticmethod
+    async def reply_or_overloaded(reply) -> str:
+        """The reply, or why the command was turned away"""
+        try:
+            return await reply
+        except Overloaded as e:
+            return str(e)
+
+    @staticmethod
+    async def send(ctx, content: str):
+        """ctx.send, as the command's send span"""
+        with span("send", chars=len(content)):
+            await ctx.send(content)
+
     @commands.command(name='rankup')
     async def rankup_recommendations(self, ctx, *, champion_name: str = None):
         """Get rank-up recommendations (specific champion info if name provided)"""
+        annotate(args=champion_name)
         if champion_name:
             # Check if there are multiple champions to compare (comma-separated)
             if ',' in champion_name:
                 # If there are multiple champions, run the comparison
-                comparison_result = self.command_handler.compare_champions(champion_name)
-                await ctx.send(comparison_result)
+                comparison_result = await self.reply_or_overloaded(
+                    self.command_handler.compare_champions_async(champion_name, **self.requester(ctx)))
+                await self.send(ctx, comparison_result)
             else:
                 # If a single champion name is provided, give specific rankup info for that champion
-                info = self.command_handler.get_champion_rankup_info(champion_name)
-                await ctx.send(info)
+                info = await self.reply_or_overloaded(
+                    self.command_handler.get_champion_rankup_info_async(champion_name, **self.requester(ctx)))
+                await self.send(ctx, info)
         else:
             # Otherwise, show general rankup recommendations
             recommendations = self.command_handler.get_rankup_recommendations()
-            await ctx.send(recommendations)
+            await self.send(ctx, recommendations)
     
     @commands.command(name='pick')
     async def pick_battlegrounds_champions(self, ctx, *, args: str = None):
         """Pick the best N champions for battlegrounds from a list of champions"""
+        annotate(args=args)
         if not args:
-            await ctx.send("Usage: !pick N champion1, champion2, champion3, ...")
+            await self.send(ctx, "Usage: !pick N champion1, champion2, champion3, ...")
             return
         
         # Parse the arguments: first part should be the number, rest are champion names
         parts = args.split(" ", 1)
         if len(parts) < 2:
-            await ctx.send("Usage: !pick N champion1, champion2, champion3, ...")
+            await self.send(ctx, "Usage: !pick N champion1, champion2, champion3, ...")
             return
         
         try:
             count = int(parts[0])
             champion_names = parts[1]
         except ValueError:
-            await ctx.send("Usage: !pick N champion1, champion2, champion3, ... (where N is a number)")
+            await self.send(ctx, "Usage: !pick N champion1, champion2, champion3, ... (where N is a number)")
             return
         
         # Pick the champions using our new function
-        result = self.command_handler.pick_champions_for_battlegrounds(count, champion_names)
-        await ctx.send(result)
\ No newline at end of file
+        # Lookups run in the command pool so a long list of misspelled names doesn't stall the bot
+        result = await self.reply_or_overloaded(
+            self.command_handler.pick_champions_for_battlegrounds_async(count, champion_names, **self.requester(ctx)))
+        await self.send(ctx, result)
+
+    async def answer_interaction(self, interaction: discord.Interaction, command: str, args: str, reply):
+        """Send a slash command's reply, timed and traced like the prefix commands (as /command)"""
+        started = time.perf_counter()
+        trace = tracer.start(f"/{command}", user_id=interaction.user.id, guild_id=interaction.guild_id, args=args)
+        failed = False
+        try:
+            # Discord drops an interaction that isn't acknowledged within three seconds, and a long list of
+            # names can take longer; the reply follows the acknowledgement (the startup gate may have sent it)
+            if not interaction.response.is_done():
+                await interaction.response.defer()
+            content = await self.reply_or_overloaded(reply)
+            with span("send", chars=len(content)):
+                await interaction.followup.send(content)
+        except Exception:
+            failed = True
+            metrics.inc("mcoc_command_errors_total", {"command": f"/{command}"})
+            raise
+        finally:
+            metrics.observe("mcoc_command_seconds", time.perf_counter() - started, {"command": f"/{command}"})
+            tracer.finish(trace, failed=failed)
+
+    # Slash versions of the commands, for servers that prefer them and for GATEWAY_MODE=interactions,
+    # where the bot receives no messages at all
+    @app_commands.command(name='rankup', description='Rank-up advice for a champion, or compare several')
+    @app_commands.describe(champions='A champion, or several separated by commas to compare them')
+    async def rankup_slash(self, interaction: discord.Interaction, champions: str):
+        requester = {"user_id": interaction.user.id, "guild_id": interaction.guild_id}
+        if ',' in champions:
+            reply = self.command_handler.compare_champions_async(champions, **requester)
+        else:
+            reply = self.command_handler.get_champion_rankup_info_async(champions, **requester)
+        await self.answer_interaction(interaction, "rankup", champions, reply)
+
+    @app_commands.command(name='pick', description='Pick the best champions for battlegrounds from a list')
+    @app_commands.describe(count='How many champions to pick', champions='Champions separated by commas')
+    async def pick_slash(self, interaction: discord.Interaction, count: app_commands.Range[int, 1, 100],
+                         champions: str):
+        reply = self.command_handler.pick_champions_for_battlegrounds_async(
+            count, champions, user_id=interaction.user.id, guild_id=interaction.guild_id)
+        await self.answer_interaction(interaction, "pick", f"{count} {champions}", reply)
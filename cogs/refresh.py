@@ -0,0 +1,32 @@
+from discord.ext import commands
+from utils.refresh import RefreshScheduler
+import logging
+
+class RefreshCog(commands.Cog):
+    """Runs the scheduled data refresh and lets admins trigger one with !refresh"""
+
+    def __init__(self, bot, scheduler: RefreshScheduler):
+        self.bot = bot
+        self.scheduler = scheduler
+
+    async def cog_load(self):
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        self.scheduler.stop()
+
+    @commands.command(name='refresh')
+    @commands.has_permissions(administrator=True)
+    async def refresh(self, ctx):
+        """Reload champion data now (joins a refresh that is already running)"""
+        await ctx.send("Refreshing champion data...")
+        result = await self.scheduler.refresh()
+        await ctx.send(result.summary())
+
+    @refresh.error
+    async def refresh_error(self, ctx, error):
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("Only server administrators can refresh the data.")
+        else:
+            logging.error(f"Error in !refresh: {error}")
+            await ctx.send("Sorry, the refresh could not be started.")
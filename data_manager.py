@@ -1,19 +1,168 @@
-import requests
-import csv
-import io
-import re
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Dict, Optional
+import hashlib
 import logging
+import threading
+import time
 from champion_model import Champion
+from utils.cell_tokenizer import tokenize_cell
+from utils.keyword_matcher import pattern_matcher
+from utils.sheet_layout import sheet_layout
+from utils.metrics import metrics
+from utils.refresh import diff_champions
+from utils.sheet_stream import iter_csv_rows, iter_url_chunks, split_header
+from utils.tracing import annotate, traced
+
+# Live mode: data older than this is still served, but the next query starts a background refresh
+LIVE_MAX_AGE_SECONDS = 15 * 60
+# Longest wait for the sheet server to connect or send more data before a refresh gives up
+SHEET_TIMEOUT_SECONDS = 20
+
+
+@dataclass(frozen=True)
+class SheetSnapshot:
+    """The champions parsed from the sheets, replaced as a whole when a refresh succeeds"""
+    champions_data: Dict[str, List[Champion]] = field(default_factory=dict)
+    fetched_at: Dict[str, float] = field(default_factory=dict)  # source -> time.time() of its last good fetch
+    sheet_hashes: Dict[str, str] = field(default_factory=dict)  # source -> sha256 of the export it was parsed from
+
+
+def _hashed(chunks: Iterable[bytes], digest) -> Iterator[bytes]:
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
 
 class DataManager:
-    """Handles data retrieval and processing from public Google Sheets via web scraping"""
+    """Handles data retrieval and processing from public Google Sheets via web scraping.
+
+    fetch_champions_from_spreadsheets() blocks on the network. In live mode
+    (live=True or start_live()) queries never do: they answer from the last
+    good snapshot, and once it is older than max_age a worker thread refetches
+    the sheets and swaps the new snapshot in when parsing succeeds.
+    """
     
-    def __init__(self):
-        self.champions_data = {}
-        
+    def __init__(self, live: bool = False, max_age: float = LIVE_MAX_AGE_SECONDS,
+                 timeout: Optional[float] = SHEET_TIMEOUT_SECONDS):
+        self.snapshot = SheetSnapshot()
+        self.live = live
+        self.max_age = max_age
+        self.timeout = timeout
+        self.last_attempt: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Held while a refresh runs, so there is never more than one
+        self._refreshing = threading.Lock()
+        # Snapshot from prepare_refresh that still holds _refreshing until apply_refresh serves it
+        self._pending: Optional[SheetSnapshot] = None
+
+    @property
+    def champions_data(self) -> Dict[str, List[Champion]]:
+        return self.snapshot.champions_data
+
+    @champions_data.setter
+    def champions_data(self, champions_data: Dict[str, List[Champion]]):
+        now = time.time()
+        self.snapshot = SheetSnapshot(champions_data, {source: now for source in champions_data})
+
+    def data_age(self) -> Optional[float]:
+        """Seconds since the oldest source in the snapshot was fetched, or None before the first fetch"""
+        if not self.snapshot.fetched_at:
+            return None
+        return time.time() - min(self.snapshot.fetched_at.values())
+
+    def data_version(self) -> Optional[str]:
+        """Short hash of the sheet exports the snapshot was parsed from, or None before the first fetch"""
+        if not self.snapshot.sheet_hashes:
+            return None
+        combined = "".join(f"{source}:{digest}" for source, digest in sorted(self.snapshot.sheet_hashes.items()))
+        return hashlib.sha256(combined.encode()).hexdigest()[:12]
+
+    def status(self) -> Dict:
+        """How fresh the data is and what the last refresh did"""
+        now = time.time()
+        return {
+            "live": self.live,
+            "age_seconds": self.data_age(),
+            "source_ages": {source: now - fetched for source, fetched in self.snapshot.fetched_at.items()},
+            "champions": {source: len(champions) for source, champions in self.champions_data.items()},
+            "refreshing": self._refreshing.locked(),
+            "last_attempt": self.last_attempt,
+            "last_error": self.last_error,
+        }
+
+    def start_live(self):
+        """Answer queries from the snapshot from now on and fetch the sheets in the background"""
+        self.live = True
+        self.revalidate()
+
+    def revalidate(self) -> bool:
+        """Start a background refresh unless one is running; never waits. True if one was started"""
+        if not self._refreshing.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._refresh_in_background, name="sheet-revalidate", daemon=True).start()
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self._fetch_snapshot()
+        except Exception as e:
+            logging.error(f"Background sheet refresh failed: {e}")
+        finally:
+            self._refreshing.release()
+
+    def _current_data(self) -> Dict[str, List[Champion]]:
+        """The snapshot to answer from; in live mode a stale one also starts a refresh"""
+        snapshot = self.snapshot
+        if self.live:
+            age = self.data_age()
+            if age is None or age > self.max_age:
+                self.revalidate()
+        return snapshot.champions_data
+
     def fetch_champions_from_spreadsheets(self) -> Dict[str, List[Champion]]:
-        """Fetch and process champion data from both public spreadsheets"""
+        """Fetch and process champion data from both public spreadsheets (blocks until both are fetched)"""
+        with self._refreshing:
+            return self._fetch_snapshot()
+
+    def _fetch_snapshot(self) -> Dict[str, List[Champion]]:
+        """Fetch both sheets and swap in the new snapshot"""
+        try:
+            prepared = self._prepare_snapshot()
+        except RuntimeError:
+            # Nothing could be fetched; keep serving what we have
+            return self.champions_data
+        if prepared is not None:
+            self.apply_refresh(prepared)
+        return self.champions_data
+
+    def prepare_refresh(self, rebuild: bool = False) -> Optional[SheetSnapshot]:
+        """Fetch and parse both sheets into a new snapshot without serving it yet.
+
+        A sheet that fails keeps its last good data. Returns None when every
+        sheet's export hashes the same as the one it was parsed from last time;
+        the served data then only gets its age reset. Raises RuntimeError when
+        no sheet could be fetched. `rebuild` is accepted for
+        the refresh scheduler and ignored (there is no database to rebuild).
+
+        Like the background refresh this holds the refresh lock, waiting for a
+        refresh that is already running; when it returns a snapshot the lock
+        stays held until apply_refresh serves it, so no other refresh starts
+        from the same data or swaps its own in between.
+        """
+        self._refreshing.acquire()
+        try:
+            snapshot = self._prepare_snapshot()
+        except BaseException:
+            self._refreshing.release()
+            raise
+        if snapshot is None:
+            self._refreshing.release()
+        else:
+            self._pending = snapshot
+        return snapshot
+
+    def _prepare_snapshot(self) -> Optional[SheetSnapshot]:
+        """prepare_refresh for callers that already hold the refresh lock"""
         
         # Spreadsheet URLs
         # Vega's BG sheet with numerical scores (dual threat, attack, defense numbers like 7, 9)
@@ -22,154 +171,128 @@ class DataManager:
         # Illuminati's sheet with champions ranked in columns (Nico #1 mystic, Tigra #2 mystic, etc.)
         illuminati_ranking_url = "https://docs.google.com/spreadsheets/d/10OeQixQCrMKuw-pa3-LDUOQO70WGAFYROPu825Kr-eo/export?format=csv&gid=323504536"
         
-        all_champions = {}
+        previous = self.snapshot
+        all_champions = dict(previous.champions_data)
+        fetched_at = dict(previous.fetched_at)
+        sheet_hashes = dict(previous.sheet_hashes)
+        errors = []
+        changed = False
+        self.last_attempt = time.time()
         
-        # Process Vega's BGs spreadsheet (with numerical scores)
-        try:
-            vega_data = self._fetch_vega_sheet(vega_bgs_url)
-            all_champions['vega'] = vega_data
-            logging.info(f"Loaded {len(vega_data)} champions from Vega's BGs sheet")
-        except Exception as e:
-            logging.error(f"Error fetching Vega's BGs spreadsheet: {e}")
-        
-        # Process Illuminati's ranking spreadsheet (with column rankings)
-        try:
-            illuminati_data = self._fetch_illuminati_sheet(illuminati_ranking_url)
-            all_champions['illuminati'] = illuminati_data
-            logging.info(f"Loaded {len(illuminati_data)} champions from Illuminati's ranking sheet")
-        except Exception as e:
-            logging.error(f"Error fetching Illuminati's ranking spreadsheet: {e}")
+        sheets = [
+            # Vega's BGs spreadsheet (with numerical scores)
+            ('vega', "Vega's BGs", vega_bgs_url, self._fetch_vega_sheet),
+            # Illuminati's ranking spreadsheet (with column rankings)
+            ('illuminati', "Illuminati's ranking", illuminati_ranking_url, self._fetch_illuminati_sheet),
+        ]
+        for source, label, url, fetch in sheets:
+            digest = hashlib.sha256()
+            try:
+                champions = fetch(url, digest)
+            except Exception as e:
+                errors.append(f"{source}: {e}")
+                logging.error(f"Error fetching {label} spreadsheet: {e}")
+                continue
+            fetched_at[source] = time.time()
+            sheet_hash = digest.hexdigest()
+            if source in all_champions and sheet_hashes.get(source) == sheet_hash:
+                logging.info(f"{label} sheet unchanged")
+                continue
+            all_champions[source] = champions
+            sheet_hashes[source] = sheet_hash
+            changed = True
+            logging.info(f"Loaded {len(champions)} champions from {label} sheet")
         
-        # Store combined champion data
-        self.champions_data = all_champions
-        return self.champions_data
+        self.last_error = "; ".join(errors) or None
+        if len(errors) == len(sheets):
+            raise RuntimeError(self.last_error)
+        snapshot = SheetSnapshot(all_champions, fetched_at, sheet_hashes)
+        if not changed:
+            # Same data, just checked again
+            self.snapshot = snapshot
+            return None
+        return snapshot
+
+    def apply_refresh(self, snapshot: SheetSnapshot) -> Dict[str, int]:
+        """Serve a snapshot from prepare_refresh; returns how many champions were added, removed or changed"""
+        # Readers see the old snapshot or the new one, never a mix
+        old, self.snapshot = self.snapshot, snapshot
+        if self._pending is snapshot:
+            self._pending = None
+            self._refreshing.release()
+        return diff_champions(self._by_name(old), self._by_name(snapshot))
+
+    @staticmethod
+    def _by_name(snapshot: SheetSnapshot) -> Dict:
+        return {(source, champion.name.lower()): champion
+                for source, champions in snapshot.champions_data.items() for champion in champions}
+
+    def _sheet_rows(self, url: str, digest=None) -> Iterator[List[str]]:
+        """Stream a sheet's CSV export as rows; digest (a hashlib object) sees every byte"""
+        chunks = iter_url_chunks(url, timeout=self.timeout)
+        return iter_csv_rows(_hashed(chunks, digest) if digest is not None else chunks)
     
-    def _fetch_vega_sheet(self, url: str) -> List[Champion]:
+    def _fetch_vega_sheet(self, url: str, digest=None) -> List[Champion]:
         """Fetch data from the Vega BG sheet with numerical scores (dual threat, attack, defense)"""
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Convert the response content to a CSV reader
-        csv_content = io.StringIO(response.text)
-        csv_reader = csv.reader(csv_content)
-        
-        champions = []
-        
-        # Read all rows
-        rows = list(csv_reader)
-        
-        # The structure is different than I initially thought
+        # Stream the CSV export; only the header rows are kept around
         # Row 0: Headers (Mystic, Science, etc.)
         # Row 1: "Dual Threat" 
         # Row 3: "Tier Above All" and then champion names with ratings "Nico Minoru - 10"
         # Row 4: More champions with ratings
+        # (header rows and the tier row are set in data/sheet_layouts.json)
+        layout = sheet_layout("vega_battlegrounds")
+        header, rows = split_header(self._sheet_rows(url, digest), layout.header_rows)
+        tier_row = header[layout.tier_row] if len(header) > layout.tier_row else []
         
-        # Process each column (each class: Mystic, Science, etc.)
-        for col_idx in range(1, len(rows[0])):  # Skip column 0 which is empty
-            if col_idx >= len(rows[0]):
-                continue
-                
-            category = rows[0][col_idx].strip() if col_idx < len(rows[0]) else f"Category_{col_idx}"
-            if not category:
-                continue
-                
-            # Process rows starting from row 3 where champions start
-            for row_idx in range(3, len(rows)):
-                if col_idx >= len(rows[row_idx]):
-                    continue
-                    
-                cell_value = rows[row_idx][col_idx].strip()
-                
-                if not cell_value:
-                    continue
-                
-                # Extract champion name and rating from format like "Nico Minoru - 10"
-                # Find the part after the dash
-                parts = cell_value.split('-', 1)
-                if len(parts) >= 2:
-                    name_part = parts[0].strip()
-                    rating_part_str = parts[1].strip()
-                    
-                    # Extract rating: if starts with '1' followed by digit, it's 10, otherwise first digit
-                    if rating_part_str.startswith('1') and len(rating_part_str) > 1 and rating_part_str[1].isdigit():
-                        rating_part = 10
-                    elif rating_part_str and rating_part_str[0].isdigit():
-                        rating_part = int(rating_part_str[0])
-                    else:
-                        continue  # Skip if no valid rating found
-                    
-                    # Extract symbols from the original cell value
-                    emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                    symbols = emoji_pattern.findall(cell_value)
-                    
-                    # Extract the tier from the row above (row 1 for Dual Threat, etc.)
-                    tier = "Unknown"
-                    if row_idx >= 1 and len(rows[1]) > col_idx:
-                        tier = rows[1][col_idx].strip() or "Information"
-                    
-                    # If tier is empty, try to get from row 3 which has "Tier Above All"
-                    if tier == "Unknown" or tier == "":
-                        # Find the tier by checking the row headers
-                        for check_row in range(min(3, len(rows))):
-                            if check_row < len(rows) and col_idx < len(rows[check_row]):
-                                cell = rows[check_row][col_idx].strip()
-                                if cell and ("Above All" in cell or "Scorching" in cell or "Super Hot" in cell or 
-                                           "Hot" in cell or "Mild" in cell or "Information" in cell):
-                                    tier = cell.replace("Tier ", "").strip()
-                                    break
-                    
-                    # Final fallback to get tier from row index context
-                    if tier == "Unknown" or tier == "":
-                        # Default to Information tier if we can't identify the specific tier
-                        tier = "Information"
-                    
-                    champion = Champion(
-                        name=name_part,
-                        tier=tier,
-                        category=category,
-                        rating=rating_part,
-                        symbols=list(set(symbols)),
-                        source="vega"
-                    )
-                    champions.append(champion)
-                else:
-                    # If the format isn't "name - rating", try to extract rating differently
-                    # Look for a number after the champion name
-                    import re
-                    # Pattern like "Name - 10" or "Name - 9 emoji"
-                    # Find the part after the dash
-                    parts = cell_value.split('-', 1)
-                    if len(parts) >= 2:
-                        name_part = parts[0].strip()
-                        rating_part_str = parts[1].strip()
-                        
-                        # Extract rating: if starts with '1' followed by digit, it's 10, otherwise first digit
-                        if rating_part_str.startswith('1') and len(rating_part_str) > 1 and rating_part_str[1].isdigit():
-                            rating_part = 10
-                        elif rating_part_str and rating_part_str[0].isdigit():
-                            rating_part = int(rating_part_str[0])
-                        else:
-                            continue  # Skip if no valid rating found
-                        
-                        # Extract symbols from the remaining part
-                        remaining = alt_match.group(3)
-                        emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                        symbols = emoji_pattern.findall(remaining)
-                        
-                        # Get tier from context
-                        tier = "Information"  # Default fallback
-                        
-                        champion = Champion(
-                            name=name_part,
-                            tier=tier,
-                            category=category,
-                            rating=rating_part,
-                            symbols=list(set(symbols)),
-                            source="vega"
-                        )
-                        champions.append(champion)
+        champions = []  # [((col, row), Champion)]
         
-        return champions
+        # Process each cell in the class columns, starting from row 3 where champions start
+        for cell in layout.cells(rows):
+            cell_value = cell.value
+            col_idx = cell.col
+            
+            # Extract champion name, rating and symbols from format like "Nico Minoru - 10🔥"
+            tokens = tokenize_cell(cell_value, rated=layout.rated)
+            if tokens.rating is None:
+                continue  # Skip if no valid rating found
+            name_part = tokens.name
+            rating_part = tokens.rating
+            symbols = tokens.symbols
+            
+            # Extract the tier from the row above (row 1 for Dual Threat, etc.)
+            tier = "Unknown"
+            if len(tier_row) > col_idx:
+                tier = tier_row[col_idx].strip() or "Information"
+            
+            # If tier is empty, try to get from row 3 which has "Tier Above All"
+            if tier == "Unknown" or tier == "":
+                # Find the tier by checking the row headers
+                for header_row in header:
+                    if col_idx < len(header_row):
+                        header_cell = header_row[col_idx].strip()
+                        if header_cell and ("Above All" in header_cell or "Scorching" in header_cell or "Super Hot" in header_cell or 
+                                            "Hot" in header_cell or "Mild" in header_cell or "Information" in header_cell):
+                            tier = header_cell.replace("Tier ", "").strip()
+                            break
+            
+            # Final fallback to get tier from row index context
+            if tier == "Unknown" or tier == "":
+                # Default to Information tier if we can't identify the specific tier
+                tier = "Information"
+            
+            champion = Champion(
+                name=name_part,
+                tier=tier,
+                category=cell.category,
+                rating=rating_part,
+                symbols=list(set(symbols)),
+                source="vega"
+            )
+            champions.append(((cell.col, cell.row), champion))
+        
+        # Cells stream in row by row; keep the column-by-column order callers expect
+        champions.sort(key=lambda entry: entry[0])
+        return [champion for _, champion in champions]
 
     def _get_tier_from_rating(self, rating):
         """Convert numerical rating to tier based on value"""
@@ -198,115 +321,80 @@ class DataManager:
         else:
             return "Information"  # Default for positions beyond the known tiers
     
-    def _fetch_illuminati_sheet(self, url: str) -> List[Champion]:
+    def _fetch_illuminati_sheet(self, url: str, digest=None) -> List[Champion]:
         """Fetch data from the sheet with champions ranked in columns by tier (Illuminati-style)"""
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Convert the response content to a CSV reader
-        csv_content = io.StringIO(response.text)
-        csv_reader = csv.reader(csv_content)
+        layout = sheet_layout("illuminati_rankings")
+        header, rows = split_header(self._sheet_rows(url, digest), layout.header_rows)
         
         champions = []
         
-        # Read all rows
-        rows = list(csv_reader)
-        
-        if not rows or len(rows) < 2:
+        if len(header) < 2:
             return []
         
-        # Find all class names in column A
-        class_starts = []  # List of (row_index, class_name)
-        
-        for row_idx in range(len(rows)):
-            if row_idx < len(rows) and len(rows[row_idx]) > 0:
-                cell_a = rows[row_idx][0] if len(rows[row_idx]) > 0 else ""
-                class_name = cell_a.strip().title() if cell_a.strip() else ""
-                
-                # Look for class names exactly as we know them from the debug output
-                if class_name.lower() in ['mystic', 'science', 'skill', 'mutant', 'tech', 'cosmic', 'guardian']:
-                    class_starts.append((row_idx, class_name))
+        # Header and metadata keywords (see data/filter_patterns.json)
+        header_matcher = pattern_matcher("header_keywords")
         
-        # Process each class and its champion range
-        for i, (start_row, class_name) in enumerate(class_starts):
-            # Determine the end of this class range
-            if i + 1 < len(class_starts):
-                end_row = class_starts[i + 1][0]  # Start of next class
-            else:
-                end_row = len(rows)  # End of all data
-            
+        # Class names sit in column A; only one class block is held in memory at a time
+        for class_name, cells in layout.blocks(rows):
             # For this class, assign rankings by going column by column, row by row in the class range
             rank_counter = 1  # Start ranking at 1 for each class
             
-            # Process each column from B onward
-            for col_idx in range(1, len(rows[0]) if len(rows) > 0 else 0):
-                # Process each row in the class range for this column
-                for row_idx in range(start_row, end_row):
-                    try:
-                        if col_idx >= len(rows[row_idx]):  # Column doesn't exist for this row
-                            continue
-                        
-                        cell_value = rows[row_idx][col_idx].strip()
-                        
-                        # Skip empty cells
-                        if not cell_value:
-                            continue
-                        
-                        # Skip rows that appear to be headers or metadata
-                        cell_lower = cell_value.lower()
-                        if any(skip_text in cell_lower for skip_text in [
-                            'champion', 'champions', 'name', 'tier', 'rating', 'category',
-                            'above all', 'scorching', 'super hot', 'hot', 'mild', 'information',
-                            'the truly o.p.', 'tier above all', 'omega days', 'glorious guardians',
-                            'exclusive', 'go to file', 'to use tier list', 'filtering'
-                        ]):
-                            continue
-                        
-                        # Extract emoji symbols from the name
-                        emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                        symbols = emoji_pattern.findall(cell_value)
-                        
-                        # Clean the champion name (remove emojis)
-                        clean_name = emoji_pattern.sub('', cell_value).strip()
-                        
-                        if clean_name and len(clean_name) > 1:  # Valid champion name
-                            actual_category = f"{class_name} #{rank_counter}"
-                            
-                            # Determine tier based on the rank
-                            tier = self._get_vega_tier_by_position(rank_counter - 1)
-                            
-                            champion = Champion(
-                                name=clean_name,
-                                tier=tier,
-                                category=actual_category,
-                                symbols=list(set(symbols)),  # Remove duplicates
-                                source="illuminati"
-                            )
-                            champions.append(champion)
-                            
-                            # Increment rank for next champion in this class
-                            rank_counter += 1
-                            
-                    except (IndexError, TypeError):
-                        continue  # Skip if cell doesn't exist
+            for cell in cells:
+                cell_value = cell.value
+                
+                # Skip rows that appear to be headers or metadata
+                if header_matcher.contains_any(cell_value.lower()):
+                    continue
+                
+                # Split the cell into the champion name and its emoji symbols
+                tokens = tokenize_cell(cell_value)
+                symbols = tokens.symbols
+                clean_name = tokens.name
+                
+                if clean_name and len(clean_name) > 1:  # Valid champion name
+                    actual_category = f"{class_name} #{rank_counter}"
+                    
+                    # Determine tier based on the rank
+                    tier = self._get_vega_tier_by_position(rank_counter - 1)
+                    
+                    champion = Champion(
+                        name=clean_name,
+                        tier=tier,
+                        category=actual_category,
+                        symbols=list(set(symbols)),  # Remove duplicates
+                        source="illuminati"
+                    )
+                    champions.append(champion)
+                    
+                    # Increment rank for next champion in this class
+                    rank_counter += 1
         
         return champions
     
+    @traced("lookup")
     def get_champion_by_name(self, name: str) -> List[Champion]:
         """Get champion information by name (case-insensitive)"""
         results = []
         name_lower = name.lower().strip()
         
-        for source, champions in self.champions_data.items():
+        for source, champions in self._current_data().items():
             for champion in champions:
                 if name_lower in champion.name.lower():
                     results.append(champion)
         
+        path = "substring" if results else "miss"
+        metrics.inc("mcoc_champion_lookups_total", {"path": path})
+        annotate(query=name, path=path)
         return results
     
+    def available_sources(self) -> List[str]:
+        """Names that get_top_champions_by_tier accepts: one per sheet, whether it has been fetched yet or not"""
+        return ['vega', 'illuminati']
+
     def get_top_champions_by_tier(self, source: str = 'vega', limit: int = 10) -> List[Champion]:
         """Get top champions by tier from a specific source"""
-        if source not in self.champions_data:
+        champions_data = self._current_data()
+        if source not in champions_data:
             return []
         
         # Define tier rankings (higher is better)
@@ -319,7 +407,7 @@ class DataManager:
             "Information": 5
         }
         
-        champions = self.champions_data[source]
+        champions = champions_data[source]
         
         # Sort by tier order, with rating as secondary sort if available
         def sort_key(champ):
@@ -331,7 +419,11 @@ class DataManager:
         return sorted_champions[:limit]
     
     def refresh_data(self):
-        """Refresh data from public Google Sheets"""
+        """Refresh data from public Google Sheets (in the background in live mode)"""
+        if self.live:
+            if self.revalidate():
+                logging.info("Refreshing data from public Google Sheets in the background...")
+            return
         logging.info("Refreshing data from public Google Sheets...")
         self.fetch_champions_from_spreadsheets()
         logging.info("Data refresh completed")
\ No newline at end of file
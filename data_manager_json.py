@@ -1,35 +1,96 @@
+import hashlib
 import json
-import re
-from typing import List, Dict
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Optional
 import logging
 from champion_model import Champion
+from utils.keyword_matcher import pattern_matcher
+from utils.metrics import metrics
+from utils.refresh import diff_champions
+from utils.search_index import (SearchIndex, build_search_index, legacy_source, legacy_sort_key, load_search_index,
+                                normalize_name, sidecar_path)
+from utils.tracing import annotate, traced
 from difflib import get_close_matches, SequenceMatcher
 import csv
 
 
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Everything a lookup reads, loaded from one database file and replaced as a whole on refresh"""
+    champions_data: Dict[str, List[Champion]] = field(default_factory=lambda: {'vega': [], 'illuminati': []})
+    # Database order; positions in the search index refer to this list
+    champions: List[Champion] = field(default_factory=list)
+    champion_lookup: Dict[str, Champion] = field(default_factory=dict)
+    search_index: SearchIndex = field(default_factory=lambda: SearchIndex(build_search_index({}, "")))
+    views: Dict[str, List[Champion]] = field(default_factory=dict)
+    database_sha256: Optional[str] = None
+    database_mtime: Optional[float] = None
+    sidecar_used: bool = False
+
+
+def build_views(champions: List[Champion], champions_data: Dict[str, List[Champion]],
+                search_index: SearchIndex) -> Dict[str, List[Champion]]:
+    """Top-N lists per source and the blended view, in the order the search index keeps them,
+    so queries are just slices"""
+    views = {source: [champions[position] for position in positions]
+             for source, positions in search_index.views.items()}
+
+    # Champions from the game list join the 'vega' group after the index was built
+    if len(champions_data['vega']) != len(views['vega']):
+        views['vega'] = sorted(champions_data['vega'], key=lambda champ: legacy_sort_key(champ.tier, champ.rating),
+                               reverse=True)
+    return views
+
+
 class DataManager:
-    """Handles data retrieval and processing from JSON database"""
+    """Handles data retrieval and processing from JSON database.
+
+    Lookups may run on the command pool threads while a refresh swaps in a
+    new database, so everything they read lives in one CatalogSnapshot that
+    is replaced with a single assignment and read once per lookup.
+    """
     
-    def __init__(self, db_file="champions_database.json"):
-        self.champions_data = {}
+    def __init__(self, db_file="champions_database.json", search_file=None):
         self.db_file = db_file
-        self.champion_lookup = {}
+        # Search structures precomputed by build_database.py (see utils/search_index.py)
+        self.search_file = search_file or sidecar_path(db_file)
+        self.snapshot = CatalogSnapshot()
         self.load_champions_from_json()
+
+    @property
+    def champions_data(self) -> Dict[str, List[Champion]]:
+        return self.snapshot.champions_data
+
+    @property
+    def champion_lookup(self) -> Dict[str, Champion]:
+        return self.snapshot.champion_lookup
+
+    @property
+    def database_sha256(self) -> Optional[str]:
+        return self.snapshot.database_sha256
+
+    @property
+    def sidecar_used(self) -> bool:
+        return self.snapshot.sidecar_used
         
     def load_champions_from_json(self):
         """Load champion data from the JSON database"""
         try:
-            with open(self.db_file, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
+            with open(self.db_file, 'rb') as f:
+                raw_bytes = f.read()
+                database_mtime = os.fstat(f.fileno()).st_mtime
+            raw_data = json.loads(raw_bytes)
+            database_sha256 = hashlib.sha256(raw_bytes).hexdigest()
             
             # Convert the raw data to Champion objects
             champions = []
+            champion_lookup = {}
             for name_key, champion_data in raw_data.items():
-                # Determine source based on whether it has battlegrounds data
-                if champion_data.get('battlegrounds_rating') is not None:
-                    source = "vega"  # Has battlegrounds data
-                else:
-                    source = "illuminati"  # Doesn't have battlegrounds data, likely from ranking sheet
+                # Determine source based on whether it has battlegrounds data:
+                # "vega" has battlegrounds data, "illuminati" is likely from the ranking sheet
+                source = legacy_source(champion_data)
                 
                 # Build symbol list based on the boolean flags in the JSON
                 symbols = []
@@ -55,39 +116,74 @@ class DataManager:
                     rating=champion_data['battlegrounds_rating'],
                     symbols=symbols,
                     source=source,
-                    battlegrounds_type=champion_data.get('battlegrounds_type')
+                    battlegrounds_type=champion_data.get('battlegrounds_type'),
+                    sources=champion_data.get('sources', {})
                 )
                 
                 champions.append(champion)
                 # Add to lookup for fast searching
-                self.champion_lookup[name_key.lower()] = champion
+                champion_lookup[name_key.lower()] = champion
             
             # Group champions by source
             vega_champions = [c for c in champions if c.source == "vega"]
             illuminati_champions = [c for c in champions if c.source == "illuminati"]
             
-            self.champions_data = {
+            champions_data = {
                 'vega': vega_champions,
                 'illuminati': illuminati_champions
             }
             
+            # Use the sidecar written with the database; build the index here if it's missing or stale
+            index_data = load_search_index(self.search_file, database_sha256)
+            search_index = SearchIndex(index_data or build_search_index(raw_data, database_sha256))
+            
             logging.info(f"Loaded {len(champions)} champions from JSON database")
             logging.info(f"Vega (BGs): {len(vega_champions)}, Illuminati (Ranking): {len(illuminati_champions)}")
             
             # Load additional champions from the list that aren't in the tier list
-            self.load_additional_champions()
+            self.load_additional_champions(champions_data, champion_lookup, search_index)
+
+            snapshot = CatalogSnapshot(champions_data, champions, champion_lookup, search_index,
+                                       build_views(champions, champions_data, search_index), database_sha256,
+                                       database_mtime, sidecar_used=index_data is not None)
             
         except FileNotFoundError:
             logging.error(f"Database file {self.db_file} not found. Run build_database.py first.")
-            self.champions_data = {'vega': [], 'illuminati': []}
+            snapshot = self._empty_snapshot()
         except Exception as e:
             logging.error(f"Error loading database: {e}")
-            self.champions_data = {'vega': [], 'illuminati': []}
+            snapshot = self._empty_snapshot()
+
+        # Lookups on other threads see the old snapshot or this one, never a mix
+        self.snapshot = snapshot
+
+    @staticmethod
+    def _empty_snapshot() -> CatalogSnapshot:
+        """No champions, with the views an empty database has"""
+        empty = CatalogSnapshot()
+        return replace(empty, views=build_views(empty.champions, empty.champions_data, empty.search_index))
+
+    def data_version(self) -> Optional[str]:
+        """Short hash of the loaded database file, or None when nothing is loaded"""
+        database_sha256 = self.snapshot.database_sha256
+        return database_sha256[:12] if database_sha256 else None
+
+    def data_age(self) -> Optional[float]:
+        """Seconds since the loaded database file was written"""
+        database_mtime = self.snapshot.database_mtime
+        return time.time() - database_mtime if database_mtime is not None else None
 
-    def load_additional_champions(self):
-        """Load additional champions from the list that aren't in the tier list"""
+    def available_sources(self) -> List[str]:
+        """Names that get_top_champions_by_tier accepts"""
+        return list(self.snapshot.views)
+
+    def load_additional_champions(self, champions_data: Dict[str, List[Champion]],
+                                  champion_lookup: Dict[str, Champion], search_index: SearchIndex):
+        """Add the champions from the game's list that aren't in the tier list to a snapshot being loaded"""
         try:
             champions_added = 0
+            # File paths, release dates and class columns (see data/filter_patterns.json)
+            exclusions = pattern_matcher("champion_list_exclusions")
             
             # Read the list of champions from the text file
             with open('/home/david/champions/list_of_champions.txt', 'r', encoding='utf-8') as f:
@@ -107,19 +203,7 @@ class DataManager:
                     for part in parts:
                         part = part.strip()
                         # Skip if it looks like a file path, date, or class
-                        if (part and 
-                            'File:' not in part and 
-                            'Coming' not in part and
-                            'January' not in part and 'February' not in part and 
-                            'March' not in part and 'April' not in part and 
-                            'May' not in part and 'June' not in part and 
-                            'July' not in part and 'August' not in part and 
-                            'September' not in part and 'October' not in part and 
-                            'November' not in part and 'December' not in part and
-                            'Cosmic' not in part and 'Tech' not in part and 
-                            'Mutant' not in part and 'Skill' not in part and 
-                            'Science' not in part and 'Mystic' not in part and
-                            'Class' not in part and 'Release' not in part):
+                        if part and not exclusions.contains_any(part):
                             
                             # This might be a champion name
                             champion_name = part
@@ -128,7 +212,7 @@ class DataManager:
                     if champion_name and len(champion_name) > 2:  # Valid champion name
                         # Check if this champion already exists in our database
                         champion_key = champion_name.lower()
-                        if champion_key in self.champion_lookup:
+                        if champion_key in champion_lookup:
                             continue  # Already exists, skip
                         
                         # Create a placeholder champion with no battlegrounds rating
@@ -145,8 +229,9 @@ class DataManager:
                         )
                         
                         # Add to our data structures
-                        self.champions_data['vega'].append(placeholder_champion)
-                        self.champion_lookup[champion_key] = placeholder_champion
+                        champions_data['vega'].append(placeholder_champion)
+                        champion_lookup[champion_key] = placeholder_champion
+                        search_index.add(champion_key)
                         champions_added += 1
             
             logging.info(f"Loaded {champions_added} additional champions from game list")
@@ -163,7 +248,7 @@ class DataManager:
     
     def _normalize_name(self, name: str) -> str:
         """Normalize champion name for comparison"""
-        return re.sub(r'[^a-z0-9]', '', name.lower())
+        return normalize_name(name)
 
     def _levenshtein_distance(self, s1, s2):
         m, n = len(s1), len(s2)
@@ -234,89 +319,133 @@ class DataManager:
         
         return jaro_similarity + (prefix * p * (1 - jaro_similarity))
 
-    def _ngram_similarity(self, s1, s2, n=2):
-        def get_ngrams(s, n):
-            return set(s[i:i+n] for i in range(len(s)-n+1))
-
-        ngrams1 = get_ngrams(s1, n)
-        ngrams2 = get_ngrams(s2, n)
-
-        if not ngrams1 and not ngrams2:
-            return 1.0
-        if not ngrams1 or not ngrams2:
-            return 0.0
-
-        return len(ngrams1.intersection(ngrams2)) / len(ngrams1.union(ngrams2))
-
+    @traced("lookup")
     def get_champion_by_name(self, name: str) -> List[Champion]:
         """Get champion information by name (case-insensitive) - returns only the closest match"""
         name_lower = self._normalize_name(name)
+        annotate(query=name)
+        # Read once: a refresh may swap the snapshot while this lookup runs on a pool thread
+        snapshot = self.snapshot
+        champion_lookup = snapshot.champion_lookup
 
         # Special case for "Doom"
         if name_lower == "doom":
-            return [self.champion_lookup["doctor doom"]]
+            self._count_lookup("alias")
+            return [champion_lookup["doctor doom"]]
 
         # Direct lookup first
-        if name_lower in self.champion_lookup:
-            return [self.champion_lookup[name_lower]]
+        if name_lower in champion_lookup:
+            self._count_lookup("exact")
+            return [champion_lookup[name_lower]]
 
-        # Try fuzzy matching with close matches using multiple strategies
+        # Try fuzzy matching with close matches using multiple strategies; normalized keys,
+        # bigram posting lists and the prefix-sorted names come ready-made from the search index
+        index = snapshot.search_index
+        query_bigrams, shared_bigrams = index.ngram_scores(name_lower)
+        prefixed = index.prefixed(name_lower)
         best_match = None
+        best_position = None
         best_score = -1
 
-        for key, champion in self.champion_lookup.items():
-            normalized_key = self._normalize_name(key)
-
-            # Calculate similarity scores
-            lev_distance = self._levenshtein_distance(name_lower, normalized_key)
-            lev_similarity = 1 - (lev_distance / max(len(name_lower), len(normalized_key)))
-            jaro_winkler_score = self._jaro_winkler_similarity(name_lower, normalized_key)
-            ngram_score = self._ngram_similarity(name_lower, normalized_key)
-
-            # Weighted average
-            score = (0.4 * jaro_winkler_score) + (0.4 * lev_similarity) + (0.2 * ngram_score)
-
-            # Boost score for prefix matches
-            if normalized_key.startswith(name_lower):
-                score += 0.1
-
-            if score > best_score:
+        # Most promising names first (prefix matches, then most shared bigrams) so a good score is
+        # found early and names that can't beat it are skipped without computing edit distances.
+        # Ties still go to the name that comes first, as when every name was scored in order.
+        candidates = sorted(range(len(index.keys)),
+                            key=lambda position: (position not in prefixed, -shared_bigrams.get(position, 0), position))
+        for position in candidates:
+            if name_lower and self._score_bound(index, name_lower, index.normalized[position], query_bigrams,
+                                                shared_bigrams, position, position in prefixed) < best_score:
+                continue
+            score = self._fuzzy_score(index, name_lower, position, query_bigrams, shared_bigrams, position in prefixed)
+            if score > best_score or (score == best_score and position < best_position):
                 best_score = score
-                best_match = champion
+                best_position = position
+                best_match = champion_lookup[index.keys[position]]
 
         if best_match and best_score > 0.6:
+            self._count_lookup("fuzzy")
             return [best_match]
 
+        self._count_lookup("miss")
         return []
+
+    @staticmethod
+    def _count_lookup(path: str):
+        """Count a lookup by the search path that answered it, and note the path on its span"""
+        metrics.inc("mcoc_champion_lookups_total", {"path": path})
+        annotate(path=path)
+
+    def _fuzzy_score(self, index, name_lower, position, query_bigrams, shared_bigrams, is_prefix):
+        """How close the normalized query is to the champion at position in the search index"""
+        normalized_key = index.normalized[position]
+
+        # Calculate similarity scores
+        lev_distance = self._levenshtein_distance(name_lower, normalized_key)
+        lev_similarity = 1 - (lev_distance / max(len(name_lower), len(normalized_key)))
+        jaro_winkler_score = self._jaro_winkler_similarity(name_lower, normalized_key)
+        ngram_score = index.ngram_similarity(query_bigrams, shared_bigrams, position)
+
+        # Weighted average
+        score = (0.4 * jaro_winkler_score) + (0.4 * lev_similarity) + (0.2 * ngram_score)
+
+        # Boost score for prefix matches
+        if is_prefix:
+            score += 0.1
+        return score
+
+    def _score_bound(self, index, name_lower, normalized_key, query_bigrams, shared_bigrams, position, is_prefix):
+        """The highest _fuzzy_score a name could get, from the lengths alone: the edit distance is at
+        least the length difference and Jaro-Winkler can match at most the shorter name's characters"""
+        query_len, key_len = len(name_lower), len(normalized_key)
+        shortest, longest = min(query_len, key_len), max(query_len, key_len)
+        lev_bound = 1 - (longest - shortest) / longest
+        jaro_bound = (shortest / query_len + shortest / key_len + 1) / 3 if shortest else 0.0
+        jaro_winkler_bound = jaro_bound + 0.4 * (1 - jaro_bound)
+        ngram_score = index.ngram_similarity(query_bigrams, shared_bigrams, position)
+        # A little headroom so rounding never skips a name that would tie
+        return (0.4 * jaro_winkler_bound) + (0.4 * lev_bound) + (0.2 * ngram_score) + (0.1 if is_prefix else 0) + 1e-9
     
     def get_top_champions_by_tier(self, source: str = 'vega', limit: int = 10) -> List[Champion]:
-        """Get top champions by tier from a specific source"""
-        if source not in self.champions_data:
-            return []
-        
-        # Define tier rankings (higher is better)
-        tier_order = {
-            "Above All": 10,
-            "Scorching": 9,
-            "Super Hot": 8,
-            "Hot": 7,
-            "Mild": 6,
-            "Information": 5
-        }
-        
-        champions = self.champions_data[source]
-        
-        # Sort by tier order, with rating as secondary sort if available
-        def sort_key(champ):
-            tier_rank = tier_order.get(champ.tier, 0)
-            return (tier_rank, champ.rating or 0)
-        
-        sorted_champions = sorted(champions, key=sort_key, reverse=True)
-        
-        return sorted_champions[:limit]
+        """Get top champions by tier from a specific source ('vega', 'illuminati', any tier list
+        in the database such as 'rankings' or 'battlegrounds', or 'blended' for all of them)"""
+        # Views are sorted when the data is loaded
+        return self.snapshot.views.get(source, [])[:limit]
     
-    def refresh_data(self):
-        """Refresh data from JSON database"""
+    def prepare_refresh(self, rebuild: bool = False) -> Optional["DataManager"]:
+        """The slow half of a refresh, safe to run off the event loop: rebuild the database if asked
+        (unchanged sheets come from the build cache), then load it into a new manager.
+        None if the database file hashes the same as the loaded one."""
+        if rebuild:
+            from build_database import build_champion_database
+            build_champion_database()
+        with open(self.db_file, 'rb') as f:
+            database_sha256 = hashlib.sha256(f.read()).hexdigest()
+        if database_sha256 == self.database_sha256:
+            return None
+        fresh = DataManager(self.db_file, self.search_file)
+        if fresh.database_sha256 is None:
+            # Keep serving the data we have rather than an empty database
+            raise ValueError(f"Could not load {self.db_file}; keeping the loaded data")
+        return fresh
+
+    def apply_refresh(self, fresh: "DataManager") -> Dict[str, int]:
+        """Take over the data of a manager from prepare_refresh; returns how many champions changed"""
+        # One assignment: lookups running on the pool threads see the old catalog or the new one, never a mix
+        old, self.snapshot = self.snapshot, fresh.snapshot
+        return diff_champions(old.champion_lookup, fresh.snapshot.champion_lookup)
+
+    def refresh_data(self, rebuild: bool = False) -> Dict[str, int]:
+        """Refresh data from JSON database (skipped when the file hasn't changed)"""
         logging.info("Refreshing data from JSON database...")
-        self.load_champions_from_json()
-        logging.info("Data refresh completed")
\ No newline at end of file
+        try:
+            fresh = self.prepare_refresh(rebuild)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error refreshing database: {e}")
+            return diff_champions({}, {})
+        if fresh is None:
+            logging.info("Database unchanged; nothing to reload")
+            return diff_champions({}, {})
+        diff = self.apply_refresh(fresh)
+        logging.info(f"Data refresh completed: {diff['added']} added, {diff['removed']} removed, "
+                     f"{diff['changed']} changed")
+        return diff
\ No newline at end of file
@@ -2,14 +2,14 @@
 """
 Test script to demonstrate the MCOC Champions Discord Bot data processing
 """
-import requests
-import csv
-import io
-import re
 from typing import List
 
 # Import the Champion class from our model
 from champion_model import Champion
+from utils.cell_tokenizer import tokenize_cell
+from utils.keyword_matcher import pattern_matcher
+from utils.sheet_layout import sheet_layout
+from utils.sheet_stream import split_header, stream_csv_rows
 
 
 class SimpleDataManager:
@@ -26,22 +26,14 @@ class SimpleDataManager:
 
     def _fetch_illuminati_sheet(self, url: str) -> List[Champion]:
         """Fetch data from MCoC Illuminati Tier List spreadsheet using CSV export"""
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Convert the response content to a CSV reader
-        csv_content = io.StringIO(response.text)
-        csv_reader = csv.reader(csv_content)
-        
         champions = []
         
         # This is actually the Vega BGs sheet with numbers like 7, 9 for dual-threat, attack, defense
         # Column A: Champion name
         # Other columns: Various scores/ratings for different modes
         
-        rows = list(csv_reader)
-        
-        for row_idx, row in enumerate(rows):
+        # Rows are streamed and handled one at a time
+        for row_idx, row in enumerate(stream_csv_rows(url)):
             # Skip the header row if it looks like a header
             if row_idx == 0 and row and row[0].lower() in ['champion', 'champions', 'name', 'dual threat', 'attack', 'defense']:
                 continue
@@ -78,9 +70,7 @@ class SimpleDataManager:
                 # Check all columns for emojis
                 for i in range(len(row)):
                     if row[i].strip():
-                        emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                        found_emojis = emoji_pattern.findall(row[i])
-                        symbols.extend(found_emojis)
+                        symbols.extend(tokenize_cell(row[i]).symbols)
                 
                 champion = Champion(
                     name=name,
@@ -98,95 +88,51 @@ class SimpleDataManager:
 
     def _fetch_vega_sheet(self, url: str) -> List[Champion]:
         """Fetch data from the sheet with champions ranked in columns by tier (Illuminati-style)"""
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Convert the response content to a CSV reader
-        csv_content = io.StringIO(response.text)
-        csv_reader = csv.reader(csv_content)
+        layout = sheet_layout("illuminati_rankings")
+        header, rows = split_header(stream_csv_rows(url), layout.header_rows)
         
         champions = []
         
-        # Read all rows
-        rows = list(csv_reader)
-        
-        if not rows or len(rows) < 2:
+        if len(header) < 2:
             return []
         
-        # Find all class names in column A
-        class_starts = []  # List of (row_index, class_name)
-        
-        for row_idx in range(len(rows)):
-            if row_idx < len(rows) and len(rows[row_idx]) > 0:
-                cell_a = rows[row_idx][0] if len(rows[row_idx]) > 0 else ""
-                class_name = cell_a.strip().title() if cell_a.strip() else ""
-                
-                # Look for class names exactly as we know them from the debug output
-                if class_name.lower() in ['mystic', 'science', 'skill', 'mutant', 'tech', 'cosmic', 'guardian']:
-                    class_starts.append((row_idx, class_name))
+        # Header and metadata keywords (see data/filter_patterns.json)
+        header_matcher = pattern_matcher("header_keywords")
         
-        # Process each class and its champion range
-        for i, (start_row, class_name) in enumerate(class_starts):
-            # Determine the end of this class range
-            if i + 1 < len(class_starts):
-                end_row = class_starts[i + 1][0]  # Start of next class
-            else:
-                end_row = len(rows)  # End of all data
-            
+        # Class names sit in column A; only one class block is held in memory at a time
+        for class_name, cells in layout.blocks(rows):
             # For this class, assign rankings by going column by column, row by row in the class range
             rank_counter = 1  # Start ranking at 1 for each class
             
-            # Process each column from B onward
-            for col_idx in range(1, len(rows[0]) if len(rows) > 0 else 0):
-                # Process each row in the class range for this column
-                for row_idx in range(start_row, end_row):
-                    try:
-                        if col_idx >= len(rows[row_idx]):  # Column doesn't exist for this row
-                            continue
-                        
-                        cell_value = rows[row_idx][col_idx].strip()
-                        
-                        # Skip empty cells
-                        if not cell_value:
-                            continue
-                        
-                        # Skip rows that appear to be headers or metadata
-                        cell_lower = cell_value.lower()
-                        if any(skip_text in cell_lower for skip_text in [
-                            'champion', 'champions', 'name', 'tier', 'rating', 'category',
-                            'above all', 'scorching', 'super hot', 'hot', 'mild', 'information',
-                            'the truly o.p.', 'tier above all', 'omega days', 'glorious guardians',
-                            'exclusive', 'go to file', 'to use tier list', 'filtering'
-                        ]):
-                            continue
-                        
-                        # Extract emoji symbols from the name
-                        emoji_pattern = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\u2600-\u27BF]+')
-                        symbols = emoji_pattern.findall(cell_value)
-                        
-                        # Clean the champion name (remove emojis)
-                        clean_name = emoji_pattern.sub('', cell_value).strip()
-                        
-                        if clean_name and len(clean_name) > 1:  # Valid champion name
-                            actual_category = f"{class_name} #{rank_counter}"
-                            
-                            # Determine tier based on the rank
-                            tier = self.get_vega_tier_by_position(rank_counter - 1)
-                            
-                            champion = Champion(
-                                name=clean_name,
-                                tier=tier,
-                                category=actual_category,
-                                symbols=list(set(symbols)),  # Remove duplicates
-                                source="illuminati"  # This is actually the illuminati-style ranking sheet
-                            )
-                            champions.append(champion)
-                            
-                            # Increment rank for next champion in this class
-                            rank_counter += 1
-                            
-                    except (IndexError, TypeError):
-                        continue  # Skip if cell doesn't exist
+            for cell in cells:
+                cell_value = cell.value
+                
+                # Skip rows that appear to be headers or metadata
+                if header_matcher.contains_any(cell_value.lower()):
+                    continue
+                
+                # Split the cell into the champion name and its emoji symbols
+                tokens = tokenize_cell(cell_value)
+                symbols = tokens.symbols
+                clean_name = tokens.name
+                
+                if clean_name and len(clean_name) > 1:  # Valid champion name
+                    actual_category = f"{class_name} #{rank_counter}"
+                    
+                    # Determine tier based on the rank
+                    tier = self.get_vega_tier_by_position(rank_counter - 1)
+                    
+                    champion = Champion(
+                        name=clean_name,
+                        tier=tier,
+                        category=actual_category,
+                        symbols=list(set(symbols)),  # Remove duplicates
+                        source="illuminati"  # This is actually the illuminati-style ranking sheet
+                    )
+                    champions.append(champion)
+                    
+                    # Increment rank for next champion in this class
+                    rank_counter += 1
         
         return champions
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Runs the bot as several shard processes sharing one champion catalog.
+
+The launcher loads champions_database.json once, then forks one worker per
+shard group; each worker runs an AutoShardedBot for its shards and answers
+from the catalog it inherited, so the pages stay shared between workers
+instead of every process loading its own copy. The launcher keeps the
+workers running (a dead one is forked again) and drives refreshes so every
+shard switches to a new database version together (utils/shard_refresh.py).
+
+    SHARD_COUNT=8 SHARD_PROCESSES=2 python3 shard_launcher.py
+
+SHARD_COUNT is the total number of shards (Discord wants one per 2,500
+guilds); SHARD_PROCESSES how many workers they are split over (default: one
+per CPU, at most one per shard). With PORT set, the launcher serves
+/healthz, /readyz and /metrics on PORT and worker i on PORT + 1 + i; with
+QUERY_API_PORT set, worker i serves the query API on QUERY_API_PORT + i.
+Only the JSON database is supported (not LIVE_SHEETS), and fork is needed,
+so this runs on Linux.
+"""
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from typing import List
+
+from bot_main import METRICS_PORT, QUERY_API_PORT, REFRESH_REBUILD, TOKEN, create_bot
+from config import AUTO_REFRESH_INTERVAL_HOURS
+from data_manager_json import DataManager
+from utils.metrics import MetricsServer, metrics, watch_data_manager
+from utils.shard_refresh import ShardLink, ShardRefreshClient, ShardRefreshCoordinator
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT') or 1)
+SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES') or min(SHARD_COUNT, os.cpu_count() or 1))
+# Discord lets a bot identify one shard every 5 seconds; workers start that far apart
+IDENTIFY_SECONDS = 5
+# How often the launcher checks on its workers
+SUPERVISE_SECONDS = 5
+
+metrics.describe("mcoc_shard_restarts_total", "counter", "Shard worker processes forked again after exiting")
+
+
+def shard_groups(shard_count: int, processes: int) -> List[List[int]]:
+    """Split shard ids 0..shard_count-1 into contiguous groups, one per process, sizes differing by at most one"""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups, start = [], 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+
+def reset_signals():
+    """Undo the launcher's signal handling in a forked worker.
+
+    The fork inherits the launcher's wakeup fd and its do-nothing handlers, so
+    without this SIGTERM would not stop the worker but wake the launcher's
+    loop, as if the launcher itself had been told to stop.
+    """
+    signal.set_wakeup_fd(-1)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_DFL)
+
+
+def run_worker(data_manager, conn, shard_ids, shard_count, index, delay):
+    """A worker process: the bot for shard_ids, answering from the inherited data_manager"""
+    reset_signals()
+    logging.info(f"Worker {index} (shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count}) starting in {delay}s")
+    if delay:
+        time.sleep(delay)
+    bot = create_bot(data_manager, refresher=ShardRefreshClient(data_manager, conn),
+                     shard_ids=shard_ids, shard_count=shard_count,
+                     metrics_port=METRICS_PORT + 1 + index if METRICS_PORT else 0,
+                     query_port=QUERY_API_PORT + index if QUERY_API_PORT else 0)
+    bot.run(TOKEN)
+
+
+class Worker:
+    """One shard group's process and the launcher's end of its pipe"""
+
+    def __init__(self, index: int, shard_ids: List[int]):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.process = None
+        self.link = None
+
+
+class ShardLauncher:
+    """Forks the shard workers from a loaded data manager, restarts them and coordinates refreshes"""
+
+    def __init__(self, data_manager, shard_count: int, processes: int):
+        self.data_manager = data_manager
+        self.shard_count = shard_count
+        self.context = multiprocessing.get_context("fork")
+        self.workers = [Worker(index, group) for index, group in enumerate(shard_groups(shard_count, processes))]
+        self.coordinator = ShardRefreshCoordinator(data_manager, AUTO_REFRESH_INTERVAL_HOURS * 3600,
+                                                   rebuild=REFRESH_REBUILD)
+        self.coordinator.restart_shard = self.restart_shard
+
+    def spawn(self, worker: Worker, delay: float):
+        ours, theirs = self.context.Pipe()
+        worker.process = self.context.Process(
+            target=run_worker, name=f"shard-worker-{worker.index}", daemon=True,
+            args=(self.data_manager, theirs, worker.shard_ids, self.shard_count, worker.index, delay))
+        worker.process.start()
+        theirs.close()
+        worker.link = ShardLink(ours, self.coordinator.on_message)
+        worker.link.attach(asyncio.get_running_loop())
+        self.coordinator.add_link(worker.link)
+
+    def restart_shard(self, link: ShardLink):
+        """Stop the worker behind link; supervise() forks it again from the launcher's current data"""
+        for worker in self.workers:
+            if worker.link is link and worker.process.is_alive():
+                worker.process.terminate()
+
+    def alive(self) -> bool:
+        return all(worker.process is not None and worker.process.is_alive() for worker in self.workers)
+
+    async def supervise(self):
+        while True:
+            await asyncio.sleep(SUPERVISE_SECONDS)
+            for worker in self.workers:
+                if worker.process.is_alive():
+                    continue
+                logging.error(f"Worker {worker.index} exited with {worker.process.exitcode}; restarting it")
+                metrics.inc("mcoc_shard_restarts_total")
+                worker.link.detach(asyncio.get_running_loop())
+                self.coordinator.remove_link(worker.link)
+                worker.link.conn.close()
+                self.spawn(worker, delay=0)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopping.set)
+
+        for worker in self.workers:
+            # Later groups wait out the identifies of the shards before them
+            self.spawn(worker, delay=worker.shard_ids[0] * IDENTIFY_SECONDS)
+        watch_data_manager(self.data_manager)
+        server = MetricsServer(METRICS_PORT, ready=self.alive)
+        if METRICS_PORT:
+            await server.start()
+        self.coordinator.start()
+        supervisor = loop.create_task(self.supervise())
+
+        await stopping.wait()
+        logging.info("Stopping shard workers")
+        supervisor.cancel()
+        self.coordinator.stop()
+        await server.stop()
+        for worker in self.workers:
+            worker.process.terminate()
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join)
+
+
+if __name__ == "__main__":
+    if not TOKEN:
+        print("Error: DISCORD_BOT_TOKEN not found in environment variables")
+        exit(1)
+
+    data_manager = DataManager()
+    # Move the loaded catalog out of the collector's generations, so collections in the
+    # workers don't write to (and so un-share) the pages it lives on
+    gc.collect()
+    gc.freeze()
+    asyncio.run(ShardLauncher(data_manager, SHARD_COUNT, SHARD_PROCESSES).run())
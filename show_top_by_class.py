@@ -1,11 +1,29 @@
 import json
+import sys
 
-def display_top_20_per_class():
-    """Display the top 20 champions from each class"""
+from utils.shards import ShardedDatabase, current_shards
+
+DATABASE_FILE = 'champions_database.json'
+
+
+def load_champions(classes=None):
+    """The champions of the given classes (all if None), from the per-class shards when the last build wrote them"""
+    directory = current_shards(DATABASE_FILE)
+    if directory is not None:
+        return ShardedDatabase(directory, classes).champions()
+    with open(DATABASE_FILE, 'r', encoding='utf-8') as f:
+        champions_data = json.load(f)
+    if classes:
+        wanted = {class_name.lower() for class_name in classes}
+        champions_data = {key: champ for key, champ in champions_data.items() if champ['class'].lower() in wanted}
+    return champions_data
+
+
+def display_top_20_per_class(classes=None):
+    """Display the top 20 champions from each class (or only from the given classes)"""
     
     # Load the database
-    with open('champions_database.json', 'r', encoding='utf-8') as f:
-        champions_data = json.load(f)
+    champions_data = load_champions(classes)
     
     print("Top 20 Champions by Class")
     print("=" * 50)
@@ -51,4 +69,5 @@ def display_top_20_per_class():
         print(f"  {bg_type}: {count}")
 
 if __name__ == "__main__":
-    display_top_20_per_class()
\ No newline at end of file
+    # e.g. python show_top_by_class.py Mystic Tech
+    display_top_20_per_class(sys.argv[1:] or None)
\ No newline at end of file
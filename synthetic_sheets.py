@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Synthetic spreadsheets in the exact layouts build_database.py parses
+
+Writes battlegrounds.csv (Vega's BGs layout: class names across row 0,
+section marker rows, "Name - 9🔥" cells down each class column) and
+rankings.csv (general rankings layout: class blocks in column A, tier headers
+above each column, champions with emoji symbols) into a directory, the same
+file names build_regression.py reads fixtures from. Both sheets include the
+decoy cells the real ones have: notes, links, creator credits and header
+text that the parser has to skip.
+
+    python synthetic_sheets.py /tmp/sheets --per-class 400 --columns 8 --emoji 0.8
+
+Class blocks are only recognised for classes in data/sheet_layouts.json, so
+at most that many classes can be generated.
+"""
+import argparse
+import csv
+import os
+import random
+from typing import Dict, List
+
+from utils.sheet_layout import sheet_layout
+
+SYLLABLES = ['ka', 'ro', 'mi', 'zen', 'tor', 'vex', 'la', 'qui', 'dra', 'sho', 'ny', 'gar', 'phe', 'lix', 'um']
+EPITHETS = ['(Deathless)', '(Supreme)', '(Sigil)', '(Stealth)', '(Classic)', 'Prime', 'Noir', '2099']
+SYMBOLS = ['🌟', '🚀', '💎', '🌹', '💾', '🎲', '7️⃣', '⚔️', '🐣']
+TIER_HEADERS = ['Tier Above All', 'Scorching', 'Super Hot', 'Hot', 'Mild']
+BG_SECTIONS = [('Dual Threats', 'Dual Threat'), ('Attackers', 'Attacker'), ('Defenders', 'Defender')]
+RATINGS = ['10', '9', '9', '8', '7', '7', '6', '5']
+# Cells in the real sheets that aren't champions
+DECOYS = ['Youtube: more helpful videos', 'Guide by Vega', 'Creator codes: ILLUMINATI', 'Tier List',
+          'go to file', 'Note: ranking assumes max sig,\nawakened', 'Discord link']
+# The BG sheet's look like rated cells ("Vega - 9") or carry no rating at all
+BG_DECOYS = ['Vega - 9', 'Youtube link - 3', 'Twitch stream - 10', 'Ratings are for BG attack and defense']
+
+
+def champion_names(rng: random.Random, count: int) -> List[str]:
+    """count distinct made-up champion names, some with an epithet like the real roster"""
+    names: Dict[str, None] = {}
+    while len(names) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+                 for _ in range(rng.randint(1, 2))]
+        if rng.random() < 0.15:
+            words.append(rng.choice(EPITHETS))
+        names[' '.join(words)] = None
+    return list(names)
+
+
+def with_symbols(rng: random.Random, name: str, emoji: float) -> str:
+    """name followed by 0-3 symbols, with probability emoji of having any"""
+    if rng.random() >= emoji:
+        return name
+    return name + ''.join(rng.sample(SYMBOLS, rng.randint(1, 3)))
+
+
+def bg_name(rng: random.Random, name: str) -> str:
+    """How the BG sheet writes a name: mostly the same, sometimes shortened or spelled differently"""
+    roll = rng.random()
+    if roll < 0.05 and '(' in name:
+        return name.split(' (')[0] + ' ' + name.split('(')[1].rstrip(')')
+    if roll < 0.08:
+        return name.replace(' ', '-', 1)
+    return name
+
+
+def make_sheets(per_class: int = 40, classes: int = 6, columns: int = 5, emoji: float = 0.5,
+                bg_share: float = 0.6, decoys: float = 0.03, seed: int = 1) -> Dict[str, List[List[str]]]:
+    """Rows of both sheets: {"rankings": rows, "battlegrounds": rows}.
+
+    per_class champions are ranked in each class, spread over `columns` tier
+    columns; bg_share of them also get a BG rating. emoji is the share of
+    cells with symbols and decoys the share of empty cells holding a decoy.
+    """
+    layout_classes = [name.title() for name in sheet_layout("general_rankings").classes]
+    if classes > len(layout_classes):
+        raise ValueError(f"At most {len(layout_classes)} classes are recognised by the rankings layout")
+    class_names = layout_classes[:classes]
+    rng = random.Random(seed)
+    names = champion_names(rng, per_class * classes)
+    roster = {class_name: names[index * per_class:(index + 1) * per_class]
+              for index, class_name in enumerate(class_names)}
+
+    # Rankings: tier headers across row 1 and again on each class row, champions down the tier columns
+    headers = [TIER_HEADERS[min(col * len(TIER_HEADERS) // columns, len(TIER_HEADERS) - 1)] for col in range(columns)]
+    rankings = [['Class', 'Champions'] + [''] * (columns - 1), ['To use tier list'] + headers]
+    height = -(-per_class // columns)
+    for class_name in class_names:
+        rankings.append([class_name.upper() if rng.random() < 0.5 else class_name] + headers)
+        grid = [[''] * columns for _ in range(height)]
+        for index, name in enumerate(roster[class_name]):
+            grid[index % height][index // height] = with_symbols(rng, name, emoji)
+        for row in grid:
+            rankings.append([''] + [rng.choice(DECOYS) if not cell and rng.random() < decoys else cell
+                                    for cell in row])
+
+    # Battlegrounds: one column per class, a marker row per section, then "Name - 9🔥" cells
+    battlegrounds = [[''] + class_names, [''] * (classes + 1), ['Vega BG tier list'] + [''] * classes]
+    sections = {class_name: [[] for _ in BG_SECTIONS] for class_name in class_names}
+    for class_name in class_names:
+        for name in roster[class_name]:
+            if rng.random() < bg_share:
+                rating = rng.choice(RATINGS) + ('🔥' if rng.random() < emoji else '')
+                sections[class_name][rng.randrange(len(BG_SECTIONS))].append(f"{bg_name(rng, name)} - {rating}")
+    for index, (marker, _) in enumerate(BG_SECTIONS):
+        battlegrounds.append([marker] + [''] * classes)
+        depth = max(len(sections[class_name][index]) for class_name in class_names)
+        for row_idx in range(depth):
+            row = ['']
+            for class_name in class_names:
+                cells = sections[class_name][index]
+                cell = cells[row_idx] if row_idx < len(cells) else ''
+                row.append(cell or (rng.choice(BG_DECOYS) if rng.random() < decoys else ''))
+            battlegrounds.append(row)
+
+    return {"rankings": rankings, "battlegrounds": battlegrounds}
+
+
+def write_sheets(directory: str, **options) -> Dict[str, str]:
+    """Write both sheets as CSV exports into directory and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, rows in make_sheets(**options).items():
+        paths[name] = os.path.join(directory, f"{name}.csv")
+        with open(paths[name], 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f, lineterminator='\r\n').writerows(rows)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic BG and ranking sheets as CSV exports")
+    parser.add_argument("directory")
+    parser.add_argument("--per-class", type=int, default=40, help="champions ranked in each class")
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--columns", type=int, default=5, help="tier columns per class block")
+    parser.add_argument("--emoji", type=float, default=0.5, help="share of cells with symbols")
+    parser.add_argument("--decoys", type=float, default=0.03, help="share of empty cells holding a decoy")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    paths = write_sheets(args.directory, per_class=args.per_class, classes=args.classes, columns=args.columns,
+                         emoji=args.emoji, decoys=args.decoys, seed=args.seed)
+    for name, path in paths.items():
+        print(f"{name}: {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import Dict, List, Optional
+from data_manager_json import DataManager
+
+
+def champion_record(name: str, tier: str = "Hot", rank: int = 1, rating: Optional[int] = None,
+                    bg_type: Optional[str] = None, class_name: str = "Tech", sources: Optional[Dict] = None) -> Dict:
+    """A champion as build_database.py writes it to champions_database.json (the fields the bot reads)"""
+    return {"name": name, "class": class_name, "rank": rank, "tier": tier, "ranking_display": f"{class_name} #{rank}",
+            "battlegrounds_rating": rating, "battlegrounds_type": bg_type, "sources": sources or {}}
+
+
+# A small database for the command, query API and tracing tests
+CHAMPIONS = {
+    "korg": champion_record("Korg", "Above All", 1, 10, "Dual Threat"),
+    "tigra": champion_record("Tigra", "Scorching", 2, 9, "Attacker", class_name="Mystic"),
+    "hercules": champion_record("Hercules", "Mild", 30, 5, "Defender", class_name="Cosmic"),
+}
+
+
+class FakeContext:
+    """What the command callbacks and cog hooks use of a commands.Context; replies are kept"""
+
+    class Who:
+        def __init__(self, id):
+            self.id = id
+
+    def __init__(self, command, user_id: int = 1, guild_id: int = 2):
+        self.command = command
+        self.author = self.Who(user_id)
+        self.guild = self.Who(guild_id)
+        self.command_failed = False
+        self.replies: List[str] = []
+
+    async def send(self, content: str):
+        self.replies.append(content)
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """A test case with its own champions_database.json in a temporary directory"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp.name, 'champions_database.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_database(self, champions: Dict[str, Dict]):
+        """Replace the database file with these {name_key: champion} entries"""
+        with open(self.db_file, 'w', encoding='utf-8') as f:
+            json.dump(champions, f)
+
+    def load_database(self, champions: Dict[str, Dict]) -> DataManager:
+        """Write the database and load a JSON DataManager from it"""
+        self.write_database(champions)
+        return DataManager(db_file=self.db_file)
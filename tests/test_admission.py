@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import unittest
+from cogs.command_handler import CommandHandler
+from utils.admission import AdmissionController, Overloaded
+from utils.offload import BULK, CHEAP, run_blocking
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.admission = AdmissionController(user_rate=1, user_burst=2, guild_rate=10, guild_burst=3,
+                                             max_bulk_queue=1, clock=self.clock)
+
+    def test_user_bucket_refills_over_time(self):
+        self.admission.admit("ann", "guild", 1)
+        self.admission.admit("ann", "guild", 1)
+        with self.assertRaises(Overloaded) as raised:
+            self.admission.admit("ann", "guild", 1)
+        self.assertEqual(raised.exception.reason, "user")
+        self.assertIn("1s", str(raised.exception))
+        self.clock.now = 1.0
+        self.assertEqual(self.admission.admit("ann", "guild", 1), CHEAP)
+
+    def test_guild_bucket_is_shared_and_rejections_cost_nothing(self):
+        for user in ("ann", "bob", "cat"):
+            self.admission.admit(user, "guild", 1)
+        with self.assertRaises(Overloaded) as raised:
+            self.admission.admit("dan", "guild", 1)
+        self.assertEqual(raised.exception.reason, "guild")
+        # Dan's own bucket wasn't charged for the rejected command
+        self.assertEqual(self.admission.users["dan"].tokens, 2)
+        self.assertEqual(self.admission.admit("dan", None, 1), CHEAP)
+
+    def test_bulk_queue_is_bounded(self):
+        self.assertEqual(self.admission.admit("ann", None, 30), BULK)
+        self.assertEqual(self.admission.admit("bob", None, 3), CHEAP)
+        with self.assertRaises(Overloaded) as raised:
+            self.admission.admit("cat", None, 30)
+        self.assertEqual(raised.exception.reason, "queue")
+        self.admission.release(BULK)
+        self.assertEqual(self.admission.admit("cat", None, 30), BULK)
+        self.assertEqual(self.admission.shed, {"queue": 1})
+
+
+class TestLanes(unittest.TestCase):
+    def test_cheap_work_does_not_wait_behind_bulk_work(self):
+        release = threading.Event()
+
+        async def run():
+            bulk = asyncio.ensure_future(run_blocking(release.wait, 5, lane=BULK))
+            cheap = await asyncio.wait_for(run_blocking(lambda: "done", lane=CHEAP), timeout=2)
+            release.set()
+            await bulk
+            return cheap
+
+        self.assertEqual(asyncio.run(run()), "done")
+
+
+class TestCoalescing(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = self.load_database({"korg": champion_record("Korg", "Hot", 1, 9)})
+        self.handler = CommandHandler(self.manager)
+
+    def test_identical_requests_share_one_computation(self):
+        release = threading.Event()
+        lookups = []
+        lookup = self.manager.get_champion_by_name
+
+        def slow_lookup(name):
+            lookups.append(name)
+            release.wait(5)
+            return lookup(name)
+
+        self.manager.get_champion_by_name = slow_lookup
+
+        async def run():
+            requests = [asyncio.ensure_future(self.handler.get_champion_rankup_info_async("korg", user_id=user))
+                        for user in range(20)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*requests)
+
+        replies = asyncio.run(run())
+        self.assertEqual(len(set(replies)), 1)
+        self.assertIn("Korg", replies[0])
+        self.assertEqual(lookups, ["korg"])
+        self.assertEqual(self.handler._in_flight, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from utils.build_pipeline import Stage, StagedBuild
+
+
+class TestStagedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stages(self, keywords):
+        def source():
+            self.calls.append('source')
+            return ['Tigra', 'Youtube link', 'Korg']
+
+        def upper(names):
+            self.calls.append('upper')
+            return [name.upper() for name in names]
+
+        def keep(names, keywords):
+            self.calls.append('keep')
+            return [name for name in names if not any(k in name for k in keywords)]
+
+        # Listed out of order on purpose; the runner sorts by dependencies
+        return [
+            Stage('keep', keep, inputs=('upper',), config={'keywords': keywords}),
+            Stage('upper', upper, inputs=('source',)),
+            Stage('source', source),
+        ]
+
+    def test_config_change_reruns_only_downstream_stages(self):
+        report_path = os.path.join(self.tmp.name, 'report.json')
+        build = StagedBuild(cache_dir=self.tmp.name)
+        outputs = build.run(self.stages(['YOUTUBE']), report_path=report_path)
+        self.assertEqual(outputs['keep'], ['TIGRA', 'KORG'])
+        self.assertEqual(self.calls, ['source', 'upper', 'keep'])
+
+        self.calls.clear()
+        outputs = build.run(self.stages(['KORG']))
+        self.assertEqual(outputs['keep'], ['TIGRA', 'YOUTUBE LINK'])
+        self.assertEqual(self.calls, ['keep'])
+
+        with open(report_path) as f:
+            report = json.load(f)
+        self.assertEqual([stage['stage'] for stage in report['stages']], ['source', 'upper', 'keep'])
+        self.assertTrue(all(stage['bytes'] > 0 for stage in report['stages']))
+
+    def test_independent_stages_run_in_parallel(self):
+        # Both fetches wait for each other; run one after the other they would time out
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fetch(name):
+            barrier.wait()
+            return name
+
+        stages = [
+            Stage('fetch_a', fetch, config={'name': 'a'}, cacheable=False),
+            Stage('fetch_b', fetch, config={'name': 'b'}, cacheable=False),
+            Stage('join', lambda a, b: a + b, inputs=('fetch_a', 'fetch_b')),
+        ]
+        build = StagedBuild(cache_dir=self.tmp.name, max_workers=2)
+        self.assertEqual(build.run(stages)['join'], 'ab')
+        self.assertEqual([stage['stage'] for stage in build.report['stages']], ['fetch_a', 'fetch_b', 'join'])
+
+    def test_helper_change_reruns_the_stage(self):
+        def split_commas(text):
+            return text.split(',')
+
+        def split_semicolons(text):
+            return text.split(';')
+
+        def stages(helper):
+            def parse():
+                self.calls.append('parse')
+                return helper('Korg,Tigra;Hex')
+            return [Stage('parse', parse, helpers=(helper,))]
+
+        build = StagedBuild(cache_dir=self.tmp.name)
+        self.assertEqual(build.run(stages(split_commas))['parse'], ['Korg', 'Tigra;Hex'])
+        build.run(stages(split_commas))
+        self.assertEqual(self.calls, ['parse'])
+        # Same stage function, different helper source: the cached artifact is stale
+        self.assertEqual(build.run(stages(split_semicolons))['parse'], ['Korg,Tigra', 'Hex'])
+        self.assertEqual(self.calls, ['parse', 'parse'])
+
+    def test_unknown_input_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StagedBuild(cache_dir=self.tmp.name).run([Stage('a', list, inputs=('missing',))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import unittest
+from build_regression import GOLDEN_FILE, diff_databases, find_regressions, run_offline_build
+
+
+class TestBuildRegression(unittest.TestCase):
+    def test_offline_build_matches_golden_database(self):
+        database, report, _, _ = run_offline_build()
+        with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+        self.assertEqual(diff_databases(golden, database), [])
+        self.assertIn('parse_rankings', [stage['stage'] for stage in report['stages']])
+
+    def test_diff_reports_fields_and_champions(self):
+        golden = {'hex': {'rank': 1, 'tier': 'Hot'}, 'korg': {'rank': 1}}
+        produced = {'hex': {'rank': 2, 'tier': 'Hot', 'new': True}, 'tigra': {'rank': 1}}
+        self.assertEqual(diff_databases(golden, produced),
+                         ['- korg: missing', '+ tigra: new champion', '~ hex.rank: 1 -> 2', '~ hex.new: None -> True'])
+        self.assertEqual(diff_databases({'a': {}, 'b': {}}, {'b': {}, 'a': {}}), ['~ champion order changed'])
+
+    def test_regressions_are_measured_against_the_median_of_recent_runs(self):
+        history = [{'seconds': seconds, 'peak_mb': 4.0, 'stages': {'merge': seconds / 2}} for seconds in (1.0, 1.1, 5.0)]
+        run = {'seconds': 1.3, 'peak_mb': 4.1, 'stages': {'merge': 0.9}}
+        self.assertEqual(find_regressions(run, history, threshold=0.25),
+                         ['stage merge: 0.9000 vs baseline 0.5500 (+64%)'])
+        self.assertEqual(find_regressions(run, history, threshold=1.0), [])
+        self.assertEqual(find_regressions(run, [], threshold=0.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import json
+import os
+import unittest
+from utils.cell_tokenizer import parse_rating, tokenize_cell
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'cells.json')
+
+
+class TestCellTokenizer(unittest.TestCase):
+    def test_fixture_corpus(self):
+        """Cell strings in the formats the sheets use, with their expected tokens"""
+        with open(FIXTURES, 'r', encoding='utf-8') as f:
+            corpus = json.load(f)
+        for case in corpus:
+            with self.subTest(cell=case['cell']):
+                tokens = tokenize_cell(case['cell'], rated=case['rated'])
+                self.assertEqual(tokens.name, case['name'])
+                self.assertEqual(tokens.rating, case['rating'])
+                self.assertEqual(list(tokens.symbols), case['symbols'])
+
+    def test_symbols_match_the_legend(self):
+        """Symbols keep their variation selectors, so they match the command legend's keys"""
+        self.assertEqual(tokenize_cell('Doctor Doom⚔️🎙️7️⃣').symbols, ('⚔️', '🎙️', '7️⃣'))
+
+    def test_parse_rating(self):
+        self.assertEqual([parse_rating(d) for d in ('7', '10', '107', '9')], [7, 10, 10, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
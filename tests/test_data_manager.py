@@ -1,6 +1,8 @@
+import threading
 import unittest
 from data_manager import DataManager
 from champion_model import Champion
+from tests.helpers import DatabaseTestCase, champion_record
 
 class TestDataManager(unittest.TestCase):
     def test_champion_creation(self):
@@ -21,5 +23,110 @@ class TestDataManager(unittest.TestCase):
         self.assertIn("⚔️", champion.symbols)
         self.assertEqual(champion.source, "test")
 
+class TestSourceViews(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        database = {
+            "korg": champion_record("Korg", "Hot", 2, 9, sources={"rankings": {"tier": "Hot", "rank": 2},
+                                                                  "battlegrounds": {"rating": 9},
+                                                                  "war": {"tier": "Above All"}}),
+            "hex": champion_record("Hex", "Above All", 1, sources={"rankings": {"tier": "Above All", "rank": 1}}),
+            "tigra": champion_record("Tigra", "Hot", 1, 10, sources={"rankings": {"tier": "Hot", "rank": 1},
+                                                                     "battlegrounds": {"rating": 10}}),
+        }
+        self.manager = self.load_database(database)
+
+    def names(self, source, limit=10):
+        return [champion.name for champion in self.manager.get_top_champions_by_tier(source, limit)]
+
+    def test_each_source_has_its_own_order(self):
+        self.assertEqual(self.names('rankings'), ['Hex', 'Tigra', 'Korg'])
+        self.assertEqual(self.names('battlegrounds'), ['Tigra', 'Korg'])
+        self.assertEqual(self.names('war'), ['Korg'])
+        self.assertEqual(self.names('vega', 1), ['Tigra'])
+        self.assertEqual(self.names('missing'), [])
+
+    def test_blended_view_averages_the_sources(self):
+        # Hex 10; Tigra (7 + 10) / 2; Korg (7 + 9 + 10) / 3
+        self.assertEqual(self.names('blended'), ['Hex', 'Korg', 'Tigra'])
+        self.assertIn('blended', self.manager.available_sources())
+
+
+class TestLiveSheets(unittest.TestCase):
+    def setUp(self):
+        self.manager = DataManager(live=True, max_age=60)
+        self.release = threading.Event()
+        self.fetching = threading.Event()
+        self.fail = False
+
+        def fetch_vega(url, digest=None):
+            self.fetching.set()
+            self.release.wait(5)
+            if self.fail:
+                raise TimeoutError("sheet timed out")
+            if digest is not None:
+                digest.update(b"Korg - 9")
+            return [Champion(name="Korg", tier="Hot", category="Tech", rating=9, source="vega")]
+
+        self.manager._fetch_vega_sheet = fetch_vega
+        self.manager._fetch_illuminati_sheet = lambda url, digest=None: []
+
+    def wait_for_refresh(self):
+        with self.manager._refreshing:
+            pass
+
+    def test_queries_answer_from_the_snapshot_while_the_sheets_load(self):
+        self.manager.champions_data = {'vega': [Champion(name="Hex", tier="Hot", category="Mystic", source="vega")]}
+        self.manager.snapshot.fetched_at['vega'] -= 120  # older than max_age
+        # The stale snapshot is served at once and a refresh starts behind it
+        self.assertEqual([c.name for c in self.manager.get_champion_by_name("hex")], ["Hex"])
+        self.assertTrue(self.manager.status()["refreshing"])
+        self.assertFalse(self.manager.revalidate())
+
+        self.release.set()
+        self.wait_for_refresh()
+        self.assertEqual([c.name for c in self.manager.get_top_champions_by_tier('vega')], ["Korg"])
+        self.assertLess(self.manager.data_age(), 5)
+
+    def test_failed_refresh_keeps_the_last_good_data(self):
+        self.release.set()
+        self.manager.refresh_data()
+        self.wait_for_refresh()
+        age = self.manager.status()["source_ages"]["vega"]
+
+        self.fail = True
+        self.assertTrue(self.manager.revalidate())
+        self.wait_for_refresh()
+        self.assertEqual([c.name for c in self.manager.champions_data['vega']], ["Korg"])
+        self.assertGreaterEqual(self.manager.status()["source_ages"]["vega"], age)
+        self.assertIn("timed out", self.manager.last_error)
+
+    def test_unchanged_sheets_are_not_swapped_in_again(self):
+        self.release.set()
+        self.assertEqual(self.manager.apply_refresh(self.manager.prepare_refresh()),
+                         {"added": 1, "removed": 0, "changed": 0})
+        snapshot = self.manager.snapshot
+        self.assertIsNone(self.manager.prepare_refresh())
+        self.assertIs(self.manager.champions_data['vega'], snapshot.champions_data['vega'])
+
+    def test_scheduled_refresh_holds_the_lock_until_it_is_applied(self):
+        prepared = []
+        scheduled = threading.Thread(target=lambda: prepared.append(self.manager.prepare_refresh()))
+        scheduled.start()
+        # The scheduler's refresh is running, so no background refresh can start from the same data
+        self.fetching.wait(5)
+        self.assertFalse(self.manager.revalidate())
+        self.release.set()
+        scheduled.join()
+        self.assertFalse(self.manager.revalidate())
+
+        self.manager.apply_refresh(prepared[0])
+        self.assertIs(self.manager.snapshot, prepared[0])
+        self.assertTrue(self.manager.revalidate())
+        self.wait_for_refresh()
+        # The sheets didn't change, so the unchanged path only renewed the age of the applied data
+        self.assertIs(self.manager.champions_data['vega'], prepared[0].champions_data['vega'])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
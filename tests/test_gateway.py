@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+import discord
+import bot_main
+from bot_main import create_bot
+from cogs.command_handler import MCOCCommands
+from data_manager_json import DataManager
+from utils.gateway import FULL, INTERACTIONS, LEAN, gateway_options, reads_messages
+
+
+class FakeInteraction:
+    """Records how a slash command was acknowledged and answered"""
+
+    class Who:
+        def __init__(self, id):
+            self.id = id
+
+    class Response:
+        def __init__(self, sent):
+            self.sent = sent
+            self.deferred = False
+
+        def is_done(self):
+            return self.deferred
+
+        async def defer(self):
+            assert not self.deferred, "acknowledged twice"
+            self.deferred = True
+            self.sent.append("defer")
+
+    class Followup:
+        def __init__(self, response, sent):
+            self.response = response
+            self.sent = sent
+
+        async def send(self, content):
+            assert self.response.deferred, "followup before the acknowledgement"
+            self.sent.append(content)
+
+    def __init__(self):
+        self.user = self.Who(1)
+        self.guild_id = 2
+        self.sent = []
+        self.response = self.Response(self.sent)
+        self.followup = self.Followup(self.response, self.sent)
+
+
+class TestGatewayModes(unittest.TestCase):
+    def test_lean_modes_turn_the_caches_off(self):
+        full, lean, interactions = (gateway_options(mode) for mode in (FULL, LEAN, INTERACTIONS))
+        self.assertEqual(list(full), ["intents"])
+        self.assertTrue(full["intents"].guild_typing)
+        self.assertEqual(lean["intents"], discord.Intents(guilds=True, guild_messages=True, dm_messages=True,
+                                                          message_content=True))
+        self.assertEqual(interactions["intents"].value, 0)
+        for options in (lean, interactions):
+            self.assertEqual(options["member_cache_flags"].value, 0)
+            self.assertFalse(options["chunk_guilds_at_startup"])
+            self.assertIsNone(options["max_messages"])
+        self.assertEqual([reads_messages(mode) for mode in (FULL, LEAN, INTERACTIONS)], [True, True, False])
+        with self.assertRaises(ValueError):
+            gateway_options("tiny")
+
+    def test_bot_in_interactions_mode_has_the_slash_commands(self):
+        async def run():
+            bot = create_bot(metrics_port=0, gateway_mode=INTERACTIONS)
+            await bot.add_cog(MCOCCommands(bot, DataManager()))
+            return bot
+
+        bot = asyncio.run(run())
+        self.assertEqual(bot.intents.value, 0)
+        self.assertIsNone(bot._connection.max_messages)
+        self.assertEqual(sorted(command.name for command in bot.tree.get_commands()), ["pick", "rankup"])
+
+
+    def test_slash_commands_are_acknowledged_before_the_reply(self):
+        cog = MCOCCommands(None, DataManager())
+        interaction = FakeInteraction()
+        asyncio.run(cog.pick_slash.callback(cog, interaction, 1, "korg, hercules"))
+        self.assertEqual(interaction.sent[0], "defer")
+        self.assertEqual(len(interaction.sent), 2)
+
+    def test_slash_commands_wait_for_startup(self):
+        async def run():
+            bot = create_bot(metrics_port=0, gateway_mode=INTERACTIONS)
+            early = FakeInteraction()
+            allowed_early = await bot.tree.interaction_check(early)
+            waiting = FakeInteraction()
+            check = asyncio.ensure_future(bot.tree.interaction_check(waiting))
+            await asyncio.sleep(0)
+            bot.startup.mark_ready()
+            allowed_after_wait = await check
+            ready = FakeInteraction()
+            return (allowed_early, early.sent), (allowed_after_wait, waiting.sent), \
+                (await bot.tree.interaction_check(ready), ready.sent)
+
+        saved = bot_main.STARTUP_WAIT_SECONDS
+        bot_main.STARTUP_WAIT_SECONDS = 0.05
+        try:
+            early, waited, ready = asyncio.run(run())
+        finally:
+            bot_main.STARTUP_WAIT_SECONDS = saved
+        # Never ready in time: acknowledged, then told to come back
+        self.assertFalse(early[0])
+        self.assertEqual(early[1][0], "defer")
+        self.assertIn("starting up", early[1][1])
+        # Ready while waiting: acknowledged, and the command answers in a followup
+        self.assertEqual(waited, (True, ["defer"]))
+        self.assertEqual(ready, (True, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
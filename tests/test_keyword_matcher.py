@@ -0,0 +1,29 @@
+import random
+import unittest
+from utils.keyword_matcher import KeywordMatcher, load_pattern_lists
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_matches_agree_with_substring_checks(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            keywords = [''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+            text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 12)))
+            matcher = KeywordMatcher(keywords)
+            found = [k for k in keywords if k in text]
+            self.assertEqual(matcher.contains_any(text), bool(found))
+            self.assertEqual(matcher.longest_match(text), max((len(k) for k in found), default=0))
+
+    def test_case_insensitive(self):
+        matcher = KeywordMatcher(['Tier List'], case_sensitive=False)
+        self.assertTrue(matcher.contains_any('BEST TIER LIST 2024'))
+        self.assertFalse(KeywordMatcher(['Tier List']).contains_any('tier list'))
+
+    def test_pattern_lists_are_in_data(self):
+        patterns = load_pattern_lists()
+        for name in ('header_keywords', 'non_champion_keywords', 'champion_list_exclusions'):
+            self.assertTrue(patterns[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
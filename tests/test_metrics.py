@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from utils.metrics import Metrics, MetricsServer, metrics, watch_data_manager
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+class TestMetrics(DatabaseTestCase):
+    def test_render_counters_and_histograms(self):
+        registry = Metrics()
+        registry.describe("jobs_total", "counter", "Jobs run")
+        registry.describe("job_seconds", "histogram", "Job time", buckets=(0.1, 1.0))
+        registry.inc("jobs_total", {"kind": "pick"})
+        registry.inc("jobs_total", {"kind": "pick"})
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            registry.observe("job_seconds", seconds, {"kind": "pick"})
+        registry.gauge("age_seconds", lambda: 12)
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE jobs_total counter", lines)
+        self.assertIn('jobs_total{kind="pick"} 2', lines)
+        self.assertIn('job_seconds_bucket{kind="pick",le="0.1"} 2', lines)
+        self.assertIn('job_seconds_bucket{kind="pick",le="1.0"} 3', lines)
+        self.assertIn('job_seconds_bucket{kind="pick",le="+Inf"} 4', lines)
+        self.assertIn('job_seconds_count{kind="pick"} 4', lines)
+        self.assertIn("age_seconds 12", lines)
+
+    def test_lookups_are_counted_by_path(self):
+        manager = self.load_database({"korg": champion_record("Korg", "Hot", 1, 9)})
+        before = {path: metrics.counter_value("mcoc_champion_lookups_total", {"path": path})
+                  for path in ("exact", "fuzzy", "miss")}
+        manager.get_champion_by_name("Korg")
+        manager.get_champion_by_name("korgg")
+        manager.get_champion_by_name("zzzzzzzz")
+        for path in before:
+            self.assertEqual(metrics.counter_value("mcoc_champion_lookups_total", {"path": path}), before[path] + 1)
+        self.assertEqual(len(manager.data_version()), 12)
+
+
+class TestMetricsServer(unittest.TestCase):
+    async def get(self, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), body.decode()
+
+    def test_endpoints(self):
+        ready = []
+        registry = Metrics()
+        registry.inc("jobs_total")
+
+        class Manager:
+            def data_version(self):
+                return "abc123"
+
+            def data_age(self):
+                return 30.0
+
+        watch_data_manager(Manager(), registry)
+
+        async def run():
+            server = MetricsServer(0, registry, ready=lambda: bool(ready), host="127.0.0.1")
+            await server.start()
+            try:
+                results = [await self.get(server.port, path) for path in ("/healthz", "/readyz", "/metrics", "/nope")]
+                ready.append(True)
+                results.append(await self.get(server.port, "/readyz"))
+                return results
+            finally:
+                await server.stop()
+
+        healthz, not_ready, scrape, missing, now_ready = asyncio.run(run())
+        self.assertEqual(healthz, (200, "ok\n"))
+        self.assertEqual(not_ready[0], 503)
+        self.assertEqual(now_ready[0], 200)
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(scrape[0], 200)
+        self.assertIn("jobs_total 1", scrape[1])
+        self.assertIn('mcoc_data_info{version="abc123"} 1', scrape[1])
+        self.assertIn("mcoc_data_age_seconds 30.0", scrape[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
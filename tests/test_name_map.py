@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from build_database import name_hash, merge_battlegrounds, save_name_map
+
+
+def bg_record(name, rating):
+    return {"rating": rating, "type": "Attacker",
+            "provenance": {"sheet": "battlegrounds", "cell": "B5", "value": f"{name} - {rating}", "class": "Science"}}
+
+
+def ranked(name):
+    return {"name": name.title(), "source": "ranking", "provenance": [{"sheet": "rankings", "value": name.title()}]}
+
+
+class TestNameMap(unittest.TestCase):
+    def setUp(self):
+        self.rankings = {"champions": {name: ranked(name) for name in ("spider-man (supreme)", "hulk", "korg")}}
+        self.battlegrounds = {"battlegrounds": {"spidey supreme": bg_record("Spidey Supreme", 9),
+                                                "kang": bg_record("Kang", 5)}}
+        self.config = {"known_variations": {}, "shared_terms": ["supreme"], "match_threshold": 0.75}
+
+    def test_new_pairings_are_recorded_or_sent_to_review(self):
+        merged = merge_battlegrounds(self.battlegrounds, self.rankings, {"pairings": {}}, **self.config)
+        self.assertEqual(merged["champions"]["spider-man (supreme)"]["battlegrounds_rating"], 9)
+        self.assertEqual(merged["pairings"]["spidey supreme"]["ranking_name"], "spider-man (supreme)")
+        # A weak guess is reported, not applied
+        self.assertEqual([entry["bg_name"] for entry in merged["review"]], ["kang"])
+        self.assertIn("kang", merged["unmatched"])
+
+    def test_confirmed_pairing_is_reused_without_fuzzy_matching(self):
+        name_map = {"pairings": {"kang": {"ranking_name": "korg", "score": 1.0,
+                                          "bg_hash": name_hash("kang"), "ranking_hash": name_hash("korg")}}}
+        merged = merge_battlegrounds(self.battlegrounds, self.rankings, name_map, **self.config)
+        self.assertEqual(merged["champions"]["korg"]["battlegrounds_rating"], 5)
+        self.assertEqual(merged["review"], [])
+
+    def test_review_report_records_the_threshold_the_merge_used(self):
+        merged = merge_battlegrounds(self.battlegrounds, self.rankings, {"pairings": {}},
+                                     **{**self.config, "match_threshold": 0.99})
+        with tempfile.TemporaryDirectory() as tmp:
+            review_path = os.path.join(tmp, "name_review.json")
+            save_name_map(merged, os.path.join(tmp, "name_map.json"), review_path)
+            with open(review_path, encoding='utf-8') as f:
+                report = json.load(f)
+        self.assertEqual(report["threshold"], 0.99)
+        self.assertEqual(sorted(entry["bg_name"] for entry in report["pending"]), ["kang", "spidey supreme"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import unittest
+from cogs.command_handler import CommandHandler
+from utils.offload import LoopLagMonitor, map_chunked, run_blocking
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+class TestOffload(unittest.TestCase):
+    def test_blocking_work_runs_off_the_loop_thread(self):
+        async def run():
+            return await run_blocking(threading.get_ident)
+
+        self.assertNotEqual(asyncio.run(run()), threading.get_ident())
+
+    def test_map_chunked_keeps_order_and_yields_between_chunks(self):
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(len(calls))
+                await asyncio.sleep(0)
+
+        calls = []
+
+        def square(value):
+            calls.append(value)
+            return value * value
+
+        async def run():
+            task = asyncio.ensure_future(ticker())
+            results = await map_chunked(square, list(range(10)), chunk_size=3)
+            task.cancel()
+            return results
+
+        self.assertEqual(asyncio.run(run()), [value * value for value in range(10)])
+        # The loop ran other work between the chunks
+        self.assertTrue(any(0 < done < 10 for done in ticks))
+
+    def test_lag_monitor_stats(self):
+        monitor = LoopLagMonitor(window=100, warn_above=float('inf'))
+        self.assertEqual(monitor.stats()["samples"], 0)
+        for lag in [0.001] * 98 + [0.2, 0.5]:
+            monitor.record(lag)
+        stats = monitor.stats()
+        self.assertEqual(stats["p50"], 0.001)
+        self.assertEqual(stats["p99"], 0.5)
+        self.assertEqual(stats["max"], 0.5)
+
+
+class TestAsyncCommands(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        database = {
+            "korg": champion_record("Korg", "Hot", 2, 9, "Attacker"),
+            "hex": champion_record("Hex", "Above All", 1),
+            "tigra": champion_record("Tigra", "Hot", 1, 10, "Dual Threat"),
+        }
+        self.handler = CommandHandler(self.load_database(database))
+
+    def test_async_variants_reply_like_the_sync_ones(self):
+        names = "krog, tigar, hex, nobody at all, " * 5
+        self.assertEqual(asyncio.run(self.handler.pick_champions_for_battlegrounds_async(2, names)),
+                         self.handler.pick_champions_for_battlegrounds(2, names))
+        self.assertEqual(asyncio.run(self.handler.compare_champions_async("krog, tigra, zzz")),
+                         self.handler.compare_champions("krog, tigra, zzz"))
+        self.assertEqual(asyncio.run(self.handler.get_champion_rankup_info_async("tigar")),
+                         self.handler.get_champion_rankup_info("tigar"))
+
+
+if __name__ == '__main__':
+    unittest.main()
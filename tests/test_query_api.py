@@ -0,0 +1,96 @@
+import asyncio
+import json
+import unittest
+from champion_model import Champion
+from cogs.command_handler import CommandHandler
+from data_manager import DataManager as LiveSheetDataManager
+from utils.admission import AdmissionController
+from utils.query_api import QueryServer
+from tests.helpers import CHAMPIONS, DatabaseTestCase
+
+class TestQueryServer(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler = CommandHandler(self.load_database(CHAMPIONS))
+
+    def serve(self, requests, admission=None):
+        """Send (method, target, body) requests over one keep-alive connection; [(status, parsed body)]"""
+        async def run():
+            server = QueryServer(0, self.handler, admission=admission)
+            await server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            answers = []
+            for method, target, body in requests:
+                writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+                answers.append((int(head.split()[1]), json.loads(await reader.readexactly(length))))
+            writer.close()
+            await server.stop()
+            return answers
+
+        return asyncio.run(run())
+
+    def test_queries_on_one_connection(self):
+        (status, champion), (_, compare), (_, pick), (_, top) = self.serve([
+            ("GET", "/champion?name=tigra", b""),
+            ("GET", "/compare?names=hercules,korg", b""),
+            ("GET", "/pick?n=2&names=hercules,tigra,korg,nobody", b""),
+            ("GET", "/top?class=mystic&limit=5", b""),
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual(champion["champions"][0]["class"], "Mystic")
+        self.assertEqual([entry["champion"]["name"] for entry in compare["ranking"]], ["Korg", "Hercules"])
+        self.assertIn("Korg", compare["recommendation"])
+        self.assertEqual([entry["champion"]["name"] for entry in pick["picks"]], ["Korg", "Tigra"])
+        self.assertEqual([champion["name"] for champion in top["champions"]], ["Tigra"])
+
+    def test_bad_queries(self):
+        statuses = [status for status, _ in self.serve([
+            ("GET", "/pick?names=korg", b""),
+            ("GET", "/top?source=nowhere", b""),
+            ("GET", "/nothing", b""),
+            ("POST", "/champion", b""),
+        ])]
+        self.assertEqual(statuses, [400, 400, 404, 405])
+
+    def test_batch_answers_in_order(self):
+        body = json.dumps(["/champion?name=korg", {"path": "/pick", "params": {"n": 1, "names": ["tigra", "korg"]}},
+                           {"path": "/pick"}, 7]).encode()
+        (status, answers), = self.serve([("POST", "/batch", body)])
+        self.assertEqual(status, 200)
+        self.assertEqual([answer["status"] for answer in answers], [200, 200, 400, 400])
+        self.assertEqual(answers[0]["body"]["champions"][0]["name"], "Korg")
+        self.assertEqual(answers[1]["body"]["picks"][0]["champion"]["name"], "Korg")
+
+    def test_clients_are_rate_limited(self):
+        admission = AdmissionController(user_rate=0.001, user_burst=2)
+        statuses = [status for status, _ in self.serve([("GET", "/champion?name=korg", b"")] * 3, admission)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_json_shares_the_response_cache_across_spellings(self):
+        self.serve([("GET", "/champion?name=Korg", b""), ("GET", "/champion?name=korgg", b"")])
+        self.assertEqual(self.handler.responses.hits, 1)
+
+    def test_top_from_the_live_sheets(self):
+        manager = LiveSheetDataManager()
+        manager.champions_data = {
+            'vega': [Champion(name="Hex", tier="Hot", category="Mystic #4", rating=7, source="vega"),
+                     Champion(name="Korg", tier="Above All", category="Tech #1", rating=10, source="vega")],
+        }
+        self.handler = CommandHandler(manager)
+        (status, top), (_, illuminati), (bad, _) = self.serve([
+            ("GET", "/top?limit=5", b""),
+            ("GET", "/top?source=illuminati", b""),
+            ("GET", "/top?source=blended", b""),
+        ])
+        self.assertEqual(status, 200)
+        self.assertEqual([champion["name"] for champion in top["champions"]], ["Korg", "Hex"])
+        # Not fetched yet: no champions rather than an error
+        self.assertEqual(illuminati["champions"], [])
+        self.assertEqual(bad, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
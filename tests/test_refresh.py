@@ -0,0 +1,140 @@
+import asyncio
+import sys
+import threading
+import unittest
+from data_manager_json import DataManager
+from utils.refresh import RefreshScheduler
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+class FakeManager:
+    """prepare_refresh blocks until released, so refreshes can overlap"""
+
+    def __init__(self, prepared="new data"):
+        self.prepared = prepared
+        self.release = threading.Event()
+        self.prepares = 0
+        self.applied = []
+
+    def prepare_refresh(self, rebuild=False):
+        self.prepares += 1
+        self.release.wait(5)
+        if isinstance(self.prepared, Exception):
+            raise self.prepared
+        return self.prepared
+
+    def apply_refresh(self, prepared):
+        self.applied.append(prepared)
+        return {"added": 1, "removed": 0, "changed": 2}
+
+
+class TestRefreshScheduler(unittest.TestCase):
+    def test_overlapping_refreshes_share_one_run(self):
+        manager = FakeManager()
+        scheduler = RefreshScheduler(manager, interval=3600)
+
+        async def run():
+            first = asyncio.ensure_future(scheduler.refresh())
+            second = asyncio.ensure_future(scheduler.refresh())
+            await asyncio.sleep(0.05)
+            manager.release.set()
+            return await first, await second
+
+        first, second = asyncio.run(run())
+        self.assertIs(first, second)
+        self.assertEqual(manager.prepares, 1)
+        self.assertEqual((first.added, first.changed, first.diff_size), (1, 2, 3))
+        self.assertEqual(manager.applied, ["new data"])
+
+    def test_unchanged_sources_skip_the_swap(self):
+        manager = FakeManager(prepared=None)
+        manager.release.set()
+        result = asyncio.run(RefreshScheduler(manager, interval=3600).refresh())
+        self.assertTrue(result.skipped)
+        self.assertEqual(manager.applied, [])
+        self.assertIn("unchanged", result.summary())
+
+    def test_failures_back_off_up_to_the_interval(self):
+        manager = FakeManager(prepared=OSError("sheet unreachable"))
+        manager.release.set()
+        scheduler = RefreshScheduler(manager, interval=1000, jitter=0, retry_seconds=60)
+        delays = []
+        for _ in range(6):
+            result = asyncio.run(scheduler.refresh())
+            delays.append(scheduler.next_delay())
+        self.assertIn("sheet unreachable", result.summary())
+        self.assertEqual(delays, [60, 120, 240, 480, 960, 1000])
+
+        manager.prepared = "new data"
+        asyncio.run(scheduler.refresh())
+        self.assertEqual(scheduler.next_delay(), 1000)
+
+    def test_jitter_stays_within_bounds(self):
+        scheduler = RefreshScheduler(FakeManager(), interval=100, jitter=0.1)
+        for _ in range(200):
+            self.assertTrue(90 <= scheduler.next_delay() <= 110)
+
+
+class TestJsonRefresh(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write({"hex": "Above All", "korg": "Hot"})
+        self.manager = DataManager(db_file=self.db_file)
+
+    def write(self, tiers):
+        self.write_database({key: champion_record(key.title(), tier) for key, tier in tiers.items()})
+
+    def test_unchanged_database_is_not_reloaded(self):
+        self.assertIsNone(self.manager.prepare_refresh())
+        self.assertEqual(self.manager.refresh_data(), {"added": 0, "removed": 0, "changed": 0})
+
+    def test_changed_database_reports_the_diff(self):
+        self.write({"hex": "Hot", "tigra": "Hot"})
+        self.assertEqual(self.manager.refresh_data(), {"added": 1, "removed": 1, "changed": 1})
+        self.assertEqual(self.manager.get_champion_by_name("tigra")[0].name, "Tigra")
+        self.assertIsNone(self.manager.prepare_refresh())
+
+    def test_unreadable_database_keeps_the_loaded_data(self):
+        with open(self.db_file, 'w', encoding='utf-8') as f:
+            f.write("{not json")
+        self.assertEqual(self.manager.refresh_data(), {"added": 0, "removed": 0, "changed": 0})
+        self.assertEqual(self.manager.get_champion_by_name("korg")[0].name, "Korg")
+
+    def test_lookups_during_a_refresh_see_one_database(self):
+        old = DataManager(db_file=self.db_file)
+        self.write({"photon": "Hot", "hexa": "Hot", "guillotine": "Above All"})
+        new = self.manager.prepare_refresh()
+        answers = {champion.name for manager in (old, new) for champion in manager.champion_lookup.values()}
+        errors, seen = [], set()
+        stop = threading.Event()
+
+        def look_up():
+            while not stop.is_set():
+                try:
+                    # Fuzzy lookups walk the search index and the lookup table, which must come from one database
+                    for query in ("hexx", "korgg", "photn", "guilotine"):
+                        seen.update(champion.name for champion in self.manager.get_champion_by_name(query))
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        try:
+            for thread in threads:
+                thread.start()
+            for _ in range(3000):
+                self.manager.apply_refresh(new)
+                self.manager.apply_refresh(old)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertLessEqual(seen, answers)
+
+
+if __name__ == '__main__':
+    unittest.main()
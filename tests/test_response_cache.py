@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+from cogs.command_handler import CommandHandler
+from utils.response_cache import ResponseCache
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "v1", "A", 0.1)
+        cache.put("b", "v1", "B", 0.1)
+        self.assertEqual(cache.get("a", "v1"), "A")
+        cache.put("c", "v1", "C", 0.1)
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertEqual(cache.get("a", "v1"), "A")
+
+    def test_size_bound_counts_characters(self):
+        cache = ResponseCache(max_chars=10)
+        cache.put("a", "v1", "x" * 6, 0.1)
+        cache.put("b", "v1", "y" * 6, 0.1)
+        self.assertEqual((len(cache), cache.chars), (1, 6))
+        self.assertIsNone(cache.get("a", "v1"))
+
+    def test_new_data_version_empties_the_cache(self):
+        cache = ResponseCache()
+        cache.put("a", "v1", "A", 0.5)
+        self.assertEqual(cache.get("a", "v1"), "A")
+        self.assertIsNone(cache.get("a", "v2"))
+        self.assertEqual(len(cache), 0)
+        cache.put("a", None, "A", 0.5)
+        self.assertEqual(len(cache), 0)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertEqual(stats["saved_seconds"], 0.5)
+
+
+class TestCachedCommands(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler = CommandHandler(self.load_database(
+            self.database({"korg": ("Korg", 9, 2), "tigra": ("Tigra", 10, 1), "hex": ("Hex", 7, 3)})))
+
+    @staticmethod
+    def database(champions):
+        return {key: champion_record(name, "Hot", rank, rating, "Attacker")
+                for key, (name, rating, rank) in champions.items()}
+
+    def pick(self, names):
+        return asyncio.run(self.handler.pick_champions_for_battlegrounds_async(2, names))
+
+    def test_reordered_and_respelled_requests_share_a_reply(self):
+        first = self.pick("korg, tigra, hex")
+        self.assertEqual(first, self.handler.pick_champions_for_battlegrounds(2, "korg, tigra, hex"))
+        self.assertEqual(self.pick("  KORG, tigra,hex"), first)  # same request as typed
+        self.assertEqual(self.pick("hex, tigar, korg"), first)  # same champions
+        stats = self.handler.responses.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_a_miss_quotes_the_name_as_typed(self):
+        def rankup(name):
+            return asyncio.run(self.handler.get_champion_rankup_info_async(name))
+
+        self.assertIn("'zzzz'", rankup("zzzz"))
+        self.assertIn("'ZZZZ'", rankup("ZZZZ"))
+        self.assertEqual(rankup("KORG"), rankup("korg"))
+        self.assertEqual(self.handler.responses.stats()["hits"], 1)
+
+    def test_refresh_invalidates_cached_replies(self):
+        before = self.pick("korg, tigra, hex")
+        self.write_database(self.database({"korg": ("Korg", 10, 1), "tigra": ("Tigra", 6, 2), "hex": ("Hex", 7, 3)}))
+        self.handler.data_manager.refresh_data()
+        after = self.pick("korg, tigra, hex")
+        self.assertNotEqual(after, before)
+        self.assertEqual(after, self.handler.pick_champions_for_battlegrounds(2, "korg, tigra, hex"))
+
+
+if __name__ == '__main__':
+    unittest.main()
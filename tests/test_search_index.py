@@ -0,0 +1,55 @@
+import hashlib
+import unittest
+from data_manager_json import DataManager
+from utils.search_index import (SearchIndex, build_search_index, load_search_index, name_ngrams, normalize_name,
+                                sidecar_path, write_search_index)
+from tests.helpers import DatabaseTestCase, champion_record
+
+
+CHAMPIONS = {
+    "hulk": champion_record("Hulk", "Hot", 4, 7, class_name="Science"),
+    "spider-man (supreme)": champion_record("Spider-Man (Supreme)", "Scorching", 2, class_name="Science"),
+    "hercules": champion_record("Hercules", "Above All", 1, 10, class_name="Cosmic"),
+}
+
+
+class TestSearchIndex(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_database(CHAMPIONS)
+        with open(self.db_file, 'rb') as f:
+            self.sha = hashlib.sha256(f.read()).hexdigest()
+
+    def test_sidecar_is_used_only_for_its_own_database(self):
+        write_search_index(build_search_index(CHAMPIONS, self.sha), sidecar_path(self.db_file))
+        self.assertIsNotNone(load_search_index(sidecar_path(self.db_file), self.sha))
+        self.assertIsNone(load_search_index(sidecar_path(self.db_file), "0" * 64))
+
+        manager = DataManager(db_file=self.db_file)
+        self.assertTrue(manager.sidecar_used)
+        self.assertEqual([c.name for c in manager.get_top_champions_by_tier('vega')], ['Hercules', 'Hulk'])
+
+        write_search_index(build_search_index(CHAMPIONS, "0" * 64), sidecar_path(self.db_file))
+        manager = DataManager(db_file=self.db_file)
+        self.assertFalse(manager.sidecar_used)
+        self.assertEqual(manager.get_champion_by_name("herc")[0].name, "Hercules")
+
+    def test_postings_agree_with_bigram_sets(self):
+        index = SearchIndex(build_search_index(CHAMPIONS, self.sha))
+        index.add("hulkling")
+        self.assertEqual(index.prefixed("hulk"), {0, 3})
+        query = normalize_name("Hulkk")
+        count, shared = index.ngram_scores(query)
+        for position, key in enumerate(index.keys):
+            grams = name_ngrams(normalize_name(key))
+            expected = len(grams & name_ngrams(query)) / len(grams | name_ngrams(query))
+            self.assertAlmostEqual(index.ngram_similarity(count, shared, position), expected)
+
+    def test_names_not_close_in_spelling_find_nothing(self):
+        manager = DataManager(db_file=self.db_file)
+        self.assertEqual(manager.get_champion_by_name("supreme"), [])
+        self.assertEqual(manager.get_champion_by_name("Hulc")[0].name, "Hulk")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import asyncio
+import multiprocessing
+import signal
+import time
+import unittest
+from shard_launcher import reset_signals, shard_groups
+from utils.shard_refresh import ShardLink, ShardRefreshClient, ShardRefreshCoordinator
+
+
+class Source:
+    """The database file every manager loads from"""
+
+    def __init__(self):
+        self.version = "v1"
+
+
+class VersionedManager:
+    """Loads whatever version the source has; fail makes its next load raise"""
+
+    def __init__(self, source, version="v1"):
+        self.source = source
+        self.database_sha256 = version
+        self.fail = None
+        # How many of the next apply_refresh calls raise
+        self.fail_applies = 0
+
+    def prepare_refresh(self, rebuild=False):
+        if self.fail:
+            raise ValueError(self.fail)
+        if self.source.version == self.database_sha256:
+            return None
+        return VersionedManager(self.source, self.source.version)
+
+    def apply_refresh(self, fresh):
+        if self.fail_applies:
+            self.fail_applies -= 1
+            raise ValueError("swap failed")
+        self.database_sha256 = fresh.database_sha256
+        return {"added": 1, "removed": 0, "changed": 0}
+
+
+def connect(coordinator, shards):
+    """A client per shard manager, linked to the coordinator over a Pipe, on the running loop"""
+    loop = asyncio.get_running_loop()
+    clients = []
+    for manager in shards:
+        ours, theirs = multiprocessing.Pipe()
+        link = ShardLink(ours, coordinator.on_message)
+        link.attach(loop)
+        coordinator.add_link(link)
+        client = ShardRefreshClient(manager, theirs)
+        client.start()
+        clients.append(client)
+    return clients
+
+
+class TestShardRefresh(unittest.TestCase):
+    def setUp(self):
+        self.source = Source()
+        self.launcher = VersionedManager(self.source)
+        self.shards = [VersionedManager(self.source) for _ in range(3)]
+        self.coordinator = ShardRefreshCoordinator(self.launcher, interval=3600)
+
+    def refresh(self):
+        """Link the shards to the coordinator on a fresh loop and refresh once"""
+        async def run():
+            self.coordinator.links.clear()
+            connect(self.coordinator, self.shards)
+            return await self.coordinator.refresh()
+
+        return asyncio.run(run())
+
+    def test_all_shards_switch_to_the_new_version(self):
+        self.source.version = "v2"
+        result = self.refresh()
+        self.assertIsNone(result.error)
+        self.assertEqual(result.added, 1)
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v2"] * 3)
+        self.assertEqual(self.launcher.database_sha256, "v2")
+
+    def test_one_failed_shard_keeps_everyone_on_the_old_version(self):
+        self.source.version = "v2"
+        self.shards[1].fail = "disk full"
+        result = self.refresh()
+        self.assertIn("disk full", result.summary())
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v1"] * 3)
+        self.assertEqual(self.launcher.database_sha256, "v1")
+
+        # The launcher didn't switch either, so the next refresh tries again
+        self.shards[1].fail = None
+        retried = self.refresh()
+        self.assertFalse(retried.skipped)
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v2"] * 3)
+
+    def test_a_shard_that_fails_to_swap_is_brought_along(self):
+        self.source.version = "v2"
+        self.shards[0].fail_applies = 1
+        result = self.refresh()
+        self.assertIsNone(result.error)
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v2"] * 3)
+        self.assertEqual(self.launcher.database_sha256, "v2")
+
+    def test_a_shard_that_cant_swap_is_restarted(self):
+        self.source.version = "v2"
+        self.shards[2].fail_applies = 2
+        restarted = []
+        self.coordinator.restart_shard = restarted.append
+        result = self.refresh()
+        self.assertIsNone(result.error)
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v2", "v2", "v1"])
+        self.assertEqual(self.launcher.database_sha256, "v2")
+        self.assertEqual(restarted, [self.coordinator.links[2]])
+
+    def test_apply_without_a_prepare_is_refused(self):
+        async def run():
+            self.coordinator.links.clear()
+            connect(self.coordinator, self.shards[:1])
+            # As a worker forked after the prepare would see the round's apply
+            self.coordinator._round += 1
+            return await self.coordinator._ask(self.coordinator.links, "apply", self.coordinator._round, "v2")
+
+        (reply,) = asyncio.run(run()).values()
+        self.assertEqual(reply[:2], ("failed", "nothing prepared for this round"))
+        self.assertEqual(self.shards[0].database_sha256, "v1")
+
+    def test_unchanged_source_skips_the_shards(self):
+        result = self.refresh()
+        self.assertTrue(result.skipped)
+
+    def test_shard_refresh_goes_through_the_launcher(self):
+        self.source.version = "v2"
+
+        async def run():
+            clients = connect(self.coordinator, self.shards)
+            return await clients[2].refresh()
+
+        result = asyncio.run(run())
+        self.assertEqual(result.added, 1)
+        self.assertEqual([shard.database_sha256 for shard in self.shards], ["v2"] * 3)
+
+
+class TestShardGroups(unittest.TestCase):
+    def test_groups_are_contiguous_and_balanced(self):
+        self.assertEqual(shard_groups(7, 3), [[0, 1, 2], [3, 4], [5, 6]])
+        self.assertEqual(shard_groups(2, 4), [[0], [1]])
+        self.assertEqual(shard_groups(1, 1), [[0]])
+
+
+def idle_worker():
+    reset_signals()
+    time.sleep(60)
+
+
+class TestWorkerSignals(unittest.TestCase):
+    def test_terminated_worker_exits_and_leaves_the_launcher_running(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            stopping = asyncio.Event()
+            # Installed before the fork, as ShardLauncher.run does
+            loop.add_signal_handler(signal.SIGTERM, stopping.set)
+            try:
+                process = multiprocessing.get_context("fork").Process(target=idle_worker, daemon=True)
+                process.start()
+                await asyncio.sleep(0.2)
+                process.terminate()
+                await loop.run_in_executor(None, process.join, 5)
+                await asyncio.sleep(0.1)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                return process, stopping.is_set()
+            finally:
+                loop.remove_signal_handler(signal.SIGTERM)
+
+        process, stopping = asyncio.run(run())
+        self.assertEqual(process.exitcode, -signal.SIGTERM)
+        self.assertFalse(stopping)
+
+
+if __name__ == '__main__':
+    unittest.main()
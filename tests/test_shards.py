@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from utils.shards import ShardedDatabase, current_shards, encode_shard, shards_dir, write_shards
+
+CHAMPIONS = {
+    "hex": {"name": "Hex", "class": "Mystic", "rank": 1},
+    "korg": {"name": "Korg", "class": "Tech", "rank": 1},
+    "tigra": {"name": "Tigra", "class": "Mystic", "rank": 2},
+    "photon": {"name": "Photon", "class": "Cosmic", "rank": 1},
+}
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "champions_database.shards")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shard_bytes_and_offsets(self):
+        pairs = [("hex", CHAMPIONS["hex"]), ("tigra", CHAMPIONS["tigra"])]
+        data, offsets = encode_shard(pairs)
+        self.assertEqual(data, json.dumps(dict(pairs), separators=(',', ':')).encode('utf-8'))
+        offset, length = offsets["tigra"]
+        self.assertEqual(json.loads(data[offset:offset + length]), CHAMPIONS["tigra"])
+
+    def test_all_shards_rebuild_the_database_and_one_class_loads_alone(self):
+        manifest = write_shards(CHAMPIONS, {"sha256": "abc"}, self.directory)
+        self.assertEqual(manifest["database_sha256"], "abc")
+        self.assertEqual({name: entry["champions"] for name, entry in manifest["shards"].items()},
+                         {"Mystic": 2, "Tech": 1, "Cosmic": 1})
+
+        self.assertEqual(list(ShardedDatabase(self.directory).champions().items()), list(CHAMPIONS.items()))
+        mystic = ShardedDatabase(self.directory, ["mystic"])
+        self.assertEqual(list(mystic.champions()), ["hex", "tigra"])
+        self.assertEqual(mystic.champion("korg"), CHAMPIONS["korg"])
+        with self.assertRaises(KeyError):
+            ShardedDatabase(self.directory, ["Skill"])
+
+    def test_reload_swaps_only_changed_shards(self):
+        write_shards(CHAMPIONS, None, self.directory)
+        tech_file = os.path.join(self.directory, "tech.json")
+        tech_mtime = os.stat(tech_file).st_mtime_ns
+        database = ShardedDatabase(self.directory, ["Mystic", "Tech"])
+
+        updated = {**CHAMPIONS, "tigra": {**CHAMPIONS["tigra"], "rank": 3}}
+        write_shards(updated, None, self.directory)
+        self.assertEqual(os.stat(tech_file).st_mtime_ns, tech_mtime)
+        self.assertEqual(database.reload(), ["Mystic"])
+        self.assertEqual(database.champions()["tigra"]["rank"], 3)
+
+    def test_tampered_shard_is_refused(self):
+        write_shards(CHAMPIONS, None, self.directory)
+        with open(os.path.join(self.directory, "tech.json"), 'w', encoding='utf-8') as f:
+            f.write("{}")
+        with self.assertRaises(ValueError):
+            ShardedDatabase(self.directory, ["Tech"])
+        self.assertEqual(list(ShardedDatabase(self.directory, ["Cosmic"]).champions()), ["photon"])
+
+    def test_shards_of_a_vanished_class_are_removed(self):
+        write_shards(CHAMPIONS, None, self.directory)
+        without_cosmic = {key: champion for key, champion in CHAMPIONS.items() if champion["class"] != "Cosmic"}
+        manifest = write_shards(without_cosmic, None, self.directory)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["manifest.json", "mystic.json", "tech.json"])
+        self.assertNotIn("Cosmic", manifest["shards"])
+
+    def test_shards_of_another_database_are_not_current(self):
+        database_file = os.path.join(self.tmp.name, "champions_database.json")
+        self.assertEqual(shards_dir(database_file), self.directory)
+        with open(database_file, 'wb') as f:
+            f.write(b'{"hex": {}}')
+        with open(database_file, 'rb') as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+        self.assertIsNone(current_shards(database_file))
+        write_shards(CHAMPIONS, {"sha256": sha256}, self.directory)
+        self.assertEqual(current_shards(database_file), self.directory)
+
+        # A later build without --shards rewrites only the database
+        with open(database_file, 'wb') as f:
+            f.write(b'{"korg": {}}')
+        self.assertIsNone(current_shards(database_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from utils.sheet_layout import compile_layout, load_layout_specs, load_layouts, sheet_layout
+
+SPEC = {
+    "layout": "columns",
+    "header_rows": 2,
+    "rated": True,
+    "sections": [
+        {"name": "Dual Threat", "start_row": 2, "markers": ["dual threat"]},
+        {"name": "Attacker", "start_row": 4, "markers": ["attackers"]},
+        {"name": "Defender", "start_row": 6, "markers": ["defenders"]},
+    ],
+}
+
+
+class TestSheetLayout(unittest.TestCase):
+    def test_marker_cells_move_section_starts(self):
+        rows = [['', 'Mystic'], ['', 'Dual Threat'], ['', 'A - 9'], ['Attackers', 'B - 8'], ['', 'C - 7']]
+        layout = compile_layout("bg", SPEC)
+        starts = layout.find_sections(rows)
+        # Row 1 is a header row, so its "Dual Threat" isn't a marker; Defender has no marker cell
+        self.assertEqual(starts, (2, 3, 6))
+        sections = [(cell.value, cell.section) for cell in layout.cells(rows, starts)]
+        self.assertEqual(sections, [('A - 9', 'Dual Threat'), ('B - 8', 'Attacker'), ('C - 7', 'Attacker')])
+
+    def test_fallback_rows_never_come_before_a_found_section(self):
+        rows = [[''], [''], [''], [''], [''], [''], [''], ['attackers']]
+        self.assertEqual(compile_layout("bg", SPEC).find_sections(rows), (2, 7, 7))
+
+    def test_class_blocks_use_spec_classes_and_tiers(self):
+        layout = sheet_layout("general_rankings")
+        rows = [['Class', 'Scorching'], ['', ''], ['MYSTIC', 'Tier Above All'], ['', 'Hex']]
+        blocks = [(name, [(cell.value, cell.tier) for cell in cells]) for name, cells in layout.blocks(rows)]
+        self.assertEqual(blocks, [('Mystic', [('Tier Above All', 'Above All'), ('Hex', 'Above All')])])
+
+    def test_every_spec_compiles(self):
+        self.assertEqual(set(load_layouts()), set(load_layout_specs()))
+        with self.assertRaises(ValueError):
+            compile_layout("bad", {"layout": "rows"})
+
+
+if __name__ == '__main__':
+    unittest.main()
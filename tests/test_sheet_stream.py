@@ -0,0 +1,73 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+import openpyxl
+from utils.sheet_stream import (CellEvent, column_letter, iter_class_blocks, iter_column_cells, iter_csv_rows,
+                                iter_xlsx_rows, split_header, xlsx_export_url)
+
+
+def chunks_of(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestSheetStream(unittest.TestCase):
+    def test_rows_match_whole_sheet_parse(self):
+        """Tiny chunks split emojis, CRLF pairs and quoted newlines without changing the rows"""
+        text = 'a,b\r\n"Nico Minoru - 10🔥","multi\r\nline"\r\n,\r\nlast,7️⃣'
+        expected = list(csv.reader(io.StringIO(text)))
+        for size in (1, 2, 3, 5, 64):
+            self.assertEqual(list(iter_csv_rows(chunks_of(text, size))), expected)
+
+    def test_split_header_keeps_all_rows(self):
+        header, rows = split_header(iter([['a'], ['b'], ['c']]), 2)
+        self.assertEqual(header, [['a'], ['b']])
+        self.assertEqual(list(rows), [['a'], ['b'], ['c']])
+
+    def test_column_cells_skip_unnamed_columns(self):
+        rows = [['', 'Mystic', '', 'Tech'], ['', 'x'], ['', 'Tigra - 10', 'ignored', 'Korg - 7']]
+        cells = list(iter_column_cells(rows, first_row=2, section_of=lambda row: 'Dual Threat'))
+        self.assertEqual([(c.row, c.col, c.value, c.category, c.section) for c in cells],
+                         [(2, 1, 'Tigra - 10', 'Mystic', 'Dual Threat'), (2, 3, 'Korg - 7', 'Tech', 'Dual Threat')])
+
+    def test_class_blocks_are_column_major_with_tiers(self):
+        rows = [
+            ['Class', 'Hot', 'Mild'],
+            ['MYSTIC', 'A', 'B'],
+            ['', 'C', 'D'],
+            ['Tech', 'Mild', ''],
+            ['', 'E', 'F'],
+        ]
+        tier_of = lambda value: value if value in ('Hot', 'Mild') else None
+        blocks = list(iter_class_blocks(rows, ['mystic', 'tech'], tier_of=tier_of))
+        self.assertEqual([name for name, _ in blocks], ['Mystic', 'Tech'])
+        self.assertEqual([c.value for c in blocks[0][1]], ['A', 'C', 'B', 'D'])
+        # Tier headers carry down a column across class blocks
+        self.assertEqual([(c.value, c.tier) for c in blocks[1][1]], [('Mild', 'Mild'), ('E', 'Mild'), ('F', 'Mild')])
+
+    def test_provenance_uses_spreadsheet_references(self):
+        self.assertEqual([column_letter(col) for col in (0, 25, 26, 701)], ['A', 'Z', 'AA', 'ZZ'])
+        provenance = CellEvent(77, 1, 'Spider-Man - 9').provenance('battlegrounds', 'Science', 'Attacker')
+        self.assertEqual(provenance['cell'], 'B78')
+        self.assertEqual((provenance['row'], provenance['column'], provenance['class']), (77, 1, 'Science'))
+
+    def test_xlsx_rows_match_csv_rows(self):
+        rows = [['Class', 'Hot', ''], ['MYSTIC', 'Tigra 🌟💎', 'Korg - 10'], ['', '', 'multi\nline']]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sheet.xlsx')
+            workbook = openpyxl.Workbook()
+            for row in rows:
+                workbook.active.append([value or None for value in row])
+            workbook.create_sheet('Other').append([7.0])
+            workbook.save(path)
+            self.assertEqual(list(iter_xlsx_rows(path)), rows)
+            self.assertEqual(list(iter_xlsx_rows(path, 'Other')), [['7']])
+        self.assertEqual(xlsx_export_url('https://example.com/d/abc/export?format=csv&gid=0'),
+                         'https://example.com/d/abc/export?format=xlsx')
+
+
+if __name__ == '__main__':
+    unittest.main()
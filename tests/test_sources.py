@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import openpyxl
+from build_database import attach_sources, compact_name, parse_source
+from utils.sheet_layout import load_layout_specs
+from utils.sources import ClassBlockSource, ColumnSource, make_source, source_summary
+from tests.helpers import champion_record
+
+WAR_LAYOUT = {
+    "layout": "columns",
+    "header_rows": 1,
+    "tiers": ["Top", "Good"],
+    "default_tier": "Good",
+}
+
+
+class TestSources(unittest.TestCase):
+    def test_adapter_is_picked_by_layout_kind(self):
+        specs = load_layout_specs()
+        self.assertIsInstance(make_source("bg", "vega_battlegrounds", specs["vega_battlegrounds"]), ColumnSource)
+        self.assertIsInstance(make_source("rk", "general_rankings", specs["general_rankings"]), ClassBlockSource)
+
+    def test_class_block_entries_are_ranked_per_class(self):
+        rows = [['Class', 'Scorching'], ['', 'Hot'], ['Mystic', 'Tier List'], ['', 'Hex 🌟'], ['', 'Tigra'],
+                ['Tech', 'Korg']]
+        source = make_source("rankings", "general_rankings", load_layout_specs()["general_rankings"], ['tier list'])
+        entries = source.parse(lambda: iter(rows))["entries"]
+        self.assertEqual([(key, e["class"], e["rank"], e["tier"]) for key, e in entries.items()],
+                         [('hex', 'Mystic', 1, 'Hot'), ('tigra', 'Mystic', 2, 'Hot'), ('korg', 'Tech', 1, 'Hot')])
+        self.assertEqual(entries['hex']['symbols'], ['🌟'])
+
+    def test_unrated_column_list_tracks_tiers_and_rank(self):
+        rows = [['', 'Mystic', 'Tech'], ['', 'Top', 'Korg'], ['', 'Hex', 'Good'], ['', 'Tigra', 'Tigra II']]
+        entries = make_source("war", "war", WAR_LAYOUT).parse(lambda: iter(rows))["entries"]
+        self.assertEqual({key: (e["tier"], e["rank"]) for key, e in entries.items()},
+                         {'hex': ('Top', 1), 'tigra': ('Top', 2), 'korg': ('Good', 1), 'tigra ii': ('Good', 2)})
+        self.assertEqual(source_summary(entries['korg']), {'class': 'Tech', 'tier': 'Good', 'rank': 1})
+
+    def test_attach_sources_matches_by_name_pairing_and_compact_name(self):
+        def champion(name, bg_rating=None):
+            provenance = [{"sheet": "rankings", "class": "Tech"}]
+            if bg_rating is not None:
+                provenance.append({"sheet": "battlegrounds", "class": "Tech"})
+            # A merged champion: the database record before its sources are attached
+            return dict(champion_record(name, rating=bg_rating, bg_type="Attacker" if bg_rating else None),
+                        provenance=provenance)
+
+        champions = {"korg": champion("Korg", 9), "mister negative": champion("Mister Negative"),
+                     "spider-man (supreme)": champion("Spider-Man (Supreme)")}
+        merged = {"pairings": {"mr. negative": {"ranking_name": "mister negative"}}}
+        war = {"entries": {name: {"tier": "Top", "provenance": {"class": "Tech"}}
+                           for name in ("korg", "mr. negative", "spiderman supreme")}}
+        result = attach_sources(champions, merged, war, source_names=["war"])
+        self.assertEqual(result["korg"]["sources"], {
+            "rankings": {"class": "Tech", "tier": "Hot", "rank": 1},
+            "battlegrounds": {"class": "Tech", "rating": 9, "type": "Attacker"},
+            "war": {"class": "Tech", "tier": "Top"},
+        })
+        self.assertIn("war", result["mister negative"]["sources"])
+        self.assertIn("war", result["spider-man (supreme)"]["sources"])
+        self.assertEqual(compact_name("Spider-Man (Supreme)"), "spidermansupreme")
+
+    def test_workbook_sources_read_the_tab_their_layout_names(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sheet.xlsx')
+            workbook = openpyxl.Workbook()
+            workbook.active.title = 'Notes'
+            workbook.active.append(['Updated weekly'])
+            war = workbook.create_sheet('War')
+            for row in [['', 'Mystic', 'Tech'], ['', 'Top', 'Korg'], ['', 'Hex', None]]:
+                war.append(row)
+            workbook.save(path)
+            sheet = {"url": "file://sheet.xlsx", "format": "xlsx", "path": path, "tabs": ["Notes", "War"]}
+
+            entries = parse_source(sheet, "war", "war", {**WAR_LAYOUT, "tab": "War"}, [])["entries"]
+            self.assertEqual(sorted(entries), ['hex', 'korg'])
+            # Without a tab the first one is read, as from the CSV export
+            self.assertEqual(parse_source(sheet, "war", "war", WAR_LAYOUT, [])["entries"], {})
+            with self.assertRaises(ValueError):
+                parse_source(sheet, "war", "war", {**WAR_LAYOUT, "tab": "Defense"}, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+from bot_main import create_bot
+from utils.startup import StartupTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupTimer(unittest.TestCase):
+    def test_overlapping_phases_are_timed_separately(self):
+        clock = FakeClock()
+        timer = StartupTimer(clock=clock)
+        timer.begin("gateway")
+        clock.now = 1.0
+        with timer.phase("load_data"):
+            clock.now = 1.5
+        clock.now = 3.0
+        timer.end("gateway")
+        clock.now = 4.0
+        timer.end("gateway")
+        timer.mark_ready()
+        self.assertEqual(timer.phases, {"load_data": 0.5, "gateway": 3.0})
+        self.assertEqual(timer.total, 4.0)
+        self.assertIn("after 4.00s", timer.summary())
+
+    def test_wait_ready_gives_up_after_the_timeout(self):
+        timer = StartupTimer()
+        self.assertFalse(asyncio.run(timer.wait_ready(0.01)))
+
+
+class TestBotStartup(unittest.TestCase):
+    def test_setup_hook_loads_data_and_registers_cogs_once(self):
+        async def run():
+            bot = create_bot(metrics_port=0)
+            await bot.setup_hook()
+            self.assertFalse(bot.startup.ready.is_set())
+            self.assertTrue(await bot.startup.wait_ready(30))
+            # Reconnects fire on_ready again; the cogs stay registered once
+            await bot.on_ready()
+            await bot.on_ready()
+            cogs = sorted(bot.cogs)
+            phases = set(bot.startup.phases)
+            await bot.remove_cog("RefreshCog")
+            return cogs, phases
+
+        cogs, phases = asyncio.run(run())
+        self.assertEqual(cogs, ["MCOCCommands", "RefreshCog"])
+        self.assertEqual(phases, {"load_data", "warm", "register_cogs", "gateway"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import tempfile
+import unittest
+from build_regression import run_offline_build
+from synthetic_sheets import make_sheets, write_sheets
+
+
+class TestSyntheticSheets(unittest.TestCase):
+    def test_build_finds_every_generated_champion_and_skips_decoys(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_sheets(tmp, per_class=12, classes=3, columns=4, emoji=1.0, decoys=0.3, seed=5)
+            database, _, _, _ = run_offline_build(tmp)
+        self.assertEqual(len(database), 36)
+        self.assertEqual({champion['class'] for champion in database.values()}, {'Mystic', 'Science', 'Skill'})
+        self.assertTrue(any(champion['battlegrounds_rating'] is not None for champion in database.values()))
+
+    def test_layout_limits_the_number_of_classes(self):
+        with self.assertRaises(ValueError):
+            make_sheets(classes=20)
+
+
+if __name__ == '__main__':
+    unittest.main()
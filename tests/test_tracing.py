@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import unittest
+from cogs.command_handler import MCOCCommands
+from utils.offload import run_blocking
+from utils.tracing import Tracer, annotate, current_span, span, tracer
+from tests.helpers import CHAMPIONS, DatabaseTestCase, FakeContext
+
+def names(tree):
+    """Every span name in a written trace, depth first"""
+    return [tree["name"]] + [name for child in tree.get("children", []) for name in names(child)]
+
+
+class TestTracing(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "slow.jsonl")
+
+    def traces(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_spans_outside_a_trace_do_nothing(self):
+        with span("lookup") as child:
+            annotate(path="exact")
+        self.assertIsNone(child)
+        self.assertIsNone(current_span())
+
+    def test_only_slow_traces_are_written_with_their_tree(self):
+        def lookup():
+            with span("lookup"):
+                annotate(path="fuzzy")
+
+        async def run(tracer):
+            root = tracer.start("!pick", user_id=1)
+            with span("resolve"):
+                # Spans from the command pool land in the span that was current when the job was queued
+                await run_blocking(lookup)
+            with span("render"):
+                annotate(chars=12)
+            return tracer.finish(root, failed=False)
+
+        self.assertFalse(asyncio.run(run(Tracer(slow_seconds=60, path=self.path))))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(asyncio.run(run(Tracer(slow_seconds=1e-9, path=self.path))))
+        trace, = self.traces()
+        self.assertEqual(names(trace), ["!pick", "resolve", "lookup", "render"])
+        self.assertEqual(trace["attrs"], {"user_id": 1, "failed": False})
+        self.assertEqual(trace["children"][0]["children"][0]["attrs"], {"path": "fuzzy"})
+        self.assertIsNone(current_span())
+
+    def test_a_command_is_traced_from_parse_to_send(self):
+        cog = MCOCCommands(None, self.load_database(CHAMPIONS))
+
+        async def invoke():
+            command = cog.pick_battlegrounds_champions
+            ctx = FakeContext(command)
+            await cog.cog_before_invoke(ctx)
+            await command.callback(cog, ctx, args="1 tigra, korgg")
+            await cog.cog_after_invoke(ctx)
+            return ctx
+
+        saved = tracer.slow_seconds, tracer.path
+        tracer.slow_seconds, tracer.path = 1e-9, self.path
+        try:
+            ctx = asyncio.run(invoke())
+        finally:
+            tracer.slow_seconds, tracer.path = saved
+        self.assertIn("Korg", ctx.replies[0])
+        trace, = self.traces()
+        self.assertEqual(trace["name"], "!pick")
+        self.assertEqual(names(trace), ["!pick", "parse", "resolve", "lookup", "lookup", "canonical_key", "render",
+                                        "score", "send"])
+        self.assertEqual(trace["attrs"]["cache"], "miss")
+        lookups = trace["children"][1]["children"]
+        self.assertEqual(lookups[0]["attrs"], {"query": "tigra", "path": "exact"})
+        self.assertEqual(lookups[1]["attrs"]["query"], "korgg")
+        self.assertEqual(lookups[1]["attrs"]["path"], "fuzzy")
+
+
+if __name__ == '__main__':
+    unittest.main()
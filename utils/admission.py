@@ -0,0 +1,129 @@
+import math
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+from utils.metrics import metrics
+from utils.offload import BULK, CHEAP
+
+# Requests resolving more names than this run in the bulk lane
+CHEAP_NAMES = 3
+# Each user: a command every 2 seconds on average, bursts of 5
+USER_RATE = 0.5
+USER_BURST = 5
+# Each guild: 5 commands a second on average, bursts of 30
+GUILD_RATE = 5.0
+GUILD_BURST = 30
+# Bulk requests running or waiting for a bulk worker before new ones are turned away
+MAX_BULK_QUEUE = 8
+# Names that cost one extra token, so a 100-name !pick counts more than a lookup
+NAMES_PER_TOKEN = 25
+# Buckets kept before full (idle) ones are dropped
+MAX_TRACKED = 10000
+
+metrics.describe("mcoc_admission_shed_total", "counter", "Commands turned away, by reason (user, guild, queue)")
+metrics.describe("mcoc_bulk_queue_depth", "gauge", "Bulk requests running or waiting for a bulk worker")
+metrics.describe("mcoc_coalesced_total", "counter", "Requests that joined an identical one already running")
+
+
+class Overloaded(Exception):
+    """A command was turned away; the message is the reply to send"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Holds up to `burst` tokens, refilled at `rate` per second"""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def wait(self, cost: float, now: float) -> float:
+        """Seconds until cost tokens are available (0 if they are now)"""
+        missing = cost - self.refill(now)
+        return max(0.0, missing / self.rate)
+
+
+class AdmissionController:
+    """Per-user and per-guild token buckets plus a bounded queue for bulk work.
+
+    admit() either returns the lane a request runs in or raises Overloaded;
+    a bulk admission holds a queue slot until release(). Only used from the
+    event loop, so there is no lock.
+    """
+
+    def __init__(self, user_rate: float = USER_RATE, user_burst: float = USER_BURST,
+                 guild_rate: float = GUILD_RATE, guild_burst: float = GUILD_BURST,
+                 max_bulk_queue: int = MAX_BULK_QUEUE, clock: Callable[[], float] = time.monotonic):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.guild_rate = guild_rate
+        self.guild_burst = guild_burst
+        self.max_bulk_queue = max_bulk_queue
+        self.clock = clock
+        self.bulk_queued = 0
+        self.shed: Dict[str, int] = {}
+        self.users: Dict[Hashable, TokenBucket] = {}
+        self.guilds: Dict[Hashable, TokenBucket] = {}
+
+    @staticmethod
+    def lane(names: int) -> str:
+        return CHEAP if names <= CHEAP_NAMES else BULK
+
+    def cost(self, names: int) -> float:
+        return min(self.user_burst, 1 + names // NAMES_PER_TOKEN)
+
+    def _bucket(self, table: Dict[Hashable, TokenBucket], key: Hashable, rate: float, burst: float,
+                now: float) -> TokenBucket:
+        bucket = table.get(key)
+        if bucket is None:
+            if len(table) >= MAX_TRACKED:
+                for idle in [idle_key for idle_key, other in table.items() if other.refill(now) >= other.burst]:
+                    del table[idle]
+            bucket = table[key] = TokenBucket(rate, burst, now)
+        return bucket
+
+    def _shed(self, reason: str, message: str):
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        metrics.inc("mcoc_admission_shed_total", {"reason": reason})
+        raise Overloaded(reason, message)
+
+    def admit(self, user_id: Optional[Hashable], guild_id: Optional[Hashable], names: int) -> str:
+        """The lane for a request resolving `names` names, or Overloaded when it has to wait"""
+        lane = self.lane(names)
+        if lane == BULK and self.bulk_queued >= self.max_bulk_queue:
+            self._shed("queue", "I'm busy with other large requests right now; please try again in a moment.")
+
+        now = self.clock()
+        cost = self.cost(names)
+        buckets = []
+        if user_id is not None:
+            buckets.append(("user", self._bucket(self.users, user_id, self.user_rate, self.user_burst, now)))
+        if guild_id is not None:
+            buckets.append(("guild", self._bucket(self.guilds, guild_id, self.guild_rate, self.guild_burst, now)))
+        # Nothing is taken unless every bucket can pay
+        for reason, bucket in buckets:
+            wait = bucket.wait(cost, now)
+            if wait:
+                who = "You're" if reason == "user" else "This server is"
+                self._shed(reason, f"{who} sending commands too quickly; please try again in {math.ceil(wait)}s.")
+        for _, bucket in buckets:
+            bucket.tokens -= cost
+
+        if lane == BULK:
+            self.bulk_queued += 1
+        return lane
+
+    def release(self, lane: str):
+        """A request admitted to lane finished"""
+        if lane == BULK:
+            self.bulk_queued -= 1
@@ -0,0 +1,181 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used to address artifacts and cache keys"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def serialize_artifact(value: Any) -> bytes:
+    """Compact JSON that keeps dict order (order matters to later stages)"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+@dataclass
+class Stage:
+    """One step of the build.
+
+    `func` is called with the outputs of `inputs` (in order) followed by
+    `config` as keyword arguments. A stage is re-run only when its config,
+    its function's source, the source of one of its `helpers` (the functions
+    and modules it calls) or the content of one of its inputs changes; bump
+    `version` when something else it depends on changes behaviour. Stages
+    that talk to the outside world (fetching, writing files) should set
+    cacheable=False.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    config: Dict[str, Any] = field(default_factory=dict)
+    version: int = 1
+    cacheable: bool = True
+    helpers: Tuple[Any, ...] = ()
+
+
+def source_hash(code: Any) -> str:
+    """Hash of a function's or module's source ("" when it has none, e.g. builtins)"""
+    try:
+        source = inspect.getsource(code)
+    except (OSError, TypeError):
+        source = ""
+    return content_hash(source.encode('utf-8'))
+
+
+class StagedBuild:
+    """Runs stages in dependency order with content-hashed artifacts cached on disk.
+
+    Stages whose inputs are all ready run at the same time on up to
+    `max_workers` threads, so independent sources are fetched and parsed in
+    parallel; max_workers=1 runs them one after another in dependency order.
+    """
+
+    def __init__(self, cache_dir: str = ".build_cache", use_cache: bool = True, max_workers: int = 4):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.max_workers = max(1, max_workers)
+        self.report: Dict[str, Any] = {}
+
+    def _ordered(self, stages: List[Stage]) -> List[Stage]:
+        """Topologically sort stages, keeping the given order where dependencies allow"""
+        by_name = {stage.name: stage for stage in stages}
+        ordered, done, visiting = [], set(), set()
+
+        def visit(stage: Stage):
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Build stages have a dependency cycle at '{stage.name}'")
+            visiting.add(stage.name)
+            for input_name in stage.inputs:
+                if input_name not in by_name:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{input_name}'")
+                visit(by_name[input_name])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    def _cache_key(self, stage: Stage, input_hashes: List[str]) -> str:
+        key_material = {
+            "stage": stage.name,
+            "version": stage.version,
+            "code": source_hash(stage.func),
+            "helpers": [source_hash(helper) for helper in stage.helpers],
+            "config": stage.config,
+            "inputs": input_hashes,
+        }
+        return content_hash(serialize_artifact(key_material))
+
+    def _artifact_path(self, stage: Stage, key: str) -> str:
+        return os.path.join(self.cache_dir, "stages", f"{stage.name}-{key[:16]}.json")
+
+    def _store(self, stage: Stage, path: str, data: bytes):
+        """Atomically write an artifact and drop older artifacts of the same stage"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        prefix = f"{stage.name}-"
+        for filename in os.listdir(directory):
+            if filename.startswith(prefix) and filename.endswith(".json") and filename != os.path.basename(path):
+                os.remove(os.path.join(directory, filename))
+
+    def _run_stage(self, stage: Stage, inputs: List[Any], input_hashes: List[str]) -> Tuple[Any, bytes, Dict[str, Any]]:
+        """Run (or load the cached artifact of) one stage; returns (output, artifact bytes, report entry)"""
+        started = time.perf_counter()
+        key = self._cache_key(stage, input_hashes)
+        path = self._artifact_path(stage, key)
+        cached = False
+
+        if stage.cacheable and self.use_cache and os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            output = json.loads(data)
+            cached = True
+        else:
+            output = stage.func(*inputs, **stage.config)
+            data = serialize_artifact(output)
+            if stage.cacheable:
+                self._store(stage, path, data)
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Stage {stage.name}: {'cached' if cached else 'ran'} in {elapsed:.3f}s ({len(data)} bytes)")
+        return output, data, {
+            "stage": stage.name,
+            "cached": cached,
+            "seconds": round(elapsed, 6),
+            "bytes": len(data),
+            "inputs": list(stage.inputs),
+            "key": key,
+        }
+
+    def run(self, stages: List[Stage], report_path: Optional[str] = None) -> Dict[str, Any]:
+        """Run all stages and return their outputs by stage name"""
+        ordered = self._ordered(stages)
+        outputs: Dict[str, Any] = {}
+        hashes: Dict[str, str] = {}
+        stage_reports: Dict[str, Dict[str, Any]] = {}
+        build_started = time.perf_counter()
+
+        pending = list(ordered)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                # Start every stage whose inputs are done, in dependency order
+                for stage in [stage for stage in pending if all(name in hashes for name in stage.inputs)]:
+                    pending.remove(stage)
+                    future = pool.submit(self._run_stage, stage, [outputs[name] for name in stage.inputs],
+                                         [hashes[name] for name in stage.inputs])
+                    running[future] = stage
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    output, data, stage_report = future.result()
+                    outputs[stage.name] = output
+                    hashes[stage.name] = content_hash(data)
+                    stage_report["hash"] = hashes[stage.name]
+                    stage_reports[stage.name] = stage_report
+
+        self.report = {
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "total_seconds": round(time.perf_counter() - build_started, 6),
+            "stages": [stage_reports[stage.name] for stage in ordered],
+        }
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(self.report, f, indent=2)
+        return outputs
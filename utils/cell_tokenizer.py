@@ -0,0 +1,106 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Characters that start an emoji / pictographic symbol
+_SYMBOL_BASE = (
+    '[\u00A9\u00AE\u203C\u2049\u2122\u2139\u2194-\u21AA\u231A-\u23FF\u24C2\u25AA-\u25FE'
+    '\u2600-\u27BF\u2934\u2935\u2B05-\u2B55\u3030\u303D\u3297\u3299'
+    '\U0001F000-\U0001F1E5\U0001F200-\U0001FAFF]'
+)
+# Marks that belong to the symbol before them: a variation selector, a skin tone, tag characters
+_SYMBOL_MODIFIERS = '[\uFE0E\uFE0F]?[\U0001F3FB-\U0001F3FF]?[\U000E0020-\U000E007F]*'
+_KEYCAP = '[0-9#*]\uFE0F?\u20E3'
+_DIGITS = '0123456789'
+
+# Whole symbols (keycaps like 7️⃣, flags, emoji with modifiers and ZWJ sequences)
+# and stray joiners/selectors left behind by a broken export
+_SYMBOL_TOKENS = re.compile(
+    f'({_KEYCAP}|[\U0001F1E6-\U0001F1FF]{{1,2}}|{_SYMBOL_BASE}{_SYMBOL_MODIFIERS}(?:\u200D{_SYMBOL_BASE}{_SYMBOL_MODIFIERS})*)'
+    '|[\uFE0E\uFE0F\u200D\u20E3]'
+)
+
+# Ratings run from 0 to 10
+MAX_RATING = 10
+
+
+@dataclass(frozen=True)
+class CellTokens:
+    """A sheet cell split into the champion name, BG rating and symbols"""
+    name: str
+    rating: Optional[int]
+    symbols: Tuple[str, ...]
+
+
+def parse_rating(digits: str) -> int:
+    """Read a rating from its digits; longer runs come from symbols glued onto the number"""
+    value = int(digits)
+    if value <= MAX_RATING:
+        return value
+    return MAX_RATING if digits.startswith(str(MAX_RATING)) else int(digits[0])
+
+
+def _split_symbols(value: str, rated: bool) -> Tuple[str, Tuple[str, ...], int]:
+    """Pull the symbols out of a cell; returns (text without symbols, symbols, end of the name in text)"""
+    # Text and symbols alternate; a None symbol is a stray mark
+    pieces = _SYMBOL_TOKENS.split(value)
+    texts = pieces[0::2]
+    marks = pieces[1::2]
+    if rated and '\u20E3' in value:
+        # A keycap right after the dash is the rating, not a symbol
+        for index, mark in enumerate(marks):
+            if mark and mark[0] in _DIGITS and ''.join(texts[:index + 1]).rstrip().endswith('-'):
+                texts[index] += mark[0]
+                marks[index] = None
+    text = ''.join(texts)
+    symbols = tuple(filter(None, marks))
+    if not symbols:
+        return text, symbols, len(text)
+    # The name ends where the first symbol was
+    first = marks.index(symbols[0]) if marks[0] is None else 0
+    return text, symbols, sum(map(len, texts[:first + 1]))
+
+
+def find_rating(text: str) -> Tuple[Optional[int], int]:
+    """The last "- <digits>" in text as (rating, index of the dash); (None, -1) if there is none"""
+    dash = text.rfind('-')
+    rest = text[dash + 1:].strip()
+    if dash != -1 and rest.isdecimal():
+        return parse_rating(rest), dash  # the usual "Name - 9"
+    while dash != -1:
+        rest = text[dash + 1:].lstrip()
+        digit_count = len(rest) - len(rest.lstrip(_DIGITS))
+        if digit_count:
+            return parse_rating(rest[:digit_count]), dash
+        dash = text.rfind('-', 0, dash)
+    return None, -1
+
+
+@lru_cache(maxsize=16384)
+def tokenize_cell(value: str, rated: bool = False) -> CellTokens:
+    """Split a cell like "Human Torch - 107️⃣🔥" into name, rating and symbols.
+
+    The name is the text before the first symbol (and, for rated cells, before
+    the rating). Symbols are whole grapheme clusters in the order they appear,
+    so keycaps and emoji with variation selectors come out intact. With
+    rated=True the last "- <digits>" in the cell is the rating (a keycap right
+    after the dash counts as the rating); cells without one get rating None.
+
+    Cells without any non-ASCII character can't hold symbols and skip the
+    symbol pattern entirely. Results are cached: most cells are the same from
+    one refresh of a sheet to the next.
+    """
+    if value.isascii():
+        text = value
+        symbols = ()
+        name_end = len(value)
+    else:
+        text, symbols, name_end = _split_symbols(value, rated)
+
+    rating = None
+    if rated:
+        rating, dash = find_rating(text)
+        if rating is not None and dash < name_end:
+            name_end = dash
+    return CellTokens(text[:name_end].strip(), rating, symbols)
@@ -0,0 +1,41 @@
+from typing import Dict
+
+import discord
+
+# What the bot asks Discord to send it and what discord.py keeps of it:
+#   full          the default intents plus message content; discord.py's default caches
+#                 (voice channel members, the last 1000 messages with their authors)
+#   lean          only guilds, messages and message content; no member cache, no message
+#                 cache, no chunking. Prefix commands and !refresh's permission check still work
+#   interactions  no intents at all: no guilds, no messages, only slash commands
+FULL = "full"
+LEAN = "lean"
+INTERACTIONS = "interactions"
+GATEWAY_MODES = (FULL, LEAN, INTERACTIONS)
+
+
+def gateway_intents(mode: str) -> discord.Intents:
+    if mode == FULL:
+        intents = discord.Intents.default()
+        intents.message_content = True  # Required to read message content
+        return intents
+    if mode == LEAN:
+        # guilds keeps the channels and roles that ctx.send and has_permissions need
+        return discord.Intents(guilds=True, guild_messages=True, dm_messages=True, message_content=True)
+    if mode == INTERACTIONS:
+        return discord.Intents.none()
+    raise ValueError(f"unknown gateway mode '{mode}' (use {', '.join(GATEWAY_MODES)})")
+
+
+def gateway_options(mode: str) -> Dict[str, object]:
+    """Keyword arguments for commands.Bot or AutoShardedBot in a gateway mode"""
+    options: Dict[str, object] = {"intents": gateway_intents(mode)}
+    if mode != FULL:
+        options.update(member_cache_flags=discord.MemberCacheFlags.none(), chunk_guilds_at_startup=False,
+                       max_messages=None)
+    return options
+
+
+def reads_messages(mode: str) -> bool:
+    """Whether prefix commands can reach the bot in a gateway mode"""
+    return gateway_intents(mode).message_content
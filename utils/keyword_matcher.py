@@ -0,0 +1,106 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Keyword lists used to filter sheet cells and champion names live in data, not code
+PATTERNS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "filter_patterns.json")
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed keyword list.
+
+    The automaton is compiled once into a full transition table, so scanning a
+    string is a single pass with one dict lookup per character no matter how
+    many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[str], case_sensitive: bool = True):
+        self.case_sensitive = case_sensitive
+        self.keywords = [k if case_sensitive else k.lower() for k in keywords if k]
+
+        # Build the keyword trie
+        transitions: List[Dict[str, int]] = [{}]
+        outputs: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(transitions)
+                    transitions[state][char] = next_state
+                    transitions.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(keyword)
+
+        # Breadth-first pass: failure links, inherited outputs, and a full
+        # transition table (each state also gets its failure state's moves)
+        fail = [0] * len(transitions)
+        delta: List[Dict[str, int]] = [dict(transitions[0])] + [None] * (len(transitions) - 1)
+        queue = deque(transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            fail_state = fail[state]
+            outputs[state] = outputs[state] + outputs[fail_state]
+            delta[state] = dict(delta[fail_state])
+            delta[state].update(transitions[state])
+            for char, next_state in transitions[state].items():
+                fail[next_state] = delta[fail_state].get(char, 0)
+                queue.append(next_state)
+
+        self._delta = delta
+        self._outputs = outputs
+        self._longest = [max((len(k) for k in out), default=0) for out in outputs]
+
+    def _prepare(self, text: str) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start index, keyword) for every keyword occurrence"""
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for index, char in enumerate(self._prepare(text)):
+            state = delta[state].get(char, 0)
+            for keyword in outputs[state]:
+                yield index - len(keyword) + 1, keyword
+
+    def contains_any(self, text: str) -> bool:
+        """True if any keyword occurs in text (stops at the first hit)"""
+        delta, longest = self._delta, self._longest
+        state = 0
+        for char in self._prepare(text):
+            state = delta[state].get(char, 0)
+            if longest[state]:
+                return True
+        return False
+
+    def longest_match(self, text: str) -> int:
+        """Length of the longest keyword occurring in text, 0 if none"""
+        delta, longest = self._delta, self._longest
+        state = 0
+        best = 0
+        for char in self._prepare(text):
+            state = delta[state].get(char, 0)
+            if longest[state] > best:
+                best = longest[state]
+        return best
+
+
+@lru_cache(maxsize=None)
+def compile_keywords(keywords: Tuple[str, ...], case_sensitive: bool = True) -> KeywordMatcher:
+    """Compile (and remember) a matcher for a keyword list"""
+    return KeywordMatcher(keywords, case_sensitive=case_sensitive)
+
+
+@lru_cache(maxsize=None)
+def load_pattern_lists(path: str = PATTERNS_FILE) -> Dict[str, List[str]]:
+    """Load the named keyword lists from data/filter_patterns.json"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def pattern_matcher(name: str, case_sensitive: bool = True) -> KeywordMatcher:
+    """Compiled matcher for one of the named lists in data/filter_patterns.json"""
+    return compile_keywords(tuple(load_pattern_lists()[name]), case_sensitive)
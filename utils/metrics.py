@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, from a dictionary hit to a slow sheet refresh
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Largest request line or header block the endpoint reads
+MAX_REQUEST_BYTES = 8192
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Counters, histograms and gauges, rendered in the Prometheus text format.
+
+    Updates are a dictionary operation under one lock, cheap enough for the
+    lookup path, and safe from the command pool threads. Gauges are callables
+    read when /metrics is scraped, so nothing has to keep them up to date.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}  # name -> labels -> [bucket counts..., sum, count]
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauges: Dict[str, Callable[[], object]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Declare a metric; kind is counter, histogram or gauge"""
+        self._help[name] = (kind, help_text)
+        if kind == "histogram":
+            self._buckets[name] = buckets
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(buckets) + 2)
+            position = bisect_left(buckets, value)
+            if position < len(buckets):
+                counts[position] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def gauge(self, name: str, read: Callable[[], object]):
+        """Report read() when scraped: a number, None (left out) or {labels tuple: number}"""
+        self._gauges[name] = read
+
+    def counter_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def reset(self):
+        """Forget every counter and histogram value (declarations and gauges stay)"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(counts) for key, counts in series.items()}
+                          for name, series in self._histograms.items()}
+        lines = []
+        names = sorted(set(counters) | set(histograms) | set(self._gauges))
+        for name in names:
+            kind, help_text = self._help.get(name, ("untyped", ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if name in counters:
+                for key, value in sorted(counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            elif name in histograms:
+                buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+                for key, counts in sorted(histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(buckets, counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {counts[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(counts[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {counts[-1]}")
+            else:
+                try:
+                    value = self._gauges[name]()
+                except Exception as e:
+                    logging.error(f"Error reading gauge {name}: {e}")
+                    continue
+                if isinstance(value, dict):
+                    for key, sample in sorted(value.items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(sample)}")
+                elif value is not None:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# The process-wide registry every module records into
+metrics = Metrics()
+metrics.describe("mcoc_command_seconds", "histogram", "Time from a command being invoked to its reply")
+metrics.describe("mcoc_command_errors_total", "counter", "Commands that raised")
+metrics.describe("mcoc_champion_lookups_total", "counter",
+                 "Champion name lookups by how they were answered (exact, alias, fuzzy, substring, miss)")
+metrics.describe("mcoc_champion_resolutions_total", "counter", "Names in !pick and !rankup lists, found or not")
+metrics.describe("mcoc_refresh_seconds", "histogram", "Data refresh duration by outcome")
+metrics.describe("mcoc_event_loop_lag_seconds", "histogram", "How late the event loop woke from a short sleep")
+metrics.describe("mcoc_data_age_seconds", "gauge", "Seconds since the served champion data was written or fetched")
+metrics.describe("mcoc_data_info", "gauge", "Version (content hash) of the served champion data")
+
+
+def watch_data_manager(data_manager, registry: Metrics = metrics):
+    """Report a data manager's version and age (data_version() and data_age()) on every scrape"""
+    registry.gauge("mcoc_data_age_seconds", data_manager.data_age)
+    registry.gauge("mcoc_data_info", lambda: {(("version", data_manager.data_version() or "none"),): 1})
+
+
+class MetricsServer:
+    """A minimal HTTP endpoint on the bot's event loop: /healthz, /readyz and /metrics.
+
+    /healthz answers 200 while the process runs; /readyz 200 once ready()
+    is true and 503 before; /metrics the registry's text format. Only GET
+    is served and each connection answers one request.
+    """
+
+    def __init__(self, port: int, registry: Metrics = metrics, ready: Callable[[], bool] = lambda: True,
+                 host: str = "0.0.0.0"):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self.ready = ready
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Serving /healthz, /readyz and /metrics on port {self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def respond(self, method: str, path: str) -> Tuple[int, str, str]:
+        """(status, content type, body) for a request"""
+        if method != "GET":
+            return 405, "text/plain", "method not allowed\n"
+        path = path.split("?", 1)[0]
+        if path == "/healthz":
+            return 200, "text/plain", "ok\n"
+        if path == "/readyz":
+            return (200, "text/plain", "ready\n") if self.ready() else (503, "text/plain", "not ready\n")
+        if path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.registry.render()
+        return 404, "text/plain", "not found\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+            parts = head[:MAX_REQUEST_BYTES].split(b"\r\n", 1)[0].decode("latin-1").split()
+            status, content_type, body = self.respond(*parts[:2]) if len(parts) >= 2 else (400, "text/plain", "bad request\n")
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            logging.error(f"Error serving metrics request: {e}")
+            status, content_type, body = 500, "text/plain", "error\n"
+        payload = body.encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  500: "Internal Server Error", 503: "Service Unavailable"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from utils.metrics import metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Lanes of command work, each with its own threads, so cheap lookups never wait behind bulk requests.
+# Lookups hold the GIL, so threads beyond the cores add no throughput and make the loop wait longer for it
+CHEAP = "cheap"
+BULK = "bulk"
+LANE_WORKERS = {CHEAP: min(2, os.cpu_count() or 1), BULK: 1}
+# Names resolved per job, so one long !pick doesn't hold a worker while other commands wait
+CHUNK_SIZE = 8
+# Loop lag above this is logged
+LAG_WARNING_SECONDS = 0.25
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def command_executor(lane: str = CHEAP) -> ThreadPoolExecutor:
+    """The bounded pool a lane's command work runs in (created on first use)"""
+    if lane not in _executors:
+        _executors[lane] = ThreadPoolExecutor(max_workers=LANE_WORKERS[lane], thread_name_prefix=f"command-{lane}")
+    return _executors[lane]
+
+
+async def run_blocking(func: Callable[..., R], *args, lane: str = CHEAP) -> R:
+    """Run func(*args) in a lane's command pool and wait for it without blocking the loop.
+
+    The job runs in a copy of the caller's context, so it sees the command's
+    trace (utils/tracing.py) and its spans land in the caller's span.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(command_executor(lane), context.run, func, *args)
+
+
+async def map_chunked(func: Callable[[T], R], items: Sequence[T], chunk_size: int = CHUNK_SIZE,
+                      lane: str = CHEAP) -> List[R]:
+    """[func(item) for item in items], a chunk at a time in a lane's command pool.
+
+    Each chunk is its own job, so jobs from other commands get a worker in
+    between and a large batch can't monopolise the pool.
+    """
+    results: List[R] = []
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        results.extend(await run_blocking(lambda chunk=chunk: [func(item) for item in chunk], lane=lane))
+    return results
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep.
+
+    A loop that is free wakes up on time; any lag is time some callback
+    (a command, a parse, a lookup) held the loop and stalled heartbeats and
+    every other command. The last `window` samples are kept for stats().
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600, warn_above: float = LAG_WARNING_SECONDS):
+        self.interval = interval
+        self.warn_above = warn_above
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def record(self, lag: float):
+        self.samples.append(lag)
+        metrics.observe("mcoc_event_loop_lag_seconds", lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.warn_above:
+            logging.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def stats(self) -> Dict[str, float]:
+        """Lag percentiles over the window and the worst lag since start, in seconds"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0, "p50": 0.0, "p99": 0.0, "max": self.max_lag}
+        return {
+            "samples": len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max": self.max_lag,
+        }
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from utils.admission import AdmissionController, Overloaded
+from utils.metrics import metrics
+from utils.tracing import tracer
+
+# Each client (by address): 50 requests a second on average, bursts of 200
+CLIENT_RATE = 50.0
+CLIENT_BURST = 200
+# Bounds on what one request may ask for
+MAX_NAMES = 100
+MAX_LIMIT = 200
+MAX_BATCH = 100
+MAX_BODY_BYTES = 1_000_000
+# An idle keep-alive connection is closed after this long
+KEEPALIVE_SECONDS = 15
+
+metrics.describe("mcoc_api_requests_total", "counter", "Query API requests, by path and status")
+metrics.describe("mcoc_api_seconds", "histogram", "Query API request latency, by path")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BadRequest(Exception):
+    """A query the API can't answer; the message says why"""
+
+
+class QueryServer:
+    """The bot's lookups as JSON over HTTP, served from the bot's event loop and CommandHandler.
+
+    GET /champion?name=          the champions a name matches
+    GET /compare?names=a,b       !rankup a, b: the ranking and the advice
+    GET /pick?n=&names=a,b       !pick n a, b: the best n for battlegrounds
+    GET /top?class=&limit=&source=   a view's best champions, optionally of one class
+    POST /batch                  a JSON array of queries, each "/pick?n=2&names=a,b" or
+                                 {"path": "/pick", "params": {"n": 2, "names": "a,b"}};
+                                 answers [{"status": ..., "body": ...}] in the same order
+
+    Answers come from the same data, response cache and in-flight requests
+    as the Discord commands. Each client address is rate limited on its own
+    (no guild buckets), and big lists share the bulk lane's bounded queue.
+    Connections are HTTP/1.1 keep-alive unless the client asks to close.
+    """
+
+    def __init__(self, port: int, command_handler, host: str = "127.0.0.1",
+                 admission: Optional[AdmissionController] = None):
+        self.port = port
+        self.host = host
+        self.handler = command_handler
+        self.admission = admission or AdmissionController(user_rate=CLIENT_RATE, user_burst=CLIENT_BURST)
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Open keep-alive connections, closed by stop()
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Serving the query API on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    @staticmethod
+    def _names(params: Dict[str, List[str]]) -> List[str]:
+        names = [name.strip() for value in params.get("names", []) for name in value.split(",") if name.strip()]
+        if not names:
+            raise BadRequest("names is required (comma-separated)")
+        if len(names) > MAX_NAMES:
+            raise BadRequest(f"at most {MAX_NAMES} names per request")
+        return names
+
+    @staticmethod
+    def _int(params: Dict[str, List[str]], name: str, default: Optional[int], low: int, high: int) -> int:
+        values = params.get(name)
+        if not values:
+            if default is None:
+                raise BadRequest(f"{name} is required")
+            return default
+        try:
+            value = int(values[0])
+        except ValueError:
+            raise BadRequest(f"{name} must be a number")
+        if not low <= value <= high:
+            raise BadRequest(f"{name} must be between {low} and {high}")
+        return value
+
+    def _plan(self, path: str, params: Dict[str, List[str]]) -> Optional[Tuple[int, Callable[[], Awaitable[str]]]]:
+        """(names the query resolves, coroutine function answering it); None for an unknown path"""
+        if path == "/champion":
+            name = params.get("name", [""])[0].strip()
+            if not name:
+                raise BadRequest("name is required")
+            return 1, lambda: self.handler.champion_json_async(name)
+        if path == "/compare":
+            names = self._names(params)
+            return len(names), lambda: self.handler.compare_json_async(names)
+        if path == "/pick":
+            count = self._int(params, "n", None, 1, MAX_NAMES)
+            names = self._names(params)
+            return len(names), lambda: self.handler.pick_json_async(count, names)
+        if path == "/top":
+            sources = self.handler.data_manager.available_sources()
+            source = params.get("source", ["vega"])[0]
+            if source not in sources:
+                raise BadRequest(f"source must be one of {', '.join(sources)}")
+            limit = self._int(params, "limit", 10, 1, MAX_LIMIT)
+            class_name = params.get("class", [None])[0]
+
+            async def top():
+                return self.handler.top_json(class_name, source, limit)
+            return 1, top
+        return None
+
+    async def query(self, path: str, params: Dict[str, List[str]], client) -> Tuple[int, str]:
+        """(status, JSON body) for one query"""
+        started = time.perf_counter()
+        label = path
+        # Traced like a command; slow queries go to the same file, under "api"
+        trace = tracer.start("api", path=path, client=client)
+        try:
+            plan = self._plan(path, params)
+            if plan is None:
+                label = "other"
+                raise BadRequest(f"no such query: {path}")
+            names, answer = plan
+            # Only the client's bucket is charged here; the handler queues long lists in its bulk lane
+            self.admission.release(self.admission.admit(client, None, names))
+            status, body = 200, await answer()
+        except BadRequest as e:
+            status, body = 404 if label == "other" else 400, json.dumps({"error": str(e)})
+        except Overloaded as e:
+            status, body = 429, json.dumps({"error": str(e)})
+        except Exception as e:
+            logging.error(f"Error answering {path}: {e}")
+            status, body = 500, json.dumps({"error": "internal error"})
+        metrics.inc("mcoc_api_requests_total", {"path": label, "status": str(status)})
+        metrics.observe("mcoc_api_seconds", time.perf_counter() - started, {"path": label})
+        tracer.finish(trace, status=status)
+        return status, body
+
+    async def batch(self, body: bytes, client) -> Tuple[int, str]:
+        """Answer every query in a POST /batch body, concurrently"""
+        try:
+            queries = json.loads(body)
+        except ValueError:
+            return 400, json.dumps({"error": "body must be a JSON array of queries"})
+        if not isinstance(queries, list) or len(queries) > MAX_BATCH:
+            return 400, json.dumps({"error": f"body must be a JSON array of at most {MAX_BATCH} queries"})
+
+        async def answer(query) -> str:
+            if isinstance(query, str):
+                target = urlsplit(query)
+                path, params = target.path, parse_qs(target.query)
+            elif isinstance(query, dict) and isinstance(query.get("path"), str):
+                path = query["path"]
+                params = {name: [",".join(map(str, value)) if isinstance(value, list) else str(value)]
+                          for name, value in (query.get("params") or {}).items()}
+            else:
+                return json.dumps({"status": 400, "body": {"error": "a query is a path or {\"path\", \"params\"}"}})
+            status, answer_body = await self.query(path, params, client)
+            # The bodies are JSON already; splice them in rather than parsing them again
+            return f'{{"status": {status}, "body": {answer_body}}}'
+
+        answers = await asyncio.gather(*(answer(query) for query in queries))
+        return 200, "[" + ", ".join(answers) + "]"
+
+    async def respond(self, method: str, target: str, body: bytes, client) -> Tuple[int, str]:
+        """(status, JSON body) for a request"""
+        url = urlsplit(target)
+        if url.path == "/batch":
+            if method != "POST":
+                return 405, json.dumps({"error": "POST a JSON array of queries"})
+            return await self.batch(body, client)
+        if method != "GET":
+            return 405, json.dumps({"error": "use GET, or POST /batch"})
+        return await self.query(url.path, parse_qs(url.query), client)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = (writer.get_extra_info("peername") or ("unknown",))[0]
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=KEEPALIVE_SECONDS)
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close" if parts[-1:] == ["HTTP/1.1"]
+                              else headers.get("connection", "").lower() == "keep-alive")
+                length = int(headers.get("content-length") or 0)
+                if len(parts) != 3 or length < 0:
+                    status, body, keep_alive = 400, json.dumps({"error": "bad request"}), False
+                elif length > MAX_BODY_BYTES:
+                    status, body, keep_alive = 413, json.dumps({"error": f"at most {MAX_BODY_BYTES} bytes"}), False
+                else:
+                    payload = await reader.readexactly(length) if length else b""
+                    status, body = await self.respond(parts[0], parts[1], payload, client)
+                self._write(writer, status, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError,
+                ValueError):
+            pass
+        except Exception as e:
+            logging.error(f"Error serving a query API connection: {e}")
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, body: str, keep_alive: bool):
+        payload = body.encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
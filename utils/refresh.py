@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from utils.metrics import metrics
+
+
+def diff_champions(old: Dict[Any, Any], new: Dict[Any, Any]) -> Dict[str, int]:
+    """How many champions (keyed by name) were added, removed or changed between two loads"""
+    return {
+        "added": sum(1 for key in new if key not in old),
+        "removed": sum(1 for key in old if key not in new),
+        "changed": sum(1 for key, champion in new.items() if key in old and old[key] != champion),
+    }
+
+
+@dataclass
+class RefreshResult:
+    """What one refresh did"""
+    seconds: float
+    skipped: bool = False  # the sources hashed the same as last time, so nothing was reloaded
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    error: Optional[str] = None
+
+    @property
+    def diff_size(self) -> int:
+        return self.added + self.removed + self.changed
+
+    def summary(self) -> str:
+        if self.error:
+            return f"Refresh failed after {self.seconds:.1f}s: {self.error}"
+        if self.skipped:
+            return f"Data unchanged (checked in {self.seconds:.1f}s)"
+        return (f"Refreshed in {self.seconds:.1f}s: {self.added} added, {self.removed} removed, "
+                f"{self.changed} changed")
+
+
+class RefreshScheduler:
+    """Refreshes a data manager every `interval` seconds from an asyncio task.
+
+    The slow half of a refresh (manager.prepare_refresh: fetching, parsing,
+    rebuilding) runs in the default executor so the event loop keeps serving
+    commands; the new data is swapped in on the loop (manager.apply_refresh),
+    between commands. prepare_refresh returns None when the sources are
+    unchanged. Each wait is jittered by +/- `jitter` so several bots don't
+    refresh in step; after a failure the wait starts at retry_seconds and
+    doubles up to the interval. Calls to refresh() while one is running share
+    its result.
+    """
+
+    def __init__(self, manager, interval: float, jitter: float = 0.1, retry_seconds: float = 60,
+                 rebuild: bool = False):
+        self.manager = manager
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_seconds = retry_seconds
+        self.rebuild = rebuild
+        self.failures = 0
+        self.last_result: Optional[RefreshResult] = None
+        self._running: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        """Seconds until the next scheduled refresh"""
+        delay = self.interval
+        if self.failures:
+            delay = min(self.interval, self.retry_seconds * 2 ** (self.failures - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self):
+        """Schedule refreshes on the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.next_delay())
+            result = await self.refresh()
+            logging.info(f"Scheduled refresh: {result.summary()}")
+
+    async def refresh(self) -> RefreshResult:
+        """Refresh now, or wait for the refresh already running"""
+        if self._running is None or self._running.done():
+            self._running = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._running)
+
+    async def _refresh(self) -> RefreshResult:
+        started = time.perf_counter()
+        try:
+            prepared = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.manager.prepare_refresh(rebuild=self.rebuild))
+            if prepared is None:
+                result = RefreshResult(seconds=time.perf_counter() - started, skipped=True)
+            else:
+                diff = self.manager.apply_refresh(prepared)
+                result = RefreshResult(seconds=time.perf_counter() - started, **diff)
+            self.failures = 0
+        except Exception as e:
+            self.failures += 1
+            logging.error(f"Refresh failed: {e}")
+            result = RefreshResult(seconds=time.perf_counter() - started, error=str(e))
+        outcome = "failed" if result.error else "unchanged" if result.skipped else "applied"
+        metrics.observe("mcoc_refresh_seconds", result.seconds, {"outcome": outcome})
+        self.last_result = result
+        return result
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from utils.metrics import metrics
+
+# Bounds on what the cache holds; the least recently used replies go first
+MAX_ENTRIES = 2048
+MAX_CHARS = 4_000_000
+
+metrics.describe("mcoc_response_cache_total", "counter", "Command replies served from the cache or computed")
+metrics.describe("mcoc_response_cache_saved_seconds_total", "counter",
+                 "Time the cached replies took to compute the first time, summed over hits")
+
+
+class ResponseCache:
+    """Finished command replies, least recently used evicted first.
+
+    Every lookup passes the data version (DataManager.data_version()); when
+    it differs from the version the entries were stored under, the cache is
+    emptied, so a refresh invalidates it without anyone calling clear(). Each
+    entry keeps how long the reply took to compute, which a hit then counts
+    as saved. Only used from the event loop, so there is no lock.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_chars: int = MAX_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.version: Optional[str] = None
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: Optional[str]):
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def lookup(self, key: Hashable, version: Optional[str]) -> Optional[Tuple[str, float]]:
+        """(reply, seconds it took) cached for key under this data version, without counting a hit or miss"""
+        self._check_version(version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def record(self, hit: bool, seconds: float = 0.0):
+        """Count one request as answered from the cache (saving seconds) or computed"""
+        if hit:
+            self.hits += 1
+            self.saved_seconds += seconds
+            metrics.inc("mcoc_response_cache_saved_seconds_total", value=seconds)
+        else:
+            self.misses += 1
+        metrics.inc("mcoc_response_cache_total", {"result": "hit" if hit else "miss"})
+
+    def get(self, key: Hashable, version: Optional[str]) -> Optional[str]:
+        """The cached reply for key under this data version, or None; counts a hit or miss"""
+        entry = self.lookup(key, version)
+        self.record(entry is not None, entry[1] if entry else 0.0)
+        return entry[0] if entry else None
+
+    def put(self, key: Hashable, version: Optional[str], reply: str, seconds: float):
+        """Cache a reply that took seconds to compute; nothing is cached without a data version"""
+        self._check_version(version)
+        if version is None or len(reply) > self.max_chars:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.chars -= len(previous[0])
+        self._entries[key] = (reply, seconds)
+        self.chars += len(reply)
+        while len(self._entries) > self.max_entries or self.chars > self.max_chars:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.chars -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.chars = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Bump when the sidecar layout or any of the derived keys change; older sidecars are then ignored
+SEARCH_INDEX_VERSION = 2
+
+# Tier rankings (higher is better)
+TIER_ORDER = {
+    "Above All": 10,
+    "Scorching": 9,
+    "Super Hot": 8,
+    "Hot": 7,
+    "Mild": 6,
+    "Information": 5
+}
+
+# Every champion any tier list covers, ordered by its average score across them
+BLENDED_VIEW = "blended"
+
+def normalize_name(name: str) -> str:
+    """Lowercase letters and digits only; how queries and names are compared"""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def name_ngrams(text: str, n: int = 2) -> Set[str]:
+    """The distinct n-grams of a normalized name"""
+    return set(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def legacy_source(champion: Dict) -> str:
+    """'vega' for champions with BG data, 'illuminati' for the ones only on the ranking sheet"""
+    return "vega" if champion.get('battlegrounds_rating') is not None else "illuminati"
+
+
+def legacy_sort_key(tier: str, rating) -> Tuple:
+    """Tier order, with rating as secondary sort if available"""
+    return (TIER_ORDER.get(tier, 0), rating or 0)
+
+
+def source_sort_key(record: Dict) -> Tuple:
+    """Best first within one source: tier, then rating, then rank (rank 1 is best)"""
+    return (TIER_ORDER.get(record.get('tier'), 0), record.get('rating') or 0, -(record.get('rank') or 0))
+
+
+def source_points(record: Dict) -> float:
+    """One source's verdict on a 0-10 scale: its tier if it has tiers, otherwise its rating"""
+    if record.get('tier') in TIER_ORDER:
+        return TIER_ORDER[record['tier']]
+    return record.get('rating') or 0
+
+
+def source_views(per_champion_sources: List[Dict[str, Dict]]) -> Dict[str, List[int]]:
+    """Positions of the champions ordered best first for each source, plus the blended view.
+
+    The blended score is the average of every source's points; more sources,
+    then a higher rating, break ties.
+    """
+    by_source: Dict[str, List[Tuple[Tuple, int]]] = {}
+    blended = []
+    for position, sources in enumerate(per_champion_sources):
+        for source, record in sources.items():
+            by_source.setdefault(source, []).append((source_sort_key(record), position))
+        if sources:
+            points = [source_points(record) for record in sources.values()]
+            rating = max((record.get('rating') or 0 for record in sources.values()), default=0)
+            blended.append(((sum(points) / len(points), len(points), rating), position))
+
+    views = {source: [position for _, position in sorted(scored, key=lambda item: item[0], reverse=True)]
+             for source, scored in by_source.items()}
+    views[BLENDED_VIEW] = [position for _, position in sorted(blended, key=lambda item: item[0], reverse=True)]
+    return views
+
+
+def _postings(values: Iterable[Iterable[str]]) -> Dict[str, List[int]]:
+    postings: Dict[str, List[int]] = {}
+    for position, keys in enumerate(values):
+        for key in keys:
+            positions = postings.setdefault(key, [])
+            if not positions or positions[-1] != position:
+                positions.append(position)
+    return postings
+
+
+def build_search_index(champions_data: Dict[str, Dict], database_sha256: str) -> Dict:
+    """Everything the bot derives from the database to answer name queries and top-N lists.
+
+    Positions refer to the champions in database order. `database_sha256` is
+    the hash of the database file this index belongs to; a bot only uses the
+    index when its database has the same hash.
+    """
+    keys = [name_key.lower() for name_key in champions_data]
+    normalized = [normalize_name(key) for key in keys]
+    ngrams = [sorted(name_ngrams(text)) for text in normalized]
+    prefix_index = sorted(range(len(normalized)), key=lambda position: normalized[position])
+
+    # Top-N lists: the 'vega' / 'illuminati' groups first, then one view per tier list and the blended view
+    champions = list(champions_data.values())
+    views: Dict[str, List[int]] = {"vega": [], "illuminati": []}
+    for position, champion in enumerate(champions):
+        views[legacy_source(champion)].append(position)
+    for source, positions in views.items():
+        positions.sort(key=lambda position: legacy_sort_key(champions[position].get('tier'),
+                                                            champions[position].get('battlegrounds_rating')),
+                       reverse=True)
+    for source, positions in source_views([champion.get('sources', {}) for champion in champions]).items():
+        views.setdefault(source, positions)
+
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "database_sha256": database_sha256,
+        "keys": keys,
+        "normalized": normalized,
+        "ngram_counts": [len(grams) for grams in ngrams],
+        "ngrams": _postings(ngrams),
+        "prefix_names": [normalized[position] for position in prefix_index],
+        "prefix_index": prefix_index,
+        "views": views,
+    }
+
+
+def sidecar_path(database_path: str) -> str:
+    """Where the search index of a database file lives (champions_database.json -> champions_database.search.json)"""
+    root, ext = os.path.splitext(database_path)
+    return f"{root}.search{ext or '.json'}"
+
+
+def write_search_index(index: Dict, path: str) -> Dict:
+    """Save the index as compact JSON next to the database"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    return {"path": path, "version": index["version"], "database_sha256": index["database_sha256"]}
+
+
+def load_search_index(path: str, database_sha256: str) -> Optional[Dict]:
+    """The sidecar at path, or None if it is missing, from another index version or for another database"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        logging.info(f"No search index at {path}; building it in memory")
+        return None
+    except ValueError as e:
+        logging.warning(f"Ignoring unreadable search index {path}: {e}")
+        return None
+    if index.get("version") != SEARCH_INDEX_VERSION:
+        logging.warning(f"Ignoring search index {path}: version {index.get('version')}, "
+                        f"expected {SEARCH_INDEX_VERSION}")
+        return None
+    if index.get("database_sha256") != database_sha256:
+        logging.warning(f"Ignoring search index {path}: it was built for a different database")
+        return None
+    return index
+
+
+class SearchIndex:
+    """Name search structures over the champions, loaded from the sidecar or built on the spot"""
+
+    def __init__(self, data: Dict):
+        self.keys: List[str] = data["keys"]
+        self.normalized: List[str] = data["normalized"]
+        self.ngram_counts: List[int] = data["ngram_counts"]
+        self.ngrams: Dict[str, List[int]] = data["ngrams"]
+        self.prefix_names: List[str] = data["prefix_names"]
+        self.prefix_index: List[int] = data["prefix_index"]
+        self.views: Dict[str, List[int]] = data["views"]
+
+    def add(self, name_key: str):
+        """Index a champion that isn't in the database (e.g. from the game's champion list)"""
+        position = len(self.keys)
+        text = normalize_name(name_key)
+        grams = name_ngrams(text)
+        self.keys.append(name_key)
+        self.normalized.append(text)
+        self.ngram_counts.append(len(grams))
+        for gram in grams:
+            self.ngrams.setdefault(gram, []).append(position)
+        slot = bisect_left(self.prefix_names, text)
+        self.prefix_names.insert(slot, text)
+        self.prefix_index.insert(slot, position)
+
+    def prefixed(self, query: str) -> Set[int]:
+        """Positions of the names that start with the normalized query"""
+        start = bisect_left(self.prefix_names, query)
+        end = bisect_left(self.prefix_names, query + "\U0010FFFF")
+        return set(self.prefix_index[start:end])
+
+    def ngram_scores(self, query: str) -> Tuple[int, Dict[int, int]]:
+        """(number of query bigrams, {position: bigrams shared with the query})"""
+        grams = name_ngrams(query)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for position in self.ngrams.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        return len(grams), shared
+
+    def ngram_similarity(self, query_count: int, shared: Dict[int, int], position: int) -> float:
+        """Jaccard similarity of bigram sets, from the posting lists instead of building sets"""
+        key_count = self.ngram_counts[position]
+        if not query_count and not key_count:
+            return 1.0
+        if not query_count or not key_count:
+            return 0.0
+        common = shared.get(position, 0)
+        return common / (query_count + key_count - common)
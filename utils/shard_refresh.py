@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
+
+from utils.metrics import metrics
+from utils.refresh import RefreshResult, RefreshScheduler
+
+# Longest a shard process gets to load a new database version before the refresh is abandoned
+PREPARE_TIMEOUT_SECONDS = 120
+
+
+class ShardLink:
+    """One end of a multiprocessing Pipe, read from an asyncio loop.
+
+    Messages are tuples whose first item says what they are. Reading is
+    driven by the loop's reader callback for the pipe, so nothing blocks.
+    """
+
+    def __init__(self, conn, on_message):
+        self.conn = conn
+        self.on_message = on_message
+        self.closed = False
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        loop.add_reader(self.conn.fileno(), self._readable)
+
+    def detach(self, loop: asyncio.AbstractEventLoop):
+        if not self.closed:
+            loop.remove_reader(self.conn.fileno())
+
+    def send(self, *message):
+        if self.closed:
+            return
+        try:
+            self.conn.send(message)
+        except (BrokenPipeError, OSError) as e:
+            logging.error(f"Shard link closed while sending {message[0]}: {e}")
+            self._close()
+
+    def _readable(self):
+        try:
+            while self.conn.poll():
+                self.on_message(self, self.conn.recv())
+        except (EOFError, OSError):
+            self._close()
+
+    def _close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                asyncio.get_running_loop().remove_reader(self.conn.fileno())
+            except (RuntimeError, ValueError, OSError):
+                pass
+            self.on_message(self, ("closed",))
+
+
+class ShardRefreshCoordinator(RefreshScheduler):
+    """Refreshes every shard process to the same database version at once (runs in the launcher).
+
+    The launcher loads the new version first (prepare_refresh on its own
+    manager) and asks every shard to load that same version. Only when all
+    of them have it ready are they told to swap it in, and the launcher
+    swaps its own copy (the one new workers are forked from) last; if any
+    shard can't, all drop it and keep serving the old one. Once the swap
+    has begun there is no going back: a shard that doesn't confirm the new
+    version (its swap failed, it didn't answer, or it was forked during the
+    round) is taken through prepare and apply again, and if that fails too
+    it is handed to restart_shard, to be forked again from the launcher's
+    new copy. Shards ask for a refresh (!refresh) through their link and
+    get the result back.
+    """
+
+    def __init__(self, manager, interval: float, **options):
+        super().__init__(manager, interval, **options)
+        self.links: List[ShardLink] = []
+        self._round = 0
+        self._replies: Dict[ShardLink, asyncio.Future] = {}
+        # Called with the link of a shard that can't switch to the version the others have
+        self.restart_shard: Optional[Callable[[ShardLink], None]] = None
+
+    def add_link(self, link: ShardLink):
+        self.links.append(link)
+
+    def remove_link(self, link: ShardLink):
+        if link in self.links:
+            self.links.remove(link)
+        reply = self._replies.pop(link, None)
+        if reply is not None and not reply.done():
+            reply.set_result(("failed", "shard process exited"))
+
+    def on_message(self, link: ShardLink, message: tuple):
+        kind = message[0]
+        if kind == "refresh":
+            asyncio.get_running_loop().create_task(self._answer_refresh(link))
+        elif kind in ("prepared", "applied"):
+            reply = self._replies.get(link)
+            if reply is not None and not reply.done() and message[1] == self._round:
+                reply.set_result(message[2:])
+        elif kind == "closed":
+            self.remove_link(link)
+
+    async def _answer_refresh(self, link: ShardLink):
+        result = await self.refresh()
+        link.send("refreshed", asdict(result))
+
+    async def _ask(self, links: List[ShardLink], *message) -> Dict[ShardLink, tuple]:
+        """Send message to links and wait for each one's reply; a shard that doesn't answer in time
+        (or exits) gets ("failed", why)"""
+        if not links:
+            return {}
+        loop = asyncio.get_running_loop()
+        replies = {link: loop.create_future() for link in links}
+        self._replies = dict(replies)
+        for link in links:
+            link.send(*message)
+        try:
+            await asyncio.wait(list(replies.values()), timeout=PREPARE_TIMEOUT_SECONDS)
+        finally:
+            self._replies = {}
+        return {link: reply.result() if reply.done()
+                else ("failed", f"no answer to {message[0]} within {PREPARE_TIMEOUT_SECONDS}s")
+                for link, reply in replies.items()}
+
+    async def _refresh(self) -> RefreshResult:
+        started = time.perf_counter()
+        try:
+            prepared = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.manager.prepare_refresh(rebuild=self.rebuild))
+            if prepared is None:
+                result = RefreshResult(seconds=time.perf_counter() - started, skipped=True)
+            else:
+                diff = await self._switch_shards(prepared)
+                result = RefreshResult(seconds=time.perf_counter() - started, **diff)
+            self.failures = 0
+        except Exception as e:
+            self.failures += 1
+            logging.error(f"Shard refresh failed: {e}")
+            result = RefreshResult(seconds=time.perf_counter() - started, error=str(e))
+        outcome = "failed" if result.error else "unchanged" if result.skipped else "applied"
+        metrics.observe("mcoc_refresh_seconds", result.seconds, {"outcome": outcome})
+        self.last_result = result
+        return result
+
+    async def _switch_shards(self, prepared) -> Dict[str, int]:
+        """Have every shard load prepared's version, then switch all of them (and the launcher) to it"""
+        version = prepared.database_sha256
+        self._round += 1
+        shards = list(self.links)
+        replies = await self._ask(shards, "prepare", self._round, version)
+        failed = [reply[1] for reply in replies.values() if reply[0] != "ok"]
+        if failed:
+            for link in shards:
+                link.send("abort", self._round)
+            raise RuntimeError(f"{len(failed)} shard(s) could not load the new version: {failed[0]}")
+        applied = await self._ask(shards, "apply", self._round, version)
+        # Some shards may serve the new version from here on, so everyone moves forward: the launcher
+        # switches (workers forked from now on start on it) and shards that didn't are brought along
+        diff = self.manager.apply_refresh(prepared)
+        behind = [link for link, reply in applied.items() if tuple(reply[:2]) != ("ok", version)]
+        behind += [link for link in self.links if link not in applied]
+        if behind:
+            await self._catch_up(behind, version)
+        logging.info(f"{len(shards)} shard processes switched to {version[:12]}")
+        return diff
+
+    async def _catch_up(self, links: List[ShardLink], version: str):
+        """Prepare and apply version again on shards that missed the switch; restart those that still can't"""
+        self._round += 1
+        links = [link for link in links if link in self.links]
+        logging.warning(f"{len(links)} shard process(es) missed the switch to {version[:12]}; retrying")
+        prepared = await self._ask(links, "prepare", self._round, version)
+        applied = await self._ask([link for link in links if prepared[link][0] == "ok"], "apply", self._round,
+                                  version)
+        for link in links:
+            reply = applied.get(link, prepared[link])
+            if tuple(reply[:2]) == ("ok", version):
+                continue
+            logging.error(f"A shard process can't switch to {version[:12]} ({reply[1]}); restarting it")
+            if self.restart_shard is not None:
+                self.restart_shard(link)
+
+
+class ShardRefreshClient:
+    """A shard process's side of the coordinated refresh; what its RefreshCog drives.
+
+    It never refreshes on its own schedule (the launcher does). It loads
+    the version the launcher names when asked to prepare, swaps it in on
+    apply, and forwards !refresh to the launcher.
+    """
+
+    def __init__(self, manager, conn):
+        self.manager = manager
+        self.link = ShardLink(conn, self.on_message)
+        self.last_result: Optional[RefreshResult] = None
+        self._prepared = None
+        # The round _prepared was loaded for; apply only swaps in what was prepared in the same round
+        self._prepared_round = None
+        self._waiting: List[asyncio.Future] = []
+
+    def start(self):
+        self.link.attach(asyncio.get_running_loop())
+
+    def stop(self):
+        self.link.detach(asyncio.get_running_loop())
+
+    async def refresh(self) -> RefreshResult:
+        """Ask the launcher for a refresh of every shard and wait for the result"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self.link.send("refresh")
+        return await future
+
+    def on_message(self, link: ShardLink, message: tuple):
+        kind = message[0]
+        if kind == "prepare":
+            asyncio.get_running_loop().create_task(self._prepare(*message[1:]))
+        elif kind == "apply":
+            self._apply(*message[1:])
+        elif kind == "abort":
+            self._prepared = self._prepared_round = None
+        elif kind == "refreshed":
+            self.last_result = RefreshResult(**message[1])
+            waiting, self._waiting = self._waiting, []
+            for future in waiting:
+                if not future.done():
+                    future.set_result(self.last_result)
+        elif kind == "closed":
+            logging.error("Lost the link to the shard launcher; refreshes are off")
+
+    async def _prepare(self, round_id: int, version: str):
+        try:
+            fresh = await asyncio.get_running_loop().run_in_executor(None, self.manager.prepare_refresh)
+            loaded = fresh.database_sha256 if fresh is not None else self.manager.database_sha256
+            if loaded != version:
+                raise ValueError(f"loaded {str(loaded)[:12]}, expected {version[:12]}")
+            # None when this shard already has the version
+            self._prepared, self._prepared_round = fresh, round_id
+            self.link.send("prepared", round_id, "ok", None)
+        except Exception as e:
+            self._prepared = self._prepared_round = None
+            self.link.send("prepared", round_id, "failed", str(e))
+
+    def _apply(self, round_id: int, version: str):
+        """Swap in what was prepared for round_id and say which version this shard now serves"""
+        prepared, prepared_round = self._prepared, self._prepared_round
+        self._prepared = self._prepared_round = None
+        if prepared_round != round_id:
+            # Forked after the prepare, or the prepare failed: there is nothing to swap in
+            self.link.send("applied", round_id, "failed", "nothing prepared for this round", {})
+            return
+        try:
+            diff = self.manager.apply_refresh(prepared) if prepared is not None else {}
+        except Exception as e:
+            self.link.send("applied", round_id, "failed", str(e), {})
+            return
+        self.link.send("applied", round_id, "ok", self.manager.database_sha256, diff)
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bump when the shard or manifest layout changes
+SHARD_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+
+
+def shards_dir(database_path: str) -> str:
+    """Where the shards of a database file live (champions_database.json -> champions_database.shards/)"""
+    root, _ = os.path.splitext(database_path)
+    return f"{root}.shards"
+
+
+def current_shards(database_path: str) -> Optional[str]:
+    """The shard directory of a database file if it was written from that exact file, else None.
+
+    A build without --shards leaves the last shards behind; their manifest
+    then names another database hash and the full file has to be read instead.
+    """
+    directory = shards_dir(database_path)
+    manifest = load_manifest(directory)
+    if manifest is None or manifest.get("version") != SHARD_FORMAT_VERSION:
+        return None
+    try:
+        with open(database_path, 'rb') as f:
+            database_sha256 = hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        # Nothing newer to be stale against
+        return directory
+    return directory if manifest.get("database_sha256") == database_sha256 else None
+
+
+def shard_file_name(class_name: str) -> str:
+    """File name of one class's shard ("Mystic" -> "mystic.json")"""
+    return "".join(char if char.isalnum() else "_" for char in class_name.lower()) + ".json"
+
+
+def encode_shard(champions: List[Tuple[str, Dict]]) -> Tuple[bytes, Dict[str, Tuple[int, int]]]:
+    """Compact JSON object of (name_key, champion) pairs and {name_key: (offset, length)} of each champion.
+
+    The bytes are exactly json.dumps(dict(champions), separators=(',', ':'),
+    ensure_ascii=False), so a shard parses as a whole; the offsets let one
+    champion be read without parsing the rest of it.
+    """
+    parts = [b"{"]
+    size = 1
+    offsets = {}
+    for index, (name_key, champion) in enumerate(champions):
+        key = json.dumps(name_key, ensure_ascii=False).encode('utf-8')
+        value = json.dumps(champion, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        prefix = (b"," if index else b"") + key + b":"
+        offsets[name_key] = (size + len(prefix), len(value))
+        parts += [prefix, value]
+        size += len(prefix) + len(value)
+    parts.append(b"}")
+    return b"".join(parts), offsets
+
+
+def _replace_file(directory: str, name: str, data: bytes):
+    """Write a file so readers see either the old or the new content, never half of it"""
+    fd, tmp_path = tempfile.mkstemp(prefix=".shard-", suffix=".json", dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def write_shards(champions_data: Dict[str, Dict], database: Optional[Dict], directory: str) -> Dict:
+    """Save one compact shard per class plus a manifest, and return the manifest.
+
+    The manifest lists each shard's file, champion count, size and sha256,
+    and for every champion its position in the full database and the byte
+    offset and length of its record in the shard. Shards whose content didn't
+    change are left alone, and the manifest is written last, so a reader that
+    goes by the manifest hashes only re-reads the shards that were swapped.
+    Shards of classes that are no longer in the data are removed after it.
+    `database` is what the write stage returned (its sha256 ties the shards to
+    the full database file), or None.
+    """
+    os.makedirs(directory, exist_ok=True)
+    by_class: Dict[str, List[Tuple[str, Dict]]] = {}
+    positions = {}
+    for position, (name_key, champion) in enumerate(champions_data.items()):
+        by_class.setdefault(champion.get('class') or "Unknown", []).append((name_key, champion))
+        positions[name_key] = position
+
+    old = load_manifest(directory)
+    old_shards = old["shards"] if old and old.get("version") == SHARD_FORMAT_VERSION else {}
+
+    shards = {}
+    for class_name, champions in by_class.items():
+        data, offsets = encode_shard(champions)
+        file_name = shard_file_name(class_name)
+        sha256 = hashlib.sha256(data).hexdigest()
+        unchanged = (old_shards.get(class_name, {}).get("sha256") == sha256
+                     and os.path.exists(os.path.join(directory, file_name)))
+        if not unchanged:
+            _replace_file(directory, file_name, data)
+        shards[class_name] = {
+            "file": file_name,
+            "champions": len(champions),
+            "bytes": len(data),
+            "sha256": sha256,
+            "offsets": {name_key: [positions[name_key], *offsets[name_key]] for name_key in offsets},
+        }
+
+    manifest = {
+        "version": SHARD_FORMAT_VERSION,
+        "database_sha256": (database or {}).get("sha256"),
+        "champions": len(champions_data),
+        "shards": shards,
+    }
+    _replace_file(directory, MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    listed = {entry["file"] for entry in shards.values()} | {MANIFEST_FILE}
+    for file_name in os.listdir(directory):
+        if file_name.endswith(".json") and file_name not in listed:
+            os.remove(os.path.join(directory, file_name))
+    return manifest
+
+
+def load_manifest(directory: str) -> Optional[Dict]:
+    """The manifest of a shard directory, or None if there isn't one"""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class ShardedDatabase:
+    """Champions loaded class by class from a shard directory.
+
+    Only the classes asked for are read. reload() re-reads the manifest and
+    swaps in just the loaded shards whose hash changed.
+    """
+
+    def __init__(self, directory: str, classes: Optional[Iterable[str]] = None):
+        self.directory = directory
+        self.manifest = self._read_manifest()
+        wanted = self.manifest["shards"] if classes is None else self.resolve_classes(classes)
+        self.shards: Dict[str, Dict[str, Dict]] = {class_name: self._read_shard(class_name) for class_name in wanted}
+
+    def _read_manifest(self) -> Dict:
+        manifest = load_manifest(self.directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No shard manifest in {self.directory}")
+        if manifest.get("version") != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Shards in {self.directory} are version {manifest.get('version')}, "
+                             f"expected {SHARD_FORMAT_VERSION}")
+        return manifest
+
+    def _read_shard(self, class_name: str) -> Dict[str, Dict]:
+        entry = self.manifest["shards"][class_name]
+        with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Shard {entry['file']} doesn't match its manifest entry")
+        return json.loads(data)
+
+    @property
+    def classes(self) -> List[str]:
+        """Every class in the manifest, in database order"""
+        return list(self.manifest["shards"])
+
+    def resolve_classes(self, names: Iterable[str]) -> List[str]:
+        """Manifest class names for names given in any case; unknown names raise KeyError"""
+        by_lower = {class_name.lower(): class_name for class_name in self.manifest["shards"]}
+        resolved = []
+        for name in names:
+            if name.lower() not in by_lower:
+                raise KeyError(f"No shard for class '{name}' (have: {', '.join(self.classes)})")
+            resolved.append(by_lower[name.lower()])
+        return resolved
+
+    def champions(self) -> Dict[str, Dict]:
+        """The loaded champions keyed by name, in the order of the full database"""
+        loaded = []
+        for class_name, champions in self.shards.items():
+            offsets = self.manifest["shards"][class_name]["offsets"]
+            loaded += [(offsets[name_key][0], name_key, champion) for name_key, champion in champions.items()]
+        return {name_key: champion for _, name_key, champion in sorted(loaded, key=lambda item: item[0])}
+
+    def champion(self, name_key: str) -> Optional[Dict]:
+        """One champion's record, read by its byte range when its class isn't loaded"""
+        for class_name, entry in self.manifest["shards"].items():
+            if name_key in entry["offsets"]:
+                if class_name in self.shards:
+                    return self.shards[class_name].get(name_key)
+                _, offset, length = entry["offsets"][name_key]
+                with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+                    f.seek(offset)
+                    return json.loads(f.read(length))
+        return None
+
+    def reload(self) -> List[str]:
+        """Pick up a rebuilt manifest; re-read only the loaded shards that changed and return their classes"""
+        old_shards = self.manifest["shards"]
+        self.manifest = self._read_manifest()
+        changed = []
+        for class_name in list(self.shards):
+            entry = self.manifest["shards"].get(class_name)
+            if entry is None:
+                del self.shards[class_name]
+                changed.append(class_name)
+            elif entry["sha256"] != old_shards.get(class_name, {}).get("sha256"):
+                self.shards[class_name] = self._read_shard(class_name)
+                changed.append(class_name)
+        return changed
@@ -0,0 +1,150 @@
+import json
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.sheet_stream import CellEvent, iter_class_blocks, iter_column_cells
+
+# Where each source keeps its header rows, class names, tiers and sections lives in data, not code
+LAYOUTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sheet_layouts.json")
+
+# Class names down column A, champions ranked in the columns to the right
+CLASS_BLOCKS = "class_blocks"
+# Class names across one header row, champions listed down each class column
+COLUMNS = "columns"
+
+
+@dataclass(frozen=True)
+class Section:
+    """A run of rows (e.g. the Attacker block of the BGs sheet) and the cells that announce it"""
+    name: str
+    start_row: int
+    markers: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """Where things sit in one source sheet, compiled from a spec in data/sheet_layouts.json"""
+    name: str
+    layout: str
+    header_rows: int
+    class_row: int = 0
+    class_column: int = 0
+    tier_row: Optional[int] = None
+    rated: bool = False
+    classes: Tuple[str, ...] = ()
+    tiers: Tuple[str, ...] = ()
+    default_tier: str = ""
+    sections: Tuple[Section, ...] = ()
+
+    def tier_of(self, value: str) -> Optional[str]:
+        """The tier named in a header cell (first match in spec order), or None"""
+        for tier in self.tiers:
+            if tier in value:
+                return tier
+        return None
+
+    def is_class(self, name: str) -> bool:
+        """True if name is one of the classes in the spec (any case)"""
+        return name.lower() in self.classes
+
+    @property
+    def spec_section_starts(self) -> Tuple[int, ...]:
+        """Section start rows as written in the spec, for sheets that can't be scanned first"""
+        return tuple(section.start_row for section in self.sections)
+
+    def find_sections(self, rows: Iterable[List[str]]) -> Tuple[int, ...]:
+        """Start row of every section, found in one pass over the rows.
+
+        A section starts at the first row below the header rows (and below the
+        previous section) holding a cell that is exactly one of its markers.
+        Sections without a marker cell keep the start_row from the spec.
+        """
+        if not self.sections:
+            return ()
+        marker_index = {}
+        for index, section in enumerate(self.sections):
+            for marker in section.markers:
+                marker_index.setdefault(marker, []).append(index)
+
+        found: Dict[int, int] = {}
+        if marker_index:
+            for row_idx, row in enumerate(rows):
+                if row_idx < self.header_rows:
+                    continue
+                for value in row:
+                    for index in marker_index.get(value.strip().lower(), ()):
+                        earlier = max((found[before] for before in range(index) if before in found), default=-1)
+                        if index not in found and earlier < row_idx:
+                            found[index] = row_idx
+                if len(found) == len(self.sections):
+                    break
+
+        starts = []
+        for index, section in enumerate(self.sections):
+            start = found.get(index, section.start_row)
+            # Sections never overlap: a fallback row can't come before a detected one
+            starts.append(max(start, starts[-1]) if starts else start)
+        return tuple(starts)
+
+    def section_of(self, starts: Tuple[int, ...]) -> Callable[[int], str]:
+        """row index -> section name for the given section start rows"""
+        names = [section.name for section in self.sections]
+
+        def section_at(row_idx: int) -> str:
+            # Rows above the first section belong to it, like the header rows always did
+            return names[max(bisect_right(starts, row_idx) - 1, 0)]
+
+        return section_at
+
+    def cells(self, rows: Iterable[List[str]], section_starts: Optional[Tuple[int, ...]] = None) -> Iterator[CellEvent]:
+        """Every non-empty champion cell of a column-layout sheet, tagged with its class and section"""
+        section_of = self.section_of(section_starts) if section_starts else None
+        return iter_column_cells(rows, first_row=self.header_rows, section_of=section_of,
+                                 category_row=self.class_row)
+
+    def blocks(self, rows: Iterable[List[str]]) -> Iterator[Tuple[str, List[CellEvent]]]:
+        """Class blocks of a class-block sheet, cells tagged with their tier when the spec has tiers"""
+        return iter_class_blocks(rows, self.classes, tier_of=self.tier_of if self.tiers else None,
+                                 default_tier=self.default_tier, class_column=self.class_column)
+
+
+def compile_layout(name: str, spec: Dict) -> SheetLayout:
+    """Turn one JSON layout spec into a SheetLayout"""
+    if spec.get("layout") not in (COLUMNS, CLASS_BLOCKS):
+        raise ValueError(f"Unknown layout {spec.get('layout')!r} for sheet {name!r}")
+    return SheetLayout(
+        name=name,
+        layout=spec["layout"],
+        header_rows=spec.get("header_rows", 0),
+        class_row=spec.get("class_row", 0),
+        class_column=spec.get("class_column", 0),
+        tier_row=spec.get("tier_row"),
+        rated=spec.get("rated", False),
+        classes=tuple(class_name.lower() for class_name in spec.get("classes", ())),
+        tiers=tuple(spec.get("tiers", ())),
+        default_tier=spec.get("default_tier", ""),
+        sections=tuple(Section(section["name"], section.get("start_row", 0),
+                               tuple(marker.lower() for marker in section.get("markers", ())))
+                       for section in spec.get("sections", ())),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_layout_specs(path: str = LAYOUTS_FILE) -> Dict[str, Dict]:
+    """Load the raw layout specs from data/sheet_layouts.json"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_layouts(path: str = LAYOUTS_FILE) -> Dict[str, SheetLayout]:
+    """Compile (and remember) every layout in data/sheet_layouts.json"""
+    return {name: compile_layout(name, spec) for name, spec in load_layout_specs(path).items()}
+
+
+def sheet_layout(name: str) -> SheetLayout:
+    """Compiled layout for one of the sources in data/sheet_layouts.json"""
+    return load_layouts()[name]
@@ -0,0 +1,275 @@
+import codecs
+import csv
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+from urllib.request import url2pathname
+
+import openpyxl
+import requests
+
+# Size of each network read when streaming a sheet export
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class CellEvent:
+    """A single non-empty cell with its position and sheet context"""
+    row: int
+    col: int
+    value: str
+    category: str = ""
+    section: str = ""
+    tier: str = ""
+
+    @property
+    def a1(self) -> str:
+        """Spreadsheet-style cell reference (row 2, col 1 -> B3)"""
+        return column_letter(self.col) + str(self.row + 1)
+
+    def provenance(self, sheet: str, class_name: str, section: str) -> dict:
+        """Where a parsed record came from, kept so bad rows can be traced back"""
+        return {
+            "sheet": sheet,
+            "cell": self.a1,
+            "row": self.row,
+            "column": self.col,
+            "class": class_name,
+            "section": section,
+            "value": self.value,
+        }
+
+
+def column_letter(col: int) -> str:
+    """0-based column index to spreadsheet letters (0 -> A, 26 -> AA)"""
+    letters = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def iter_url_chunks(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    timeout: Optional[float] = None) -> Iterator[bytes]:
+    """Stream the raw bytes of a sheet export without holding the whole body.
+
+    timeout bounds connecting and each wait for more data (not the whole
+    download); None waits as long as it takes.
+    """
+    response = requests.get(url, stream=True, timeout=timeout)
+    try:
+        response.raise_for_status()
+        yield from response.iter_content(chunk_size=chunk_size)
+    finally:
+        response.close()
+
+
+def iter_file_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a saved sheet export from disk"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def save_chunks(chunks: Iterable[bytes], directory: str, suffix: str = ".csv") -> Tuple[str, str, int]:
+    """Write chunks to a content-addressed file and return (path, sha256, size)"""
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    # A temp file per download, so sheets fetched in parallel don't write over each other
+    fd, tmp_path = tempfile.mkstemp(prefix=".download-", suffix=suffix, dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    sha = digest.hexdigest()
+    path = os.path.join(directory, sha + suffix)
+    os.replace(tmp_path, path)
+    return path, sha, size
+
+
+def is_file_url(url: str) -> bool:
+    """True for file:// URLs (sheets recorded to disk, e.g. the build's golden fixtures)"""
+    return urlsplit(url).scheme == "file"
+
+
+def iter_source_chunks(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a sheet export from a file:// URL or over HTTP"""
+    if is_file_url(url):
+        return iter_file_chunks(url2pathname(urlsplit(url).path), chunk_size)
+    return iter_url_chunks(url, chunk_size)
+
+
+def decode_chunks(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Incrementally decode byte chunks (multi-byte characters may span chunks)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(texts: Iterable[str]) -> Iterator[str]:
+    """Split decoded text into lines, keeping line endings the way io.StringIO does"""
+    pending = ""
+    for text in texts:
+        pending += text
+        start = 0
+        newline = pending.find("\n")
+        while newline != -1:
+            yield pending[start:newline + 1]
+            start = newline + 1
+            newline = pending.find("\n", start)
+        pending = pending[start:]
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[List[str]]:
+    """bytes -> text -> lines -> csv rows, one row at a time"""
+    return csv.reader(iter_lines(decode_chunks(chunks, encoding)))
+
+
+def stream_csv_rows(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    timeout: Optional[float] = None) -> Iterator[List[str]]:
+    """Fetch a CSV export and yield its rows as they arrive"""
+    return iter_csv_rows(iter_url_chunks(url, chunk_size, timeout))
+
+
+def xlsx_export_url(csv_url: str) -> str:
+    """The whole-workbook XLSX export for a sheet's CSV export URL (all tabs, one download)"""
+    parts = urlsplit(csv_url)
+    query = {key: values[0] for key, values in parse_qs(parts.query).items() if key not in ("format", "gid")}
+    query["format"] = "xlsx"
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def xlsx_cell_text(value: Any) -> str:
+    """Render an XLSX cell value the way the CSV export writes it"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def xlsx_sheet_names(path: str) -> List[str]:
+    """Tab names of a saved workbook, in order"""
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_rows(path: str, sheet: Optional[str] = None) -> Iterator[List[str]]:
+    """Stream one tab of a saved workbook (the first by default) as rows of strings.
+
+    Uses openpyxl's read-only worksheet, which parses the sheet XML row by
+    row. Rows are padded to the sheet width and start at A1, so they look
+    exactly like rows from the CSV export of the same tab.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        if worksheet.max_column is None:
+            # The workbook doesn't record its size; find it with one extra streaming pass
+            worksheet.calculate_dimension(force=True)
+        for row in worksheet.iter_rows(min_row=1, min_col=1, max_col=worksheet.max_column or 1, values_only=True):
+            yield [xlsx_cell_text(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def split_header(rows: Iterable[List[str]], count: int) -> Tuple[List[List[str]], Iterator[List[str]]]:
+    """Read the first `count` rows up front and return them with an iterator over all rows"""
+    rows = iter(rows)
+    header = list(islice(rows, count))
+    return header, chain(header, rows)
+
+
+def iter_column_cells(rows: Iterable[List[str]], first_row: int = 0,
+                      section_of: Optional[Callable[[int], str]] = None,
+                      category_row: int = 0) -> Iterator[CellEvent]:
+    """Yield non-empty cells of the category columns in row-major order.
+
+    Row `category_row` (0 by default) holds the category headers; only columns
+    1..len(that row) with a non-empty header are reported, which matches how
+    the BG sheet is laid out.
+    """
+    categories = None
+    for row_idx, row in enumerate(rows):
+        if categories is None and row_idx == category_row:
+            categories = [(col_idx, header.strip()) for col_idx, header in enumerate(row) if col_idx > 0]
+            categories = [(col_idx, header) for col_idx, header in categories if header]
+        if row_idx < first_row or categories is None:
+            continue
+        section = section_of(row_idx) if section_of else ""
+        for col_idx, category in categories:
+            if col_idx >= len(row):
+                continue
+            value = row[col_idx].strip()
+            if value:
+                yield CellEvent(row_idx, col_idx, value, category, section)
+
+
+def iter_class_blocks(rows: Iterable[List[str]], class_names: Iterable[str],
+                      tier_of: Optional[Callable[[str], Optional[str]]] = None,
+                      default_tier: str = "", class_column: int = 0) -> Iterator[Tuple[str, List[CellEvent]]]:
+    """Group cells into class blocks that start at a class name in column A (or `class_column`).
+
+    Only one block is buffered at a time, so memory is bounded by the largest
+    class block instead of the whole sheet. Cells in a block are returned
+    column by column, row by row, which is the order rankings are assigned in.
+
+    When `tier_of` is given each cell is tagged with the nearest tier header
+    at or above it in the same column (headers carry across class blocks).
+    """
+    class_names = {name.lower() for name in class_names}
+    width = None
+    last_tier = {}
+    current_class = None
+    block = []
+
+    for row_idx, row in enumerate(rows):
+        if width is None:
+            width = len(row)
+
+        cell_a = row[class_column] if len(row) > class_column else ""
+        class_name = cell_a.strip().title() if cell_a.strip() else ""
+        if class_name.lower() in class_names:
+            if current_class is not None:
+                block.sort(key=lambda cell: (cell.col, cell.row))
+                yield current_class, block
+            current_class = class_name
+            block = []
+
+        for col_idx in range(1, min(width, len(row))):
+            if col_idx == class_column:
+                continue
+            value = row[col_idx].strip()
+            if tier_of is not None:
+                tier = tier_of(value)
+                if tier:
+                    last_tier[col_idx] = tier
+            if current_class is not None and value:
+                block.append(CellEvent(row_idx, col_idx, value, current_class,
+                                       tier=last_tier.get(col_idx, default_tier)))
+
+    if current_class is not None:
+        block.sort(key=lambda cell: (cell.col, cell.row))
+        yield current_class, block
@@ -0,0 +1,157 @@
+import json
+import os
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List
+
+from utils.cell_tokenizer import tokenize_cell
+from utils.keyword_matcher import compile_keywords
+from utils.sheet_layout import CLASS_BLOCKS, COLUMNS, SheetLayout, compile_layout
+from utils.sheet_stream import split_header
+
+# Community tier lists besides the two core sheets; each names a layout in data/sheet_layouts.json
+SOURCES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sources.json")
+
+# Fields of a source entry that make up a champion's per-source record
+SUMMARY_FIELDS = ("class", "tier", "rank", "rating", "type")
+
+
+class SourceAdapter:
+    """A tier-list source: turns the rows of its sheet into per-champion entries.
+
+    Entries are keyed by the lowercased champion name. Every entry carries the
+    provenance of the cell it came from; the other fields depend on what the
+    source ranks (tier and rank for ranking lists, rating and BG type for rated
+    lists). Adapters are picked by layout kind, so a new list that looks like
+    an existing one only needs a layout spec and an entry in data/sources.json.
+    """
+    kind = ""
+
+    def __init__(self, name: str, layout: SheetLayout, header_keywords: Iterable[str] = ()):
+        self.name = name
+        self.layout = layout
+        self.header_matcher = compile_keywords(tuple(header_keywords))
+
+    def is_header(self, value: str) -> bool:
+        """Exactly (or within 3 characters of) a header keyword; champion names like "photon" that merely
+        contain part of one are kept"""
+        stripped = value.lower().strip()
+        longest_keyword = self.header_matcher.longest_match(stripped)
+        return bool(longest_keyword) and longest_keyword >= len(stripped) - 3
+
+    def parse(self, open_rows: Callable[[], Iterable[List[str]]]) -> Dict:
+        """Parse the sheet into {"entries": {name_key: entry}, ...}; open_rows() streams the rows from the top"""
+        raise NotImplementedError
+
+
+class ColumnSource(SourceAdapter):
+    """Champions listed down class columns, e.g. Vega's BG sheet ("Nico Minoru - 10🔥")"""
+    kind = COLUMNS
+
+    def parse(self, open_rows: Callable[[], Iterable[List[str]]]) -> Dict:
+        layout = self.layout
+        # One pass to find where the sections start, one to parse
+        section_starts = layout.find_sections(open_rows()) if layout.sections else None
+        cells = sorted(layout.cells(open_rows(), section_starts), key=lambda cell: (cell.col, cell.row))
+
+        # Cells are replayed column by column so later columns win for duplicate names
+        entries = {}
+        last_tier = {}
+        rank = {}
+        for cell in cells:
+            if layout.tiers:
+                tier = layout.tier_of(cell.value)
+                if tier:
+                    last_tier[cell.col] = tier
+                    continue
+            if not layout.rated and self.is_header(cell.value):
+                continue
+
+            tokens = tokenize_cell(cell.value, rated=layout.rated)
+            if layout.rated and tokens.rating is None:
+                continue  # Skip if no valid rating found
+            if not layout.rated and len(tokens.name) <= 1:
+                continue
+
+            entry = {"rating": tokens.rating, "type": cell.section, "symbols": list(tokens.symbols)}
+            if layout.tiers:
+                entry["tier"] = last_tier.get(cell.col, layout.default_tier)
+            if not layout.rated:
+                rank[cell.col] = rank.get(cell.col, 0) + 1
+                entry["rank"] = rank[cell.col]
+            entry["provenance"] = cell.provenance(self.name, cell.category, cell.section)
+            entries[tokens.name.lower()] = entry
+
+        parsed = {"entries": entries}
+        if section_starts:
+            parsed["sections"] = {section.name: start for section, start in zip(layout.sections, section_starts)}
+        return parsed
+
+
+class ClassBlockSource(SourceAdapter):
+    """Champions ranked column by column inside class blocks, e.g. the general class rankings"""
+    kind = CLASS_BLOCKS
+
+    def parse(self, open_rows: Callable[[], Iterable[List[str]]]) -> Dict:
+        layout = self.layout
+        header, rows = split_header(open_rows(), layout.header_rows)
+        tier_row = header[layout.tier_row] if layout.tier_row is not None and len(header) > layout.tier_row else []
+
+        entries = {}
+        for class_name, cells in layout.blocks(rows):
+            rank = 1  # Rankings restart at 1 for each class
+            for cell in cells:
+                if self.is_header(cell.value):
+                    continue
+
+                # The name runs up to the first symbol; the symbols follow it
+                tokens = tokenize_cell(cell.value)
+                if not tokens.name or len(tokens.name) <= 1:
+                    continue
+
+                # The tier is the nearest tier header above this cell in the same column;
+                # fall back to the tier row at the top
+                tier = cell.tier
+                if tier == layout.default_tier and layout.tier_row is not None and cell.row >= layout.tier_row:
+                    tier_header = tier_row[cell.col].strip() if len(tier_row) > cell.col else ""
+                    tier = layout.tier_of(tier_header) or tier
+
+                entries[tokens.name.lower()] = {
+                    "name": tokens.name,
+                    "class": class_name,
+                    "rank": rank,
+                    "tier": tier,
+                    "symbols": list(tokens.symbols),
+                    "provenance": cell.provenance(self.name, class_name, tier),
+                }
+                rank += 1
+
+        return {"entries": entries}
+
+
+# Adapter for each layout kind in data/sheet_layouts.json
+SOURCE_ADAPTERS = {adapter.kind: adapter for adapter in (ColumnSource, ClassBlockSource)}
+
+
+def make_source(name: str, layout_name: str, layout_spec: Dict, header_keywords: Iterable[str] = ()) -> SourceAdapter:
+    """The adapter for a source, chosen by the kind of its layout"""
+    layout = compile_layout(layout_name, layout_spec)
+    return SOURCE_ADAPTERS[layout.layout](name, layout, header_keywords)
+
+
+def source_summary(entry: Dict) -> Dict:
+    """What a source says about one champion: class, tier, rank, rating and BG type where it has them"""
+    summary = {"class": entry["provenance"]["class"]}
+    for field in SUMMARY_FIELDS[1:]:
+        if entry.get(field) not in (None, ""):
+            summary[field] = entry[field]
+    return summary
+
+
+@lru_cache(maxsize=None)
+def load_source_specs(path: str = SOURCES_FILE) -> List[Dict]:
+    """The extra tier-list sources in data/sources.json: [{"name", "label", "url", "layout"}]"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)["sources"]
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from utils.metrics import metrics
+
+metrics.describe("mcoc_startup_phase_seconds", "gauge", "How long each startup phase took (phases may overlap)")
+metrics.describe("mcoc_startup_seconds", "gauge", "Seconds from creating the bot until it could serve commands")
+
+
+class StartupTimer:
+    """Times the phases of bringing the bot up and says when it can serve commands.
+
+    Phases may overlap (the data loads while the gateway connects), so each
+    is timed on its own; `total` is the time from creating the timer until
+    mark_ready(). Phases are timed with phase() as a context manager, or with
+    begin() and end() when they start and finish in different callbacks.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}
+        self.total: Optional[float] = None
+        self.ready = asyncio.Event()
+        self._begun: Dict[str, float] = {}
+        metrics.gauge("mcoc_startup_phase_seconds",
+                      lambda: {(("phase", name),): seconds for name, seconds in self.phases.items()})
+        metrics.gauge("mcoc_startup_seconds", lambda: self.total)
+
+    def begin(self, name: str):
+        self._begun.setdefault(name, self.clock())
+
+    def end(self, name: str):
+        """Finish a phase begun with begin(); only the first end() counts"""
+        if name in self._begun and name not in self.phases:
+            self.phases[name] = self.clock() - self._begun[name]
+            logging.info(f"Startup: {name} took {self.phases[name]:.2f}s")
+
+    @contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark_ready(self):
+        self.total = self.clock() - self.started
+        self.ready.set()
+        logging.info(self.summary())
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Wait until ready, at most timeout seconds; True if it is"""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready.is_set()
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        if self.total is None:
+            return f"Starting up ({phases or 'nothing finished yet'})"
+        return f"Ready to serve commands after {self.total:.2f}s ({phases})"
@@ -0,0 +1,180 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from utils.metrics import metrics
+
+# Commands slower than this are written to the slow trace file with their spans (0: tracing off)
+SLOW_TRACE_SECONDS = 0.25
+SLOW_TRACE_FILE = "slow_traces.jsonl"
+# The file is moved aside to <file>.1 (replacing the last one) when it grows past this
+MAX_TRACE_FILE_BYTES = 10_000_000
+
+metrics.describe("mcoc_slow_traces_total", "counter", "Commands slower than the trace threshold, by command")
+
+# The span that spans started now become children of; None outside a traced command
+_current: ContextVar[Optional["Span"]] = ContextVar("mcoc_current_span", default=None)
+
+
+class Span:
+    """One timed step of a command, with the steps it took as children.
+
+    Children may be added from the command pool threads (run_blocking copies
+    the context into the job), which list.append allows without a lock. As a
+    context manager it is the current span until the block ends.
+    """
+
+    __slots__ = ("name", "attrs", "start", "end", "children", "_token")
+
+    def __init__(self, name: str, attrs: Dict[str, object]):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List[Span] = []
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        self.end = time.perf_counter()
+        if kind is not None:
+            self.attrs["error"] = kind.__name__
+        _current.reset(self._token)
+        return False
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: Optional[float] = None) -> dict:
+        """The span tree as JSON-ready dicts; times in milliseconds from the root's start"""
+        origin = self.start if origin is None else origin
+        tree = {"name": self.name, "at_ms": round((self.start - origin) * 1000, 3),
+                "ms": round(self.duration * 1000, 3)}
+        if self.attrs:
+            tree["attrs"] = {name: value if isinstance(value, (int, float, bool, type(None))) else str(value)
+                             for name, value in self.attrs.items()}
+        if self.children:
+            tree["children"] = [child.to_dict(origin) for child in list(self.children)]
+        return tree
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+class _NoSpan:
+    """What span() returns outside a traced command: a context manager that does nothing"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, kind, error, traceback):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **attrs):
+    """with span(name): times the block as a child of the current span; does nothing outside a traced command"""
+    parent = _current.get()
+    if parent is None:
+        return _NO_SPAN
+    child = Span(name, attrs)
+    parent.children.append(child)
+    return child
+
+
+def traced(name: str) -> Callable:
+    """Decorator: each call of the function is a span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if there is one"""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+class Tracer:
+    """Starts and finishes the root span of each command and keeps the slow ones.
+
+    start() makes a root span current for the rest of the task (discord.py
+    runs the before-invoke hook, the command and the after-invoke hook in one
+    task), so span() calls in the cog, the handler and the data manager
+    build its tree. finish() appends commands slower than slow_seconds to
+    `path` as one JSON line each: the command, when it ran, how long it took
+    and the tree of spans, each with its offset and duration.
+    """
+
+    def __init__(self, slow_seconds: float = SLOW_TRACE_SECONDS, path: str = SLOW_TRACE_FILE,
+                 max_bytes: int = MAX_TRACE_FILE_BYTES):
+        self.slow_seconds = slow_seconds
+        self.path = path
+        self.max_bytes = max_bytes
+        self.written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.slow_seconds > 0
+
+    def start(self, name: str, **attrs) -> Optional[Span]:
+        """Begin a trace in the current context; None when tracing is off"""
+        if not self.enabled:
+            return None
+        root = Span(name, attrs)
+        root._token = _current.set(root)
+        return root
+
+    def finish(self, root: Optional[Span], **attrs) -> bool:
+        """End a trace begun with start() in the same context; True if it was slow and written"""
+        if root is None:
+            return False
+        root.end = time.perf_counter()
+        root.attrs.update(attrs)
+        try:
+            _current.reset(root._token)
+        except ValueError:
+            # Finished from another context than it started in; the task's context ends with it anyway
+            pass
+        if root.duration < self.slow_seconds:
+            return False
+        metrics.inc("mcoc_slow_traces_total", {"command": root.name})
+        self.write(root)
+        return True
+
+    def write(self, root: Span):
+        record = {"time": round(time.time() - root.duration, 3), **root.to_dict()}
+        line = json.dumps(record) + "\n"
+        try:
+            with self._lock:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                self.written += 1
+        except OSError as e:
+            logging.warning(f"Could not write a slow trace to {self.path}: {e}")
+
+
+# The bot's tracer; bot_main sets its threshold and file from the environment
+tracer = Tracer()